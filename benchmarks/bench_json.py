@@ -0,0 +1,129 @@
+"""
+Микробенчмарк JSON: stdlib против utils.serializer
+--------------------------------------------------
+Запуск из корня проекта:
+    python -m benchmarks.bench_json [кол-во позиций]
+
+Сравнивает:
+- декодирование ответа /v5/position/list (r.text() + json.loads + dict
+  на позицию против bytes → serializer.decode → модели Position);
+- сохранение state.json (json.dump indent=2 против serializer.dump_file).
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from utils import serializer
+from utils.models import parse_positions
+from utils.wire import PositionListResponse, get_field
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT", "CAKEUSDT", "XTERUSDT", "SUSDT"]
+
+
+def make_position_payload(n: int) -> bytes:
+    """Ответ /v5/position/list с n позициями (поля и формат как у Bybit)."""
+    rows = []
+    for i in range(n):
+        price = random.uniform(0.05, 60000)
+        size = random.uniform(0.01, 5000)
+        rows.append({
+            "positionIdx": 0, "riskId": 1, "riskLimitValue": "200000",
+            "symbol": f"{SYMBOLS[i % len(SYMBOLS)][:-4]}{i}USDT",
+            "side": random.choice(["Buy", "Sell"]),
+            "size": f"{size:.3f}", "avgPrice": f"{price:.4f}",
+            "positionValue": f"{size * price:.4f}", "tradeMode": 0,
+            "positionStatus": "Normal", "autoAddMargin": 0, "adlRankIndicator": 2,
+            "leverage": str(random.choice([3, 5, 10, 20])),
+            "positionBalance": f"{size * price / 10:.4f}",
+            "markPrice": f"{price * 1.001:.4f}", "liqPrice": f"{price * 0.9:.4f}",
+            "bustPrice": "", "positionMM": "0.5", "positionIM": "1.2",
+            "tpslMode": "Full", "takeProfit": "0", "stopLoss": "0", "trailingStop": "0",
+            "unrealisedPnl": f"{random.uniform(-50, 50):.4f}", "curRealisedPnl": "-0.12",
+            "cumRealisedPnl": "-3.5", "seq": 4688002127, "isReduceOnly": False,
+            "mmrSysUpdatedTime": "", "leverageSysUpdatedTime": "",
+            "createdTime": "1676538056258", "updatedTime": "1697673600012",
+        })
+    body = {
+        "retCode": 0, "retMsg": "OK",
+        "result": {"list": rows, "nextPageCursor": "", "category": "linear"},
+        "retExtInfo": {}, "time": 1697673600512,
+    }
+    return json.dumps(body).encode()
+
+
+def parse_stdlib(raw: bytes) -> list:
+    """Прежний путь: текст → json.loads → dict на каждую позицию."""
+    data = json.loads(raw.decode("utf-8"))
+    out = []
+    for it in data.get("result", {}).get("list") or []:
+        size = float(it.get("size") or 0.0)
+        if size <= 0:
+            continue
+        out.append({
+            "symbol": (it.get("symbol") or "").upper(),
+            "side": (it.get("side") or "").lower(),
+            "size": size,
+            "entryPrice": float(it.get("avgPrice") or 0.0),
+            "markPrice": float(it.get("markPrice") or 0.0),
+            "positionValue": float(it.get("positionValue") or 0.0),
+            "unrealisedPnl": float(it.get("unrealisedPnl") or 0.0),
+            "leverage": int(float(it.get("leverage") or 10)),
+        })
+    return out
+
+
+def parse_typed(raw: bytes) -> list:
+    """Новый путь: bytes → serializer.decode → модели Position."""
+    data = serializer.decode(raw, PositionListResponse)
+    return parse_positions(get_field(get_field(data, "result"), "list") or [])
+
+
+def make_state(n: int) -> dict:
+    hist = [{
+        "symbol": f"COIN{i}USDT", "side": "sell", "qty": 20.0, "entry_price": 0.2992,
+        "leverage": 5, "opened_at": "2025-10-07T14:23:11.172485", "averages": 0,
+        "exit_price": 0.0, "pnl": 0.0, "closed_at": "2025-10-07T14:44:39.241103",
+        "duration_sec": 1288, "note": "Закрыто мастером — копия подписчика",
+    } for i in range(n)]
+    return {"history": hist, "open": {}, "settings": {"NOTIFY_LANG": "ru"}, "updated_at": None}
+
+
+def _bench(fn, number: int) -> float:
+    """Лучшее из 5 повторов, мкс на вызов."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    raw = make_position_payload(n)
+    assert [p["symbol"] for p in parse_stdlib(raw)] == [p.symbol for p in parse_typed(raw)]
+
+    state = make_state(1500)
+    tmp = os.path.join(tempfile.mkdtemp(), "state.json")
+
+    def save_stdlib():
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+
+    def save_fast():
+        serializer.dump_file(state, tmp)
+
+    rows = [
+        (f"/v5/position/list, {n} поз. ({len(raw) // 1024} KB)",
+         _bench(lambda: parse_stdlib(raw), 200), _bench(lambda: parse_typed(raw), 200)),
+        ("state.json, 1500 сделок",
+         _bench(save_stdlib, 10), _bench(save_fast, 10)),
+    ]
+
+    print(f"backend: {serializer.BACKEND}")
+    print(f"{'сценарий':<40} {'stdlib, мкс':>12} {'fast, мкс':>12} {'x':>6}")
+    for name, slow, fast in rows:
+        print(f"{name:<40} {slow:>12.1f} {fast:>12.1f} {slow / fast:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Бенчмарк холодного старта: запуск процесса → первый возможный ордер
+-------------------------------------------------------------------
+Запуск из корня проекта:
+    python -m benchmarks.bench_startup [--rtt-ms 40] [--runs 5]
+
+Поднимает локальный фейковый Bybit (aiohttp.web) с искусственной сетевой
+задержкой rtt-ms на каждый ответ и для каждого прогона запускает чистый
+дочерний процесс, который:
+1. импортирует стек трейдера (import);
+2. выполняет CopyTrader.prepare() — ключи, часы, соединения,
+   инструменты, кэш плеч, снимок мастера (ready);
+3. сразу копирует открытие позиции мастера (on_open) — до получения
+   ответа на /v5/order/create (first_order).
+
+Время считается от загрузки модуля бенчмарка в дочернем процессе; печатаются
+медиана и минимум по прогонам, а также число запросов до первого ордера.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_T0 = time.perf_counter()   # до импорта стека трейдера
+
+
+def _fake_response(path: str) -> dict:
+    if path == "/v5/market/time":
+        return {"retCode": 0, "result": {"timeNano": str(time.time_ns())}}
+    if path == "/v5/account/wallet-balance":
+        return {"retCode": 0, "result": {"list": [{
+            "totalEquity": "10000", "totalAvailableBalance": "10000", "totalWalletBalance": "10000",
+            "totalPerpUPL": "0", "coin": [],
+        }]}}
+    if path == "/v5/market/instruments-info":
+        return {"retCode": 0, "result": {"nextPageCursor": "", "list": [
+            {"symbol": "BTCUSDT", "lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001"}},
+        ]}}
+    if path in ("/v5/position/list", "/v5/order/realtime", "/v5/copytrading/master/positions"):
+        return {"retCode": 0, "result": {"nextPageCursor": "", "list": []}}
+    if path == "/v5/order/create":
+        return {"retCode": 0, "result": {"orderId": "1", "orderLinkId": ""}}
+    return {"retCode": 0, "result": {}}
+
+
+async def _serve(port: int, rtt_ms: float, ready: asyncio.Event, counts: dict):
+    from aiohttp import web
+
+    async def handler(request):
+        counts[request.path] = counts.get(request.path, 0) + 1
+        await asyncio.sleep(rtt_ms / 1000)
+        return web.json_response(_fake_response(request.path))
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    ready.set()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+# ============================================================
+#  ДОЧЕРНИЙ ПРОЦЕСС
+# ============================================================
+
+async def _child(port: int) -> dict:
+    from utils import endpoints
+    url = f"http://127.0.0.1:{port}"
+    endpoints.HOSTS["mainnet"] = [url, url]
+
+    from trader.core import CopyTrader
+    from trader.events import OpenEvent
+    imported = time.perf_counter()
+
+    cfg = {
+        "MASTER_API_KEY": "k", "MASTER_API_SECRET": "s",
+        "FOLLOWER_API_KEY": "k", "FOLLOWER_API_SECRET": "s",
+        "STATE_FILE": os.path.join(tempfile.gettempdir(), "bench_startup_state.json"),
+    }
+    trader = CopyTrader(cfg)
+    await trader.prepare()
+    ready = time.perf_counter()
+    requests_before = trader.follower_api.request_count
+
+    await trader.on_open(OpenEvent(symbol="BTCUSDT", side="buy", qty=0.01, price=50000.0, leverage=10))
+    first_order = time.perf_counter()
+    order_requests = trader.follower_api.request_count - requests_before
+    await trader.close()
+    return {
+        "import_ms": (imported - _T0) * 1000,
+        "ready_ms": (ready - _T0) * 1000,
+        "first_order_ms": (first_order - _T0) * 1000,
+        "order_requests": order_requests,
+    }
+
+
+# ============================================================
+#  РОДИТЕЛЬ
+# ============================================================
+
+async def _main(args) -> None:
+    counts: dict = {}
+    ready = asyncio.Event()
+    server = asyncio.create_task(_serve(args.port, args.rtt_ms, ready, counts))
+    await ready.wait()
+
+    runs = []
+    for _ in range(args.runs):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.bench_startup", "--child", "--port", str(args.port),
+            stdout=subprocess.PIPE,
+        )
+        out, _ = await proc.communicate()
+        runs.append(json.loads(out.decode().strip().splitlines()[-1]))
+    server.cancel()
+
+    print(f"RTT фейкового Bybit: {args.rtt_ms:.0f} мс, прогонов: {args.runs}")
+    print(f"{'этап':<24} {'медиана, мс':>12} {'мин, мс':>10}")
+    for key, name in (("import_ms", "импорт"), ("ready_ms", "готов к копированию"),
+                      ("first_order_ms", "первый ордер")):
+        values = [r[key] for r in runs]
+        print(f"{name:<24} {statistics.median(values):>12.1f} {min(values):>10.1f}")
+    print(f"HTTP-запросов подписчика на первый ордер: {runs[-1]['order_requests']}")
+    print("запросы по эндпоинтам (все прогоны):", json.dumps(counts, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(_child(args.port))))
+    else:
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
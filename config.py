@@ -8,6 +8,28 @@ def _as_bool(v: str | None, default: bool = False) -> bool:
         return default
     return str(v).strip().lower() in ("1", "true", "yes", "y", "on")
 
+def _load_extra_masters(default_env: str) -> list:
+    """
+    Дополнительные мастера: MASTER_2_*, MASTER_3_*, ... (до MASTER_9_*).
+    Ключи каждого: API_KEY, API_SECRET, ENV, MODE, WEIGHT, NAME.
+    """
+    masters = []
+    for n in range(2, 10):
+        prefix = f"MASTER_{n}_"
+        key = os.getenv(prefix + "API_KEY", "").strip()
+        if not key:
+            continue
+        env = os.getenv(prefix + "ENV", default_env).strip().lower()
+        masters.append({
+            "MASTER_NAME": os.getenv(prefix + "NAME", f"master{n}").strip(),
+            "MASTER_MODE": os.getenv(prefix + "MODE", "trade").strip(),
+            "MASTER_ENV": env if env in ("demo", "testnet", "mainnet") else default_env,
+            "MASTER_API_KEY": key,
+            "MASTER_API_SECRET": os.getenv(prefix + "API_SECRET", "").strip(),
+            "MASTER_WEIGHT": float(os.getenv(prefix + "WEIGHT", "1.0") or "1.0"),
+        })
+    return masters
+
 def load_config() -> dict:
     # Загружаем .env (молчаливо)
     load_dotenv(_ENV_PATH, override=False)
@@ -26,6 +48,12 @@ def load_config() -> dict:
         # мастер: может быть обычный trade-аккаунт или "copy" (копитрейдер Bybit). Логика у тебя уже есть.
         "MASTER_MODE": os.getenv("MASTER_MODE", "trade").strip(),  # trade | copy
 
+        # Несколько мастеров: имя и вес основного + MASTER_<N>_* (позиции неттингуются по символу).
+        # Вес — множитель объёма позиции мастера, без нормировки по его equity.
+        "MASTER_NAME": os.getenv("MASTER_NAME", "master").strip(),
+        "MASTER_WEIGHT": float(os.getenv("MASTER_WEIGHT", "1.0") or "1.0"),
+        "MASTERS": _load_extra_masters(master_env),
+
         # сети/окружения
         "MASTER_ENV": master_env,       # demo | testnet | mainnet
         "FOLLOWER_ENV": follower_env,   # demo | testnet | mainnet
@@ -40,12 +68,74 @@ def load_config() -> dict:
         "TELEGRAM_BOT_TOKEN": os.getenv("TELEGRAM_BOT_TOKEN", "").strip(),
         "TELEGRAM_USER_ID": int(os.getenv("TELEGRAM_USER_ID", "0") or "0"),
 
+        # Живой просмотр позиций: мин. интервал редактирования сообщения и время жизни просмотра
+        "LIVE_VIEW_SEC": float(os.getenv("LIVE_VIEW_SEC", "3") or "3"),
+        "LIVE_VIEW_TTL_SEC": float(os.getenv("LIVE_VIEW_TTL_SEC", "600") or "600"),
+
+        # Режим копирования: positions — по исполненным позициям, orders — зеркалировать ордера мастера
+        "COPY_MODE": os.getenv("COPY_MODE", "positions").strip().lower(),
+
+        # Защита от проскальзывания по локальному стакану (параметры — в settings state.json)
+        "SLIPPAGE_GUARD": _as_bool(os.getenv("SLIPPAGE_GUARD", "false")),
+
         # Риск и поведение
-        "TEST_MODE": _as_bool(os.getenv("TEST_MODE", "true")),  # вкл/выкл торговлю у подписчика
+        # TEST_MODE=true — новые входы мастера не копируются (закрытия сопровождаются)
+        "TEST_MODE": _as_bool(os.getenv("TEST_MODE", "false")),
         "MAX_RISK_PCT": float(os.getenv("MAX_RISK_PCT", "5.0") or "5.0"),
 
         # Интервалы опроса
         "POLL_INTERVAL_SEC": float(os.getenv("POLL_INTERVAL_SEC", "5") or "5"),
+        # Адаптивный опрос (REST): сжатие после изменений, экспоненциальный откат в тишине
+        "POLL_MIN_SEC": float(os.getenv("POLL_MIN_SEC", "1") or "1"),
+        "POLL_MAX_SEC": float(os.getenv("POLL_MAX_SEC", "30") or "30"),
+        "POLL_BACKOFF": float(os.getenv("POLL_BACKOFF", "1.5") or "1.5"),
+        "POLL_HOT_TICKS": int(os.getenv("POLL_HOT_TICKS", "5") or "5"),
+        "POLL_REQUEST_BUDGET_PER_MIN": int(os.getenv("POLL_REQUEST_BUDGET_PER_MIN", "120") or "120"),
+
+        # Аварийное закрытие: период обновления заготовок закрытия и проверки просадки
+        "KILL_REFRESH_SEC": float(os.getenv("KILL_REFRESH_SEC", "5") or "5"),
+
+        # Event loop: uvloop (если установлен) и сторож задержки планирования
+        "UVLOOP": _as_bool(os.getenv("UVLOOP", "false")),
+        "LOOP_WATCHDOG": _as_bool(os.getenv("LOOP_WATCHDOG", "true")),
+        "LOOP_LAG_INTERVAL_MS": float(os.getenv("LOOP_LAG_INTERVAL_MS", "20") or "20"),
+        "LOOP_LAG_WARN_MS": float(os.getenv("LOOP_LAG_WARN_MS", "100") or "100"),
+        "LOOP_LAG_ALERT_MS": float(os.getenv("LOOP_LAG_ALERT_MS", "500") or "500"),
+        # /profile из Telegram (только TELEGRAM_USER_ID): верхняя граница длительности
+        "PROFILE_MAX_SEC": float(os.getenv("PROFILE_MAX_SEC", "120") or "120"),
+
+        # Движок событий: размер очереди актора одного символа
+        "ACTOR_QUEUE_SIZE": int(os.getenv("ACTOR_QUEUE_SIZE", "32") or "32"),
+
+        # Теневой подписчик: те же события мастера, виртуальное исполнение (settings — в своём файле)
+        "SHADOW": _as_bool(os.getenv("SHADOW", "false")),
+        "SHADOW_STATE_FILE": os.getenv("SHADOW_STATE_FILE", "state_shadow.json").strip(),
+
+        # Шардирование подписчиков по процессам: WORKERS > 0 включает режим супервизора
+        "WORKERS": int(os.getenv("WORKERS", "0") or "0"),
+        "FOLLOWERS_FILE": os.getenv("FOLLOWERS_FILE", "followers.json").strip(),
+        "IPC_SOCKET": os.getenv("IPC_SOCKET", "/tmp/bybit-copy.sock").strip(),
+
+        # Запись потоков (снимки, WS, запросы/ответы API) в RECORD_DIR; пусто — выключено
+        "RECORD_DIR": os.getenv("RECORD_DIR", "").strip(),
+        "RECORD_MAX_MB": int(os.getenv("RECORD_MAX_MB", "64") or "64"),
+        "RECORD_MAX_FILES": int(os.getenv("RECORD_MAX_FILES", "20") or "20"),
+        "RECORD_KINDS": [k.strip() for k in os.getenv("RECORD_KINDS", "").split(",") if k.strip()],
+
+        # Веб-панель (Flask-SocketIO): DASHBOARD_PORT=0 — выключена
+        "DASHBOARD_PORT": int(os.getenv("DASHBOARD_PORT", "0") or "0"),
+        "DASHBOARD_HOST": os.getenv("DASHBOARD_HOST", "127.0.0.1").strip(),
+        "DASHBOARD_FPS": float(os.getenv("DASHBOARD_FPS", "4") or "4"),
+
+        # Экспорт закрытых сделок в Google Sheets (SHEETS_FAKE — локальный CSV вместо API)
+        "SHEETS_SPREADSHEET_ID": os.getenv("SHEETS_SPREADSHEET_ID", "").strip(),
+        "SHEETS_WORKSHEET": os.getenv("SHEETS_WORKSHEET", "trades").strip(),
+        "GOOGLE_CREDENTIALS_FILE": os.getenv("GOOGLE_CREDENTIALS_FILE", "credentials.json").strip(),
+        "SHEETS_FAKE": _as_bool(os.getenv("SHEETS_FAKE", "false")),
+        "SHEETS_STATE_FILE": os.getenv("SHEETS_STATE_FILE", "sheets_export.json").strip(),
+        "SHEETS_BATCH": int(os.getenv("SHEETS_BATCH", "200") or "200"),
+        "SHEETS_FLUSH_SEC": float(os.getenv("SHEETS_FLUSH_SEC", "5") or "5"),
+        "SHEETS_WRITES_PER_MIN": int(os.getenv("SHEETS_WRITES_PER_MIN", "50") or "50"),
 
         # Файл состояния
         "STATE_FILE": os.getenv("STATE_FILE", "state.json").strip(),
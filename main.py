@@ -3,14 +3,23 @@
 --------------------------------------------
 Запускает трейдер и Telegram-интерфейс.
 Добавлена корректная обработка SIGINT (Ctrl+C) и SIGTERM.
+
+Быстрый старт: цикл копирования запускается первым, а модули
+необязательных функций (шардирование, теневой подписчик, Sheets,
+веб-панель) импортируются только когда включены. aiogram импортируется
+в отдельном потоке, пока трейдер проверяет ключи и прогревает соединения.
+
+UVLOOP=true — цикл uvloop (если установлен); сторож цикла (LOOP_WATCHDOG)
+следит, чтобы синхронные вызовы не задерживали отправку ордеров.
 """
 
 import asyncio
+import importlib
 import logging
 import signal
 from config import load_config
 from trader.core import CopyTrader
-from telegram.ui import TelegramUI
+from utils import loop_watchdog, recorder
 
 
 logging.basicConfig(
@@ -25,11 +34,86 @@ async def main():
     logger.info("🚀 Запуск бота копитрейдинга для подписчика...")
 
     cfg = load_config()
+    if cfg.get("RECORD_DIR"):
+        recorder.install(recorder.Recorder(
+            cfg["RECORD_DIR"],
+            max_bytes=cfg["RECORD_MAX_MB"] * 1024 * 1024,
+            max_files=cfg["RECORD_MAX_FILES"],
+            kinds=cfg["RECORD_KINDS"] or None,
+        ))
     trader = CopyTrader(cfg)
-    tg = TelegramUI(cfg, trader)
+    # сторож event loop: задержка планирования, стеки блокировок, тревога в Telegram
+    watchdog = None
+    if cfg.get("LOOP_WATCHDOG"):
+        watchdog = loop_watchdog.LoopWatchdog(
+            interval_ms=cfg["LOOP_LAG_INTERVAL_MS"],
+            warn_ms=cfg["LOOP_LAG_WARN_MS"],
+            alert_ms=cfg["LOOP_LAG_ALERT_MS"],
+        )
+        trader.loop_watchdog = watchdog
+        watchdog.start()
+    # копирование стартует сразу: prepare() идёт параллельно с остальной инициализацией
+    trader_task = asyncio.create_task(trader.start())
+    ui_module = asyncio.create_task(asyncio.to_thread(importlib.import_module, "telegram.ui"))
+
+    # теневой подписчик для проверки настроек на живом потоке мастера
+    # (подписывается на события до первой await — не пропустит ни одного тика)
+    shadow = None
+    if cfg.get("SHADOW"):
+        from trader.shadow import ShadowTrader
+
+        shadow = ShadowTrader(trader, cfg)
+        shadow.start()
+
+    # режим супервизора: дополнительные подписчики обслуживаются процессами-воркерами
+    supervisor = None
+    if cfg.get("WORKERS", 0) > 0:
+        from trader.sharding import Supervisor, load_followers
+
+        followers = load_followers(cfg.get("FOLLOWERS_FILE"))
+        if not followers:
+            logger.warning(f"WORKERS={cfg['WORKERS']}, но в {cfg.get('FOLLOWERS_FILE')} нет подписчиков.")
+        elif not hasattr(asyncio, "start_unix_server"):
+            logger.warning("Шардирование требует Unix-сокетов — недоступно на этой платформе.")
+        else:
+            supervisor = Supervisor(cfg, trader, cfg["WORKERS"], followers)
+            await supervisor.start()
+
+    # экспорт закрытых сделок в Google Sheets (фоновая очередь, цикл копирования не ждёт)
+    exporter = None
+    worksheet = None
+    if cfg.get("SHEETS_FAKE") or cfg.get("SHEETS_SPREADSHEET_ID"):
+        from utils.sheets_export import FakeSheetsClient, SheetsExporter, open_worksheet
+    if cfg.get("SHEETS_FAKE"):
+        worksheet = FakeSheetsClient("sheets_fake.csv")
+    elif cfg.get("SHEETS_SPREADSHEET_ID"):
+        worksheet = await asyncio.to_thread(
+            open_worksheet, cfg["GOOGLE_CREDENTIALS_FILE"], cfg["SHEETS_SPREADSHEET_ID"], cfg["SHEETS_WORKSHEET"]
+        )
+    if worksheet is not None:
+        exporter = SheetsExporter(
+            trader.stats,
+            worksheet,
+            state_file=cfg["SHEETS_STATE_FILE"],
+            batch_size=cfg["SHEETS_BATCH"],
+            flush_sec=cfg["SHEETS_FLUSH_SEC"],
+            writes_per_min=cfg["SHEETS_WRITES_PER_MIN"],
+        )
+        trader.stats.on_close_trade = exporter.notify
+        exporter.start()
+
+    # веб-панель: кадры из памяти трейдера, зрители не нагружают биржу
+    dashboard = None
+    if cfg.get("DASHBOARD_PORT"):
+        from web.dashboard import create_dashboard
+
+        dashboard = create_dashboard(trader, cfg)
+    if dashboard is not None:
+        dashboard.start()
+
+    tg = (await ui_module).TelegramUI(cfg, trader, supervisor=supervisor, shadow=shadow)
 
     # Создаём задачу
-    trader_task = asyncio.create_task(trader.start())
     tg_task = asyncio.create_task(tg.run())
 
     # Функция завершения
@@ -38,8 +122,18 @@ async def main():
         trader_task.cancel()
         tg_task.cancel()
         try:
-            await trader.master_api.close()
-            await trader.follower_api.close()
+            await trader.close()
+            if supervisor is not None:
+                await supervisor.close()
+            if shadow is not None:
+                await shadow.close()
+            if exporter is not None:
+                await exporter.close()
+            if dashboard is not None:
+                await dashboard.close()
+            if watchdog is not None:
+                await watchdog.close()
+            await asyncio.to_thread(recorder.shutdown)
         except Exception:
             pass
         await asyncio.sleep(0.5)
@@ -60,7 +154,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        loop_watchdog.run(main(), use_uvloop=load_config().get("UVLOOP", False))
     except KeyboardInterrupt:
         logger.warning("🟥 Остановлено пользователем (Ctrl+C).")
     except Exception as e:
@@ -0,0 +1,127 @@
+"""
+Графики статистики (кривая PnL и PnL по символам)
+-------------------------------------------------
+matplotlib рисует в отдельном процессе (ProcessPoolExecutor, spawn), поэтому
+рендер не занимает event loop бота и цикла копирования.
+
+Готовая картинка загружается в Telegram один раз: file_id кэшируется по
+ключу (окно, id последней сделки, дата UTC) и повторные запросы отправляют
+его без рендера и загрузки. Одинаковые запросы, пришедшие во время
+рендера, ждут один общий результат.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SIZE = 64
+
+
+def render_stats_chart(days: int, rows: List[Tuple[str, str, float]]) -> bytes:
+    """PNG: накопленный PnL по закрытым сделкам и сумма PnL по символам. Выполняется в воркере."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    times = [datetime.fromisoformat(r[0]) for r in rows]
+    equity: List[float] = []
+    total = 0.0
+    for _, _, pnl in rows:
+        total += pnl
+        equity.append(total)
+    by_symbol: Dict[str, float] = {}
+    for _, symbol, pnl in rows:
+        by_symbol[symbol] = by_symbol.get(symbol, 0.0) + pnl
+    top = sorted(by_symbol.items(), key=lambda kv: kv[1])
+    if len(top) > 20:
+        top = top[:10] + top[-10:]   # 10 худших и 10 лучших
+
+    fig, (ax_eq, ax_sym) = plt.subplots(
+        2, 1, figsize=(8, 7), gridspec_kw={"height_ratios": [3, 2]}
+    )
+    try:
+        ax_eq.set_title(f"PnL за {days} дн. (сделок: {len(rows)})")
+        if times:
+            ax_eq.step(times, equity, where="post", color="#2b7bba")
+            ax_eq.fill_between(times, equity, step="post", alpha=0.15, color="#2b7bba")
+        ax_eq.axhline(0, color="grey", linewidth=0.8)
+        ax_eq.grid(alpha=0.3)
+        fig.autofmt_xdate()
+
+        if top:
+            names = [s for s, _ in top]
+            values = [v for _, v in top]
+            colors = ["#2ca02c" if v >= 0 else "#d62728" for v in values]
+            ax_sym.barh(names, values, color=colors)
+        ax_sym.axvline(0, color="grey", linewidth=0.8)
+        ax_sym.set_title("PnL по символам, USDT")
+        ax_sym.grid(alpha=0.3, axis="x")
+
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=110)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+class ChartService:
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self.renders = 0
+        self.hits = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._file_ids: "OrderedDict[tuple, str]" = OrderedDict()
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: форк процесса с запущенным event loop и потоками небезопасен
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    async def send(self, bot: Bot, chat_id: int, stats, days: int):
+        last_id, rows = stats.chart_rows(days)
+        key = (days, last_id, datetime.utcnow().date().isoformat())
+
+        file_id = self._file_ids.get(key)
+        if file_id is not None:
+            self.hits += 1
+            self._file_ids.move_to_end(key)
+            await bot.send_photo(chat_id, file_id)
+            return
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            png = await asyncio.shield(pending)
+        else:
+            pending = asyncio.get_running_loop().run_in_executor(
+                self._executor(), render_stats_chart, days, rows
+            )
+            self._inflight[key] = pending
+            try:
+                png = await pending
+                self.renders += 1
+            finally:
+                self._inflight.pop(key, None)
+
+        msg = await bot.send_photo(chat_id, BufferedInputFile(png, filename=f"pnl_{days}d.png"))
+        if msg.photo:
+            self._file_ids[key] = msg.photo[-1].file_id
+            while len(self._file_ids) > _CACHE_SIZE:
+                self._file_ids.popitem(last=False)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
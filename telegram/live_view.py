@@ -0,0 +1,134 @@
+"""
+Живой просмотр открытых позиций
+-------------------------------
+Сообщение «📂 Открытые позиции» обновляет само себя через edit_text.
+Данные берутся только из памяти: снимок позиций CopyTrader.positions
+(обновляется циклом kill switch и обработкой событий) и mark price из
+публичного WS (tickers) — нажатия и обновления не делают запросов к бирже.
+
+Ограничения Telegram:
+- не чаще одного редактирования в LIVE_VIEW_SEC на чат;
+- не больше _EDITS_PER_SEC редактирований в секунду на весь бот;
+- текст не изменился — редактирование не отправляется;
+- RetryAfter — чат замолкает на указанное время.
+Через LIVE_VIEW_TTL_SEC без действий пользователя просмотр останавливается.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+
+from telegram.messages import get_positions_text, positions_page_kb, positions_pages
+
+logger = logging.getLogger(__name__)
+
+_EDITS_PER_SEC = 20
+
+
+@dataclass
+class _View:
+    chat_id: int
+    message_id: int
+    page: int = 0
+    text: str = ""
+    edited_at: float = 0.0
+    mute_until: float = 0.0
+    expires_at: float = 0.0
+
+
+class LivePositionsView:
+    def __init__(self, bot: Bot, trader, interval: float = 3.0, ttl: float = 600.0):
+        self.bot = bot
+        self.trader = trader
+        self.interval = interval
+        self.ttl = ttl
+        self.views: Dict[int, _View] = {}   # chat_id -> активный просмотр (один на чат)
+        self.edits = 0
+        self.skipped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def render(self, page: int):
+        positions = list(self.trader.positions.values())
+        marks = self.trader.market_stream.marks if self.trader.market_stream is not None else {}
+        age = time.monotonic() - self.trader.positions_at if self.trader.positions_at else None
+        pages = positions_pages(len(positions))
+        page = min(page, pages - 1)
+        return get_positions_text(positions, marks, page, age_sec=age), positions_page_kb(page, pages), page
+
+    async def open(self, chat_id: int):
+        """Новое сообщение просмотра; предыдущее в этом чате перестаёт обновляться."""
+        stream = self.trader.ensure_market_stream()
+        if self.trader.positions:
+            await stream.ensure_tickers(self.trader.positions.keys())
+        text, kb, page = self.render(0)
+        msg = await self.bot.send_message(chat_id, text, reply_markup=kb)
+        now = time.monotonic()
+        self.views[chat_id] = _View(chat_id, msg.message_id, page, text, now, 0.0, now + self.ttl)
+        self.start()
+
+    async def set_page(self, chat_id: int, message_id: int, page: int) -> bool:
+        view = self.views.get(chat_id)
+        if view is None or view.message_id != message_id:
+            return False
+        view.page = page
+        view.expires_at = time.monotonic() + self.ttl
+        view.edited_at = 0.0   # листание показываем сразу, в обход троттлинга
+        await self._update(view, time.monotonic())
+        return True
+
+    async def _update(self, view: _View, now: float):
+        text, kb, view.page = self.render(view.page)
+        if text == view.text and view.edited_at:
+            self.skipped += 1
+            return
+        try:
+            await self.bot.edit_message_text(
+                text, chat_id=view.chat_id, message_id=view.message_id, reply_markup=kb
+            )
+            self.edits += 1
+        except TelegramRetryAfter as e:
+            view.mute_until = now + e.retry_after
+            logger.warning(f"[LiveView] Флуд-лимит в чате {view.chat_id}: пауза {e.retry_after} с")
+            return
+        except TelegramBadRequest as e:
+            if "not modified" not in str(e):
+                # сообщение удалено или недоступно — просмотр закрываем
+                self.views.pop(view.chat_id, None)
+                return
+        view.text = text
+        view.edited_at = now
+
+    async def _run(self):
+        while self.views:
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            budget = _EDITS_PER_SEC
+            for view in list(self.views.values()):
+                if now >= view.expires_at:
+                    self.views.pop(view.chat_id, None)
+                    continue
+                if budget <= 0 or now < view.mute_until or now - view.edited_at < self.interval:
+                    continue
+                budget -= 1
+                try:
+                    await self._update(view, now)
+                except Exception as e:
+                    logger.warning(f"[LiveView] Ошибка обновления: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="live-positions")
+
+    async def close(self):
+        self.views.clear()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
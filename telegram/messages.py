@@ -1,5 +1,6 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from datetime import datetime
+from html import escape
 
 def get_welcome_text() -> str:
     return (
@@ -11,17 +12,84 @@ def get_welcome_text() -> str:
         "• 📊 Статистика\n"
     )
 
-def get_settings_text() -> str:
-    return (
+def _on_off(flag) -> str:
+    return "вкл" if flag else "выкл"
+
+def get_settings_text(snap=None, env: str | None = None) -> str:
+    """snap — SettingsSnapshot (текущие значения и версия), env — сеть подписчика сейчас."""
+    text = (
         "⚙️ Настройки бота:\n\n"
         "• Изменить торговую сеть (mainnet/testnet/demo)\n"
         "• Настроить параметры риска и лотности\n"
         "• Управлять Telegram-уведомлениями\n\n"
         "Используйте кнопки ниже для выбора."
     )
+    if snap is None:
+        return text
+    v = snap.values
+    net = v.get("FOLLOWER_ENV") or env
+    lines = [
+        f"\n\n<b>Сейчас</b> (v{snap.version}):",
+        f"🌐 Сеть: <code>{net}</code>" + (" (после перезапуска)" if env and net != env else ""),
+        f"🛡️ MAX_RISK_PCT: <code>{v.get('MAX_RISK_PCT', 5.0)}%</code>",
+        f"📐 SIZE_SCALE: <code>{v.get('SIZE_SCALE', 1.0)}</code>",
+        f"🧪 TEST_MODE (новые входы не копируются): <b>{_on_off(v.get('TEST_MODE', False))}</b>",
+        f"🔔 Оповещения: <b>{_on_off(v.get('ALERTS', True))}</b>",
+    ]
+    return text + "\n".join(lines)
+
+POSITIONS_PER_PAGE = 10
+
+def positions_pages(count: int, per_page: int = POSITIONS_PER_PAGE) -> int:
+    return max(1, -(-count // per_page))
+
+def _live_upnl(p, mark: float) -> float:
+    if not mark:
+        return p.unrealised_pnl
+    return (mark - p.entry_price) * p.size * (1 if p.side == "buy" else -1)
+
+def get_positions_text(
+    positions: list,
+    marks: dict[str, float],
+    page: int = 0,
+    age_sec: float | None = None,
+    per_page: int = POSITIONS_PER_PAGE,
+    currency: str = "USDT",
+) -> str:
+    """
+    positions — модели Position подписчика, marks — mark price из WS
+    (если цены по символу нет — берётся markPrice из последнего снимка).
+    """
+    if not positions:
+        return "📂 Открытых позиций нет."
+    positions = sorted(positions, key=lambda p: -p.position_value)
+    pages = positions_pages(len(positions), per_page)
+    page = min(max(page, 0), pages - 1)
+
+    lines = [f"📂 <b>Открытые позиции</b> ({len(positions)})", ""]
+    total_upnl = sum(_live_upnl(p, marks.get(p.symbol) or p.mark_price) for p in positions)
+    for p in positions[page * per_page:(page + 1) * per_page]:
+        mark = marks.get(p.symbol) or p.mark_price
+        sign = 1 if p.side == "buy" else -1
+        upnl = _live_upnl(p, mark)
+        liq = f"{abs(mark - p.liq_price) / mark * 100:.1f}%" if mark and p.liq_price else "—"
+        lines.append(f"{'🟢' if sign > 0 else '🔴'} <b>{p.symbol}</b> {p.side.upper()} {p.size:g} × {p.leverage}x")
+        lines.append(
+            f"   вход <code>{p.entry_price:g}</code> → mark <code>{mark:g}</code>, "
+            f"UPnL <code>{_fmt_money(upnl)}</code>, до ликв. {liq}"
+        )
+    lines.append("")
+    lines.append(f"📈 UPnL всего: <code>{_fmt_money(total_upnl)} {currency}</code>")
+    footer = f"стр. {page + 1}/{pages}" if pages > 1 else ""
+    if age_sec is not None and age_sec >= 60:
+        # только заметное устаревание и с точностью до минуты — иначе текст менялся бы каждую секунду
+        footer = f"{footer} · ⚠️ позиции обновлены {int(age_sec // 60)} мин назад".lstrip(" ·")
+    if footer:
+        lines.append(f"<i>{footer}</i>")
+    return "\n".join(lines)
 
-def get_positions_text() -> str:
-    return "📂 Открытые позиции будут показаны здесь (пока заглушка)."
+def get_stats_loading_text() -> str:
+    return "⏳ Собираю статистику…"
 
 def _fmt_dt(dt_iso: str | None) -> str:
     if not dt_iso:
@@ -69,8 +137,78 @@ def build_stats_text_extended(
     lines.append(f"🕒 Обновлено: <i>{_fmt_dt(summary_updated_at)}</i>")
     return "\n".join(lines)
 
+def build_shards_text(stats: dict, currency: str = "USDT") -> str:
+    lines = []
+    lines.append("🧵 <b>Воркеры подписчиков</b>")
+    lines.append("")
+    lines.append(f"⚙️ Процессов: <b>{stats['alive']}/{stats['workers']}</b> (на связи: {stats['connected']})")
+    lines.append(f"👥 Подписчиков: <b>{stats['reporting']}/{stats['followers']}</b> прислали метрики")
+    lines.append(f"📌 Открытых сделок: <b>{stats['open_count']}</b>")
+    lines.append(f"📨 Событий разослано: <b>{stats['events_sent']}</b>")
+    lines.append(f"⚠️ Ошибок: <b>{stats['failed']}</b>, отброшено: <b>{stats['dropped']}</b>")
+    lines.append(f"⏱ Макс. тишина воркера: <code>{stats['max_silence_sec']} с</code>")
+    lines.append("")
+    lines.append("🧾 <b>PNL всех подписчиков</b>:")
+    for days, val in sorted(stats.get("pnl", {}).items()):
+        lines.append(f" • {days:>2} дн: <code>{_fmt_money(val)} {currency}</code>")
+    return "\n".join(lines)
+
+def build_shadow_text(s: dict, currency: str = "USDT") -> str:
+    lines = []
+    lines.append("👻 <b>Теневой подписчик</b>")
+    lines.append("")
+    lines.append(f"💼 Эквити: <code>{_fmt_money(s['equity'])} {currency}</code>")
+    lines.append(f"📈 UPnL: <code>{_fmt_money(s['upnl'])} {currency}</code>")
+    lines.append(f"✅ Реализ. PnL: <code>{_fmt_money(s['realized'])} {currency}</code>")
+    lines.append(f"💸 Комиссии: <code>{_fmt_money(s['fees'])} {currency}</code>")
+    lines.append(f"📌 Позиций: <b>{s['open_count']}</b>, ордеров: <b>{s['orders']}</b>, сделок: <b>{s['fills']}</b>")
+    lines.append("")
+    for days, val in sorted(s.get("pnl", {}).items()):
+        lines.append(f" • {days:>2} дн: <code>{_fmt_money(val)} {currency}</code>")
+    return "\n".join(lines)
+
+def build_lag_text(s: dict, alert: dict | None = None) -> str:
+    lines = []
+    if alert:
+        lines.append(f"🐢 <b>Event loop был заблокирован на {alert['lag_ms']:.0f} мс</b> — копирование задерживается")
+    else:
+        lines.append("🩺 <b>Задержка event loop</b>")
+    lines.append("")
+    lines.append(
+        f"p50 <code>{s['p50']} мс</code> · p95 <code>{s['p95']} мс</code> · "
+        f"p99 <code>{s['p99']} мс</code> · max <code>{s['max']} мс</code>"
+    )
+    lines.append(f"Блокировок: <b>{s['stalls']}</b> (замеров: {s['samples']})")
+    for where, count in s.get("culprits", []):
+        lines.append(f" • <code>{escape(where)}</code> × {count}")
+    if alert and alert.get("stack"):
+        lines.append("")
+        lines.append(f"<pre>{escape(alert['stack'][-3000:])}</pre>")
+    return "\n".join(lines)
+
+def build_kill_text(status: dict) -> str:
+    lines = []
+    report = status.get("last_report")
+    if status.get("tripped"):
+        lines.append("🛑 <b>Аварийное закрытие сработало</b> — копирование заблокировано (/rearm)")
+    else:
+        lines.append(f"🟢 <b>Аварийное закрытие взведено</b>, заготовок: <b>{status.get('prepared', 0)}</b>")
+    if report:
+        lines.append("")
+        lines.append(f"Причина: <i>{report['reason']}</i> ({_fmt_dt(report['at'])})")
+        lines.append(f"⏱ Время до нуля: <code>{report['time_to_flat_ms']} мс</code>")
+        lines.append(f"✅ Закрыто: <b>{len(report['closed'])}</b> {', '.join(report['closed'])}")
+        if report["left"]:
+            lines.append(f"⚠️ Не закрыто: <b>{', '.join(report['left'])}</b>")
+        if not report["orders_cancelled"]:
+            lines.append("⚠️ Отмена ордеров не подтверждена")
+    return "\n".join(lines)
+
 # ---------- Главная клавиатура ----------
 
+MENU_BUTTONS = {"🔄 Перезапуск", "⚙️ Настройки", "📂 Открытые позиции", "📊 Статистика"}
+CANCEL_WORDS = {"отмена", "cancel", "/cancel"}
+
 def main_menu_kb() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
@@ -88,6 +226,22 @@ def main_menu_kb() -> ReplyKeyboardMarkup:
         input_field_placeholder="Выберите действие…",
     )
 
+def positions_page_kb(page: int, pages: int) -> InlineKeyboardMarkup | None:
+    if pages <= 1:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="◀️", callback_data=f"positions:page:{(page - 1) % pages}"),
+        InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data="positions:noop"),
+        InlineKeyboardButton(text="▶️", callback_data=f"positions:page:{(page + 1) % pages}"),
+    ]])
+
+CHART_WINDOWS = [7, 30, 90]
+
+def stats_chart_kb() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text=f"📈 {d} дн", callback_data=f"chart:{d}") for d in CHART_WINDOWS
+    ]])
+
 # ---------- Настройки ----------
 
 def settings_inline_kb() -> InlineKeyboardMarkup:
@@ -109,6 +263,7 @@ def settings_net_kb() -> InlineKeyboardMarkup:
 def settings_risk_kb() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="Изменить MAX_RISK_PCT", callback_data="settings:risk:max_risk")],
+        [InlineKeyboardButton(text="Изменить SIZE_SCALE", callback_data="settings:risk:size_scale")],
         [InlineKeyboardButton(text="Изменить TEST_MODE", callback_data="settings:risk:test_mode")],
         [InlineKeyboardButton(text="⬅️ Назад", callback_data="settings:back")],
     ])
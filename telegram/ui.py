@@ -2,21 +2,30 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher, F
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.exceptions import TelegramBadRequest
 
+from telegram.charts import ChartService
+from telegram.live_view import LivePositionsView
+from utils.profiler import MODES as PROFILE_MODES, Profiler, ProfilerBusy
 from telegram.messages import (
     get_welcome_text,
     get_settings_text,
-    get_positions_text,
-    get_stats_loading_text,   # можно оставить как есть или вернуть фиксированный текст
+    get_stats_loading_text,
     build_stats_text_extended,
+    build_shards_text,
+    build_shadow_text,
+    build_kill_text,
+    build_lag_text,
     main_menu_kb,
     settings_inline_kb,
     settings_net_kb,
     settings_risk_kb,
     settings_alerts_kb,
+    stats_chart_kb,
+    MENU_BUTTONS,
+    CANCEL_WORDS,
 )
 
 logger = logging.getLogger(__name__)
@@ -24,20 +33,54 @@ logger = logging.getLogger(__name__)
 PNL_WINDOWS = [1, 7, 14, 30, 45, 60, 90]
 
 class TelegramUI:
-    def __init__(self, cfg: dict, trader):
+    def __init__(self, cfg: dict, trader, supervisor=None, shadow=None):
         self.cfg = cfg
         self.trader = trader
+        self.supervisor = supervisor   # режим шардирования: метрики воркеров
+        self.shadow = shadow           # теневой подписчик (SHADOW=true)
 
         self.bot = Bot(token=self.cfg["TELEGRAM_BOT_TOKEN"], parse_mode="HTML")
         self.dp = Dispatcher(storage=MemoryStorage())
+        self.charts = ChartService()
+        self._awaiting: dict[int, str] = {}   # chat_id → ключ настройки, ожидающий значения
+        self.profiler = Profiler(max_sec=float(cfg.get("PROFILE_MAX_SEC", 120.0)))
+        self.live_view = LivePositionsView(
+            self.bot,
+            trader,
+            interval=float(cfg.get("LIVE_VIEW_SEC", 3.0)),
+            ttl=float(cfg.get("LIVE_VIEW_TTL_SEC", 600.0)),
+        )
+
+        # ожидание значения настройки снимается командами, кнопками меню и «отмена»
+        self.dp.message.outer_middleware(self._prompt_guard)
 
         # Команды
         self.dp.message.register(self.cmd_start, Command("start"))
         self.dp.message.register(self.cmd_stats, Command("stats"))
+        self.dp.message.register(self.cmd_shards, Command("shards"))
+        self.dp.message.register(self.cmd_shadow, Command("shadow"))
+        self.dp.message.register(self.cmd_kill, Command("kill"))
+        self.dp.message.register(self.cmd_rearm, Command("rearm"))
+        self.dp.message.register(self.cmd_lag, Command("lag"))
+        self.dp.message.register(self.cmd_profile, Command("profile"))
+        self.dp.message.register(self.cmd_tasks, Command("tasks"))
         self.dp.message.register(self.on_text)
 
         # Callback-и из инлайн-кнопок
         self.dp.callback_query.register(self.cb_settings_router, F.data.startswith("settings:"))
+        self.dp.callback_query.register(self.cb_positions, F.data.startswith("positions:"))
+        self.dp.callback_query.register(self.cb_chart, F.data.startswith("chart:"))
+
+        # отчёт об аварийном закрытии (в т.ч. автоматическом по просадке) — владельцу
+        self.trader.kill_switch.on_trip = self._notify_kill
+        if not cfg.get("TELEGRAM_USER_ID"):
+            logger.warning(
+                "⚠️ TELEGRAM_USER_ID не задан: команды /kill, /rearm, /profile, /tasks "
+                "и изменение настроек отключены."
+            )
+        # блокировки event loop, угрожающие задержке копирования, — владельцу
+        if self.trader.loop_watchdog is not None:
+            self.trader.loop_watchdog.on_alert = self._notify_lag
 
     # ---------------- Команды / Сообщения ----------------
 
@@ -52,7 +95,7 @@ class TelegramUI:
             # параллельно собираем данные
             master_balance_task = asyncio.create_task(self.trader.master_api.get_balance())
             follower_balance_task = asyncio.create_task(self.trader.follower_api.get_balance())
-            follower_positions_task = asyncio.create_task(self.trader.follower_api.get_open_positions_detailed())
+            follower_positions_task = asyncio.create_task(self.trader.follower_api.get_open_positions())
 
             summary = self.trader.stats.get_summary()
             pnl_map = self.trader.stats.pnl_by_windows(PNL_WINDOWS)
@@ -62,9 +105,10 @@ class TelegramUI:
             )
 
             # агрегируем позиции подписчика
+            follower_positions = follower_positions or []
             follower_open_count = len(follower_positions)
-            follower_positions_value_total = float(sum(p.get("positionValue", 0.0) for p in follower_positions))
-            follower_unrealized_total = float(sum(p.get("unrealisedPnl", 0.0) for p in follower_positions))
+            follower_positions_value_total = float(sum(p.position_value for p in follower_positions))
+            follower_unrealized_total = float(sum(p.unrealised_pnl for p in follower_positions))
 
             text = build_stats_text_extended(
                 master_env=self.trader.master_env,
@@ -81,13 +125,13 @@ class TelegramUI:
 
             # редактируем, если можно; иначе удаляем и шлём новое
             try:
-                await loading.edit_text(text)
+                await loading.edit_text(text, reply_markup=stats_chart_kb())
             except TelegramBadRequest:
                 try:
                     await loading.delete()
                 except Exception:
                     pass
-                await msg.answer(text, reply_markup=main_menu_kb())
+                await msg.answer(text, reply_markup=stats_chart_kb())
 
         except Exception as e:
             logger.warning(f"[TelegramUI] Ошибка формирования статистики: {e}")
@@ -100,11 +144,128 @@ class TelegramUI:
                     pass
                 await msg.answer("⚠️ Не удалось получить статистику. Попробуйте позже.", reply_markup=main_menu_kb())
 
+    async def cmd_shards(self, msg: Message):
+        if self.supervisor is None:
+            await msg.answer("🧵 Шардирование выключено (WORKERS=0).", reply_markup=main_menu_kb())
+            return
+        await msg.answer(build_shards_text(self.supervisor.get_stats()), reply_markup=main_menu_kb())
+
+    async def cmd_shadow(self, msg: Message):
+        if self.shadow is None:
+            await msg.answer("👻 Теневой подписчик выключен (SHADOW=false).", reply_markup=main_menu_kb())
+            return
+        await msg.answer(build_shadow_text(self.shadow.get_summary()), reply_markup=main_menu_kb())
+
+    def _is_owner(self, msg: Message | CallbackQuery, strict: bool = False) -> bool:
+        """strict — только при заданном TELEGRAM_USER_ID (команды отладки процесса)."""
+        owner = self.cfg.get("TELEGRAM_USER_ID") or 0
+        if not owner:
+            return not strict
+        return msg.from_user is not None and msg.from_user.id == owner
+
+    async def cmd_kill(self, msg: Message):
+        if not self._is_owner(msg, strict=True):
+            return
+        if self.trader.kill_switch.tripped:
+            await msg.answer(build_kill_text(self.trader.kill_switch.get_status()), reply_markup=main_menu_kb())
+            return
+        await self.trader.kill_switch.trigger("команда /kill")
+
+    async def cmd_rearm(self, msg: Message):
+        if not self._is_owner(msg, strict=True):
+            return
+        self.trader.kill_switch.rearm()
+        await msg.answer(build_kill_text(self.trader.kill_switch.get_status()), reply_markup=main_menu_kb())
+
+    async def _notify_kill(self, report: dict):
+        chat_id = self.cfg.get("TELEGRAM_USER_ID")
+        if not chat_id:
+            return
+        await self.bot.send_message(chat_id, build_kill_text(self.trader.kill_switch.get_status()))
+
+    async def cmd_lag(self, msg: Message):
+        if not self._is_owner(msg):
+            return
+        if self.trader.loop_watchdog is None:
+            await msg.answer("🩺 Сторож event loop выключен (LOOP_WATCHDOG=false).", reply_markup=main_menu_kb())
+            return
+        await msg.answer(build_lag_text(self.trader.loop_watchdog.get_stats()), reply_markup=main_menu_kb())
+
+    async def _notify_lag(self, lag_ms: float, stack):
+        chat_id = self.cfg.get("TELEGRAM_USER_ID")
+        if not chat_id or not self.trader.settings.get("ALERTS", True):
+            return
+        text = build_lag_text(self.trader.loop_watchdog.get_stats(), alert={"lag_ms": lag_ms, "stack": stack})
+        try:
+            await self.bot.send_message(chat_id, text)
+        except Exception as e:
+            logger.warning(f"Не удалось отправить тревогу о задержке цикла: {e}")
+
+    async def cmd_profile(self, msg: Message):
+        """/profile [cpu|cprofile|mem|tasks] [сек] — профиль процесса файлом."""
+        if not self._is_owner(msg, strict=True):
+            return
+        args = (msg.text or "").split()[1:]
+        mode = args[0] if args else "cpu"
+        try:
+            seconds = float(args[1]) if len(args) > 1 else 30.0
+        except ValueError:
+            seconds = -1.0
+        if mode not in PROFILE_MODES or seconds <= 0:
+            await msg.answer(
+                f"Использование: <code>/profile [{'|'.join(PROFILE_MODES)}] [сек]</code>, "
+                f"не дольше {self.profiler.max_sec:.0f} с.",
+                reply_markup=main_menu_kb(),
+            )
+            return
+        if mode != "tasks":
+            await msg.answer(f"🔬 Профилирую <b>{mode}</b> {min(seconds, self.profiler.max_sec):.0f} с…")
+        await self._send_profile(msg, mode, seconds)
+
+    async def cmd_tasks(self, msg: Message):
+        if not self._is_owner(msg, strict=True):
+            return
+        await self._send_profile(msg, "tasks", 0)
+
+    async def _send_profile(self, msg: Message, mode: str, seconds: float):
+        try:
+            name, data = await self.profiler.run(mode, seconds)
+        except ProfilerBusy as e:
+            await msg.answer(f"⏳ Уже идёт профилирование <b>{e}</b>, дождитесь результата.")
+            return
+        except Exception as e:
+            logger.warning(f"Профилирование {mode} не удалось: {e}")
+            await msg.answer("⚠️ Профилирование не удалось, подробности в логе.")
+            return
+        await msg.answer_document(BufferedInputFile(data, filename=name))
+
+    async def _prompt_guard(self, handler, msg: Message, data: dict):
+        text = (msg.text or "").strip()
+        if msg.chat.id in self._awaiting and (
+            text.startswith("/") or text in MENU_BUTTONS or text.lower() in CANCEL_WORDS
+        ):
+            del self._awaiting[msg.chat.id]
+            if text.lower() in CANCEL_WORDS:
+                await msg.answer("↩️ Ввод отменён.", reply_markup=main_menu_kb())
+                return None
+        return await handler(msg, data)
+
     async def on_text(self, msg: Message):
         text = (msg.text or "").strip()
 
+        key = self._awaiting.pop(msg.chat.id, None)
+        if key is not None and self._is_owner(msg, strict=True):
+            try:
+                self.trader.settings.update({key: text}, source="telegram")
+            except ValueError as e:
+                self._awaiting[msg.chat.id] = key
+                await msg.answer(f"⚠️ Недопустимое значение: {e}. Попробуйте ещё раз или напишите «отмена».")
+                return
+            await msg.answer(self._settings_text(), reply_markup=settings_inline_kb())
+            return
+
         if text == "⚙️ Настройки":
-            await msg.answer(get_settings_text(), reply_markup=settings_inline_kb())
+            await msg.answer(self._settings_text(), reply_markup=settings_inline_kb())
             return
 
         if text == "📊 Статистика":
@@ -112,7 +273,7 @@ class TelegramUI:
             return
 
         if text == "📂 Открытые позиции":
-            await msg.answer(get_positions_text(), reply_markup=main_menu_kb())
+            await self.live_view.open(msg.chat.id)
             return
 
         if text == "🔄 Перезапуск":
@@ -121,13 +282,44 @@ class TelegramUI:
 
         await msg.answer("Выберите действие на клавиатуре ниже.", reply_markup=main_menu_kb())
 
+    async def cb_chart(self, cq: CallbackQuery):
+        days = int(cq.data.split(":", 1)[1])
+        await cq.answer("📈 Строю график…")
+        try:
+            await self.charts.send(self.bot, cq.message.chat.id, self.trader.stats, days)
+        except Exception as e:
+            logger.warning(f"[TelegramUI] Ошибка построения графика: {e}")
+            await cq.message.answer("⚠️ Не удалось построить график.")
+
+    # ---------------- Callback-и просмотра позиций ----------------
+
+    async def cb_positions(self, cq: CallbackQuery):
+        if cq.data.startswith("positions:page:"):
+            page = int(cq.data.rsplit(":", 1)[-1])
+            if not await self.live_view.set_page(cq.message.chat.id, cq.message.message_id, page):
+                await cq.answer("Просмотр устарел — нажмите «📂 Открытые позиции».")
+                return
+        await cq.answer()
+
     # ---------------- Callback-и настроек ----------------
 
+    def _settings_text(self) -> str:
+        return get_settings_text(self.trader.settings.current, env=self.trader.follower_env)
+
+    async def _apply_settings(self, cq: CallbackQuery, changes: dict) -> bool:
+        try:
+            self.trader.settings.update(changes, source="telegram")
+        except ValueError as e:
+            await cq.answer(f"⚠️ {e}", show_alert=True)
+            return False
+        return True
+
     async def cb_settings_router(self, cq: CallbackQuery):
         data = cq.data
 
         if data == "settings:back":
-            await cq.message.edit_text(get_settings_text(), reply_markup=settings_inline_kb())
+            self._awaiting.pop(cq.message.chat.id, None)
+            await cq.message.edit_text(self._settings_text(), reply_markup=settings_inline_kb())
             await cq.answer()
             return
 
@@ -146,25 +338,41 @@ class TelegramUI:
             await cq.answer()
             return
 
+        if not self._is_owner(cq, strict=True):
+            await cq.answer("Изменять настройки может только владелец бота (TELEGRAM_USER_ID).")
+            return
+
         if data.startswith("settings:net:"):
             net = data.split(":")[-1]
-            await cq.answer(f"Сеть выбрана: {net}")
-            await cq.message.edit_text(get_settings_text(), reply_markup=settings_inline_kb())
+            if not await self._apply_settings(cq, {"FOLLOWER_ENV": net}):
+                return
+            note = "" if net == self.trader.follower_env else " — применится после перезапуска"
+            await cq.answer(f"Сеть выбрана: {net}{note}")
+            await cq.message.edit_text(self._settings_text(), reply_markup=settings_inline_kb())
             return
 
-        if data == "settings:risk:max_risk":
-            await cq.answer("Пришлите новое значение MAX_RISK_PCT (например, 3.5).")
-            await cq.message.answer("✍️ Введите число, % риска на сделку. (пока заглушка)")
+        if data in ("settings:risk:max_risk", "settings:risk:size_scale"):
+            key = "MAX_RISK_PCT" if data.endswith("max_risk") else "SIZE_SCALE"
+            self._awaiting[cq.message.chat.id] = key
+            await cq.answer(f"Пришлите новое значение {key}.")
+            hint = "% риска на сделку, например 3.5" if key == "MAX_RISK_PCT" else "множитель объёма мастера, например 0.5"
+            await cq.message.answer(f"✍️ Введите число: {hint}. «отмена» — выйти без изменений.")
             return
 
         if data == "settings:risk:test_mode":
-            await cq.answer("Переключение TEST_MODE (пока заглушка).")
-            await cq.message.edit_text("TEST_MODE переключён (заглушка).", reply_markup=settings_inline_kb())
+            enabled = not self.trader.settings.get("TEST_MODE", False)
+            if not await self._apply_settings(cq, {"TEST_MODE": enabled}):
+                return
+            await cq.answer(f"TEST_MODE {'включён' if enabled else 'выключен'}")
+            await cq.message.edit_text(self._settings_text(), reply_markup=settings_inline_kb())
             return
 
         if data == "settings:alerts:toggle":
-            await cq.answer("Оповещения переключены (заглушка).")
-            await cq.message.edit_text("🔔 Оповещения переключены (заглушка).", reply_markup=settings_inline_kb())
+            enabled = not self.trader.settings.get("ALERTS", True)
+            if not await self._apply_settings(cq, {"ALERTS": enabled}):
+                return
+            await cq.answer(f"Оповещения {'включены' if enabled else 'выключены'}")
+            await cq.message.edit_text(self._settings_text(), reply_markup=settings_inline_kb())
             return
 
         await cq.answer("Неизвестное действие.")
@@ -173,9 +381,20 @@ class TelegramUI:
 
     async def run(self):
         logger.info("🤖 Telegram-бот запущен и слушает команды.")
+        owner = self.cfg.get("TELEGRAM_USER_ID")
+        if owner and self.trader.settings.get("TEST_MODE", False):
+            try:
+                await self.bot.send_message(
+                    owner, "🧪 <b>TEST_MODE включён</b> — новые позиции мастера не копируются.\n"
+                           "Выключить: ⚙️ Настройки → 🛡️ Риск и лотность → TEST_MODE.",
+                )
+            except Exception as e:
+                logger.warning(f"Не удалось предупредить владельца о TEST_MODE: {e}")
         await self.dp.start_polling(self.bot)
 
     async def close(self):
+        await self.live_view.close()
+        self.charts.close()
         try:
             await self.bot.session.close()
         except Exception:
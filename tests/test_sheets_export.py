@@ -0,0 +1,74 @@
+import asyncio
+import csv
+from types import SimpleNamespace
+
+from utils.sheets_export import FakeSheetsClient, SheetsExporter
+
+
+def _stats(n: int) -> SimpleNamespace:
+    return SimpleNamespace(state={"history": [{"symbol": f"SYM{i}", "pnl": float(i)} for i in range(n)]})
+
+
+def _exporter(stats, client, tmp_path, batch_size=200) -> SheetsExporter:
+    # writes_per_min большой — тесты не ждут интервала квоты
+    return SheetsExporter(
+        stats, client, state_file=str(tmp_path / "hwm.json"),
+        batch_size=batch_size, flush_sec=0.0, writes_per_min=60000,
+    )
+
+
+def test_resume_from_hwm_without_duplicates(tmp_path):
+    stats = _stats(3)
+    csv_path = tmp_path / "rows.csv"
+    asyncio.run(_exporter(stats, FakeSheetsClient(str(csv_path)), tmp_path).flush())
+
+    # «перезапуск»: новый экспортёр и клиент, отметка читается из файла
+    stats.state["history"] += [{"symbol": "NEW1"}, {"symbol": "NEW2"}]
+    exporter = _exporter(stats, FakeSheetsClient(str(csv_path)), tmp_path)
+    assert exporter.hwm == 3
+    assert asyncio.run(exporter.flush()) == 2
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        ids = [int(row[0]) for row in csv.reader(f)]
+    assert ids == [0, 1, 2, 3, 4]
+
+
+def test_batches_respect_batch_size(tmp_path):
+    client = FakeSheetsClient()
+    exporter = _exporter(_stats(7), client, tmp_path, batch_size=3)
+    assert asyncio.run(exporter.flush()) == 7
+    assert client.calls == 3
+    assert [row[0] for row in client.rows] == list(range(7))
+    assert exporter.get_stats() == {"hwm": 7, "pending": 0, "exported": 7, "failed": 0}
+
+
+def test_failed_write_keeps_hwm(tmp_path):
+    client = FakeSheetsClient(fail_every=2)
+    exporter = _exporter(_stats(4), client, tmp_path, batch_size=2)
+    try:
+        asyncio.run(exporter.flush())
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("вторая пачка должна упасть")
+    assert exporter.hwm == 2
+    assert _exporter(exporter.stats, client, tmp_path).hwm == 2   # на диске та же отметка
+    assert len(client.rows) == 2
+
+
+def test_background_loop_retries_after_failure(tmp_path):
+    client = FakeSheetsClient(fail_every=2)
+    exporter = _exporter(_stats(4), client, tmp_path, batch_size=2)
+
+    async def run():
+        exporter.start()
+        for _ in range(200):
+            if exporter.hwm == 4:
+                break
+            await asyncio.sleep(0.01)
+        await exporter.close()
+
+    asyncio.run(run())
+    assert exporter.hwm == 4
+    assert exporter.failed == 1
+    assert [row[0] for row in client.rows] == [0, 1, 2, 3]
@@ -2,22 +2,51 @@
 Модуль ядра бота CopyTrader
 ---------------------------
 Отвечает за синхронизацию сделок мастера и подписчика.
+
+Модули необязательных режимов (несколько мастеров, COPY_MODE=orders,
+SLIPPAGE_GUARD, DRY_RUN, публичный WS) импортируются только там, где
+режим включается, — холодный старт их не грузит.
 """
 
 import asyncio
+import contextvars
 import logging
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List
+from trader.differ import SnapshotDiffer
+from trader.engine import CopyEngine
+from trader.events import MasterEvent, OpenEvent, ResizeEvent, CloseEvent, LeverageEvent, encode_event
+from trader.kill_switch import KillSwitch
 from trader.risk import RiskManager
+from trader.scheduler import AdaptivePoller
+from trader.settings_store import SCHEMA, SettingsSnapshot, SettingsStore
 from trader.stats import StatsManager
+from utils import recorder
 from utils.api_wrappers import BybitAPI
+from utils.helpers import round_qty
+from utils.models import Position
+
+if TYPE_CHECKING:
+    from utils.market_stream import PublicStream
 
 logger = logging.getLogger(__name__)
 
+# снимок настроек, закреплённый за обрабатываемым событием (у каждого актора — свой контекст)
+_event_settings: contextvars.ContextVar[SettingsSnapshot | None] = contextvars.ContextVar(
+    "event_settings", default=None
+)
+
 class CopyTrader:
-    def __init__(self, cfg: dict):
+    def __init__(self, cfg: dict, master_source=None):
         self.cfg = cfg
         self.master_mode = cfg.get("MASTER_MODE", "trade")
         self.master_env = cfg.get("MASTER_ENV", "mainnet")
-        self.follower_env = cfg.get("FOLLOWER_ENV", "mainnet")
+        self.stats = StatsManager(cfg)
+        # настройки из файла состояния: горячее обновление из Telegram без перезапуска
+        # значения из .env (MAX_RISK_PCT, TEST_MODE, ...) — по умолчанию, сохранённые перекрывают их
+        self.settings = SettingsStore(self.stats, defaults={k: cfg.get(k) for k in SCHEMA})
+        self.follower_env = self.settings.get("FOLLOWER_ENV") or cfg.get("FOLLOWER_ENV", "mainnet")
 
         logger.info(f"🧩 Инициализация мастера ({self.master_mode}, env={self.master_env})")
 
@@ -27,25 +56,154 @@ class CopyTrader:
             role="MASTER",
             env=self.master_env,
         )
+        # источник позиций мастера: trade/copy-аккаунт или любой совместимый объект
+        if master_source is None:
+            from trader.master_bridge import MasterBridge
+
+            master_source = MasterBridge(cfg, self.master_api)
+            if cfg.get("MASTERS"):
+                from trader.multi_master import MultiMasterSource
+
+                # несколько мастеров — копируем нетто-позицию с весами капитала
+                master_source = MultiMasterSource(
+                    [(master_source, float(cfg.get("MASTER_WEIGHT", 1.0)))]
+                    + [(MasterBridge(m), float(m.get("MASTER_WEIGHT", 1.0))) for m in cfg["MASTERS"]]
+                )
+        self.master_source = master_source
         self.follower_api = BybitAPI(
             api_key=cfg.get("FOLLOWER_API_KEY"),
             api_secret=cfg.get("FOLLOWER_API_SECRET"),
             role="FOLLOWER",
             env=self.follower_env,
         )
+        # DRY_RUN — ордера подписчика исполняются виртуально, с биржи читаются только цены
+        self.dry_run = bool(cfg.get("DRY_RUN") or self.setting("DRY_RUN", False))
+        if self.dry_run:
+            from utils.shadow_api import ShadowAPI
 
-        self.stats = StatsManager(cfg)
-        self.risk = RiskManager(cfg, self.follower_api)
+            self.follower_api = ShadowAPI(
+                self.follower_api,
+                self.setting,
+                role="SHADOW",
+                state_file=os.path.splitext(self.stats.state_file)[0] + "_portfolio.json",
+            )
+
+        self.risk = RiskManager(cfg, self.follower_api, settings=self.settings)
+        self.risk.test_mode = self.risk.test_mode or self.dry_run
         logger.info(f"📡 Подписчик env={self.follower_env}")
 
-        self.ignored_symbols = set()
+        self.ignored_symbols = set()   # позиции мастера, открытые до старта бота
+        self.copied_symbols = set()    # позиции, скопированные подписчику
+        # последний известный снимок позиций подписчика (для просмотра без запросов к бирже)
+        self.positions: Dict[str, Position] = {}
+        self.positions_at = 0.0        # monotonic времени снимка
+
+        self._handlers = {
+            OpenEvent: self.on_open,
+            ResizeEvent: self.on_resize,
+            CloseEvent: self.on_close,
+            LeverageEvent: self.on_leverage,
+        }
+        # COPY_MODE=orders — зеркалировать ордера мастера, а не только исполненные позиции
+        self.copy_mode = (cfg.get("COPY_MODE") or "positions").lower()
+        self.order_mirror = None
+        if self.copy_mode == "orders":
+            from trader.order_mirror import OrderMirror
+
+            self.order_mirror = OrderMirror(self.master_api, self.follower_api, self.setting)
+        if self.order_mirror is not None and hasattr(self.master_source, "attribution"):
+            logger.warning("🪞 COPY_MODE=orders зеркалирует ордера только основного мастера.")
+        # SLIPPAGE_GUARD — оценка проскальзывания по локальному стакану перед входом
+        self.market_stream = None
+        self.slippage = None
+        if cfg.get("SLIPPAGE_GUARD"):
+            from trader.slippage import SlippageGuard
+            from utils.market_stream import PublicStream
+
+            self.market_stream = PublicStream(self.follower_env)
+            self.slippage = SlippageGuard(self.setting)
+            if self.dry_run:
+                self.follower_api.market = self.market_stream
+        self.differ = SnapshotDiffer()
+        # аварийное закрытие: заготовки закрытий, /kill, автозакрытие по просадке
+        self.kill_switch = KillSwitch(self, refresh_sec=float(cfg.get("KILL_REFRESH_SEC", 5.0)))
+        # получатели сырых событий мастера (например, супервизор шардов)
+        self.event_sinks: List[Callable[[List[MasterEvent]], None]] = []
+        self.ready = asyncio.Event()   # стартовый снимок мастера получен
+        self.startup_ms = 0.0          # длительность prepare()
+        self.loop_watchdog = None      # LoopWatchdog из main.py (метрики задержки цикла)
+        self.poller = AdaptivePoller.from_cfg(cfg)
+        self.engine = CopyEngine(
+            self.handle_event,
+            queue_size=int(cfg.get("ACTOR_QUEUE_SIZE", 32)),
+            on_drop=self._on_event_dropped,
+        )
+
+    def setting(self, key: str, default=None):
+        """Значение настройки: снимок текущего события или последний опубликованный."""
+        snap = _event_settings.get() or self.settings.current
+        return snap.values.get(key, default)
+
+    def entries_blocked(self) -> bool:
+        """Новые входы не копируются: сработал kill switch или включён TEST_MODE."""
+        return self.kill_switch.tripped or bool(self.setting("TEST_MODE", False))
 
     async def fetch_master_positions(self):
+        """None — запрос не удался (в отличие от пустого списка позиций)."""
         try:
-            return await self.master_api.get_open_positions() or []
+            return await self.master_source.get_positions()
         except Exception as e:
             logger.warning(f"[MASTER] fetch_master_positions failed: {e}")
-            return []
+            return None
+
+    def ensure_market_stream(self) -> "PublicStream":
+        """Публичный WS (создаётся по требованию, если SLIPPAGE_GUARD выключен)."""
+        if self.market_stream is None:
+            from utils.market_stream import PublicStream
+
+            self.market_stream = PublicStream(self.follower_env)
+        self.market_stream.start()
+        return self.market_stream
+
+    async def observe_positions(self, positions: List[Position]):
+        """Свежий снимок позиций подписчика: кэш, заготовки kill switch, тикеры."""
+        self.positions = {p.symbol: p for p in positions if p.size > 0}
+        self.positions_at = time.monotonic()
+        self.kill_switch.update(positions)
+        if self.market_stream is not None and self.positions:
+            await self.market_stream.ensure_tickers(self.positions.keys())
+
+    def _attribution(self, symbol: str):
+        """Доли мастеров в позиции символа (только для нескольких мастеров)."""
+        attribution = getattr(self.master_source, "attribution", None)
+        return attribution(symbol) if attribution else None
+
+    def _scaled(self, symbol: str, qty: float) -> float:
+        return round_qty(symbol, qty * float(self.setting("SIZE_SCALE", 1.0) or 1.0))
+
+    async def _follower_size(self, symbol: str, side: str) -> float | None:
+        """Текущий объём подписчика по символу в стороне side (None — не удалось узнать)."""
+        positions = await self.follower_api.get_open_positions()
+        if positions is None:
+            return None
+        pos = next((p for p in positions if p.symbol == symbol), None)
+        if pos is None or pos.side != side:
+            return 0.0
+        return pos.size
+
+    async def _guard_entry(self, symbol: str, side: str, qty: float, ref_price: float):
+        """(qty, limit_price) с учётом стакана; qty == 0 — вход пропускаем."""
+        if self.slippage is None or qty <= 0:
+            return qty, None
+        book = await self.market_stream.wait_book(symbol, timeout=0.5)
+        decision = self.slippage.decide(book, symbol, side, qty, ref_price)
+        self.stats.record_slippage(symbol, side, decision)
+        if decision.action != "market":
+            logger.info(
+                f"🧮 {symbol}: {decision.action} (оценка {decision.est_slippage_pct:.2f}%, "
+                f"qty {qty} → {decision.qty}, price={decision.price or '-'}) {decision.reason}"
+            )
+        return decision.qty, decision.price
 
     async def fetch_follower_positions(self):
         try:
@@ -54,11 +212,258 @@ class CopyTrader:
             logger.warning(f"[FOLLOWER] fetch_follower_positions failed: {e}")
             return []
 
+    # ---------------------- обработчики событий ----------------------
+
+    async def handle_event(self, event: MasterEvent):
+        handler = self._handlers.get(type(event))
+        if handler is None:
+            logger.warning(f"[{event.symbol}] Нет обработчика для {type(event).__name__}")
+            return
+        token = _event_settings.set(self.settings.current)
+        try:
+            await handler(event)
+        finally:
+            _event_settings.reset(token)
+
+    async def on_open(self, ev: OpenEvent):
+        logger.info(f"🆕 Новая позиция мастера: {ev.symbol} ({ev.side}, qty={ev.qty})")
+        wallet = await self.follower_api.get_wallet()
+        risk_check = self.risk.apply_risk_rules(ev.symbol, ev.side, ev.price, wallet, ev.leverage)
+        if not risk_check["allowed"]:
+            logger.warning(f"🚫 Сделка {ev.symbol} отклонена: {risk_check['reason']}")
+            self.copied_symbols.discard(ev.symbol)
+            return
+
+        target = self._scaled(ev.symbol, ev.qty)
+        qty = target
+        have = 0.0
+        if self.order_mirror is not None:
+            # часть объёма могла уже исполниться зеркальными ордерами
+            have = await self._follower_size(ev.symbol, ev.side) or 0.0
+            qty = round_qty(ev.symbol, target - have)
+
+        if qty > 0:
+            qty, price = await self._guard_entry(ev.symbol, ev.side, qty, ev.price)
+            if qty <= 0:
+                logger.warning(f"🚫 Сделка {ev.symbol} пропущена: слишком большое проскальзывание")
+                self.copied_symbols.discard(ev.symbol)
+                return
+            res = await self.follower_api.open_position(ev.symbol, ev.side, qty, ev.leverage, price=price)
+            if not res:
+                self.copied_symbols.discard(ev.symbol)
+                return
+        else:
+            qty = 0.0
+            logger.info(f"🪞 {ev.symbol}: позиция уже набрана зеркальными ордерами.")
+        self.copied_symbols.add(ev.symbol)
+        # в статистику — фактически отправленный объём (после ограничения по проскальзыванию)
+        self.stats.record_open_trade(
+            ev.symbol, ev.side, round_qty(ev.symbol, have + qty), ev.price, ev.leverage,
+            masters=self._attribution(ev.symbol),
+        )
+        logger.info(f"✅ Сделка {ev.symbol} открыта у подписчика.")
+
+    async def on_resize(self, ev: ResizeEvent):
+        if ev.symbol not in self.copied_symbols:
+            return
+        scale = float(self.setting("SIZE_SCALE", 1.0) or 1.0)
+        if self.order_mirror is not None:
+            # сверяемся с фактическим объёмом: часть могли исполнить зеркальные ордера
+            have = await self._follower_size(ev.symbol, ev.side)
+            if have is None:
+                return
+            delta = ev.qty * scale - have
+        else:
+            delta = ev.delta * scale
+        qty = round_qty(ev.symbol, abs(delta))
+        if qty <= 0:
+            return
+
+        if delta > 0:
+            logger.info(f"➕ Мастер усреднил {ev.symbol}: {ev.prev_qty} → {ev.qty}")
+            if self.entries_blocked():
+                return
+            max_dca = self.setting("MAX_DCA_PER_TRADE")
+            averages = int(self.stats.state["open"].get(ev.symbol, {}).get("averages") or 0)
+            if max_dca is not None and averages >= int(max_dca):
+                logger.warning(f"🚫 {ev.symbol}: лимит усреднений исчерпан ({averages}/{max_dca})")
+                return
+            # опорная цена усреднения — середина стакана (avgPrice мастера уже смешанная)
+            qty, price = await self._guard_entry(ev.symbol, ev.side, qty, 0.0)
+            if qty <= 0:
+                return
+            if await self.follower_api.open_position(ev.symbol, ev.side, qty, ev.leverage, price=price):
+                self.stats.record_adjust_trade(
+                    ev.symbol, qty, averaged=True, masters=self._attribution(ev.symbol)
+                )
+        else:
+            logger.info(f"➖ Мастер частично закрыл {ev.symbol}: {ev.prev_qty} → {ev.qty}")
+            if await self.follower_api.reduce_position(ev.symbol, ev.side, qty):
+                self.stats.record_adjust_trade(ev.symbol, -qty, masters=self._attribution(ev.symbol))
+
+    async def on_close(self, ev: CloseEvent):
+        if ev.symbol not in self.copied_symbols and ev.symbol not in self.ignored_symbols:
+            return
+        logger.info(f"🔻 Мастер закрыл {ev.symbol}. Закрываем и у подписчика.")
+        self.ignored_symbols.discard(ev.symbol)
+        self.copied_symbols.discard(ev.symbol)
+        positions = await self.follower_api.get_open_positions()
+        pos = next((p for p in positions or [] if p.symbol == ev.symbol), None)
+        if positions is not None and pos is None:
+            self.stats.record_close_trade(ev.symbol, price=0.0, pnl=0.0)
+            return
+        if not await self.follower_api.close_position(ev.symbol, position=pos):
+            return
+        # закрытие по рынку: реализованный PnL ≈ плавающий PnL перед закрытием (без комиссии)
+        self.stats.record_close_trade(
+            ev.symbol,
+            price=pos.mark_price if pos else 0.0,
+            pnl=pos.unrealised_pnl if pos else 0.0,
+        )
+
+    async def on_leverage(self, ev: LeverageEvent):
+        if ev.symbol not in self.copied_symbols:
+            return
+        logger.info(f"⚙️ Мастер сменил плечо {ev.symbol}: {ev.prev_leverage}x → {ev.leverage}x")
+        await self.follower_api.set_leverage(ev.symbol, ev.leverage)
+
+    def on_flattened(self):
+        """
+        После аварийного закрытия: текущие позиции мастера больше не копируются
+        (как позиции, открытые до старта бота).
+        """
+        self.copied_symbols.clear()
+        self.ignored_symbols = set(self.differ.state.keys())
+
+    # ---------------------- цикл опроса ----------------------
+
+    def _on_event_dropped(self, event: MasterEvent):
+        self.differ.revert(event)
+        if isinstance(event, OpenEvent):
+            self.copied_symbols.discard(event.symbol)
+
+    async def _tick(self) -> bool:
+        """Один тик опроса. Возвращает True, если у мастера были изменения."""
+        if self.order_mirror is None or self.entries_blocked():
+            return await self._tick_positions()
+        changed_pos, changed_orders = await asyncio.gather(
+            self._tick_positions(), self.order_mirror.sync()
+        )
+        return changed_pos or changed_orders
+
+    async def _tick_positions(self) -> bool:
+        master_positions = await self.fetch_master_positions()
+        if master_positions is None:
+            return False
+        if recorder.ACTIVE:
+            recorder.record("master", [p._asdict() for p in master_positions])
+
+        events = self.differ.diff(master_positions)
+        if not events:
+            return False
+        for sink in self.event_sinks:
+            sink(events)
+        if self.slippage is not None:
+            await self.market_stream.ensure(self.differ.state.keys())
+        await self.apply_events(events)
+        return True
+
+    async def apply_events(self, events: Iterable[MasterEvent]):
+        """
+        Фильтрует события мастера по состоянию подписчика и ставит их в очереди акторов.
+        Используется и собственным циклом опроса, и воркерами шардов,
+        которым события приходят извне.
+        """
+        events = list(events)
+        follower_positions = None
+        if any(isinstance(ev, OpenEvent) for ev in events):
+            follower_positions = await self.fetch_follower_positions()
+            if recorder.ACTIVE:
+                recorder.record("follower", [p._asdict() for p in follower_positions])
+        follower_symbols = {p.symbol for p in follower_positions or []}
+
+        to_dispatch: List[MasterEvent] = []
+        closing = set()   # символы, закрываемые в этом же тике (переворот позиции)
+        for ev in events:
+            if isinstance(ev, OpenEvent):
+                if self.entries_blocked():
+                    continue
+                # в режиме orders позиция подписчика могла появиться от зеркального ордера —
+                # событие всё равно нужно, чтобы добрать объём и отслеживать символ
+                busy = ev.symbol in self.copied_symbols or (
+                    ev.symbol in follower_symbols and self.order_mirror is None
+                )
+                if busy and ev.symbol not in closing:
+                    continue
+                # помечаем сразу, чтобы следующий тик не продублировал открытие,
+                # пока актор символа ещё обрабатывает событие
+                self.copied_symbols.add(ev.symbol)
+            elif ev.symbol not in self.copied_symbols and ev.symbol not in self.ignored_symbols:
+                continue
+            elif isinstance(ev, CloseEvent):
+                closing.add(ev.symbol)
+            to_dispatch.append(ev)
+
+        if recorder.ACTIVE:
+            for ev in to_dispatch:
+                recorder.record("event", encode_event(ev))
+        await self.engine.dispatch_many(to_dispatch)
+        if follower_positions is not None:
+            self.stats.update_from_positions(follower_positions)
+            await self.observe_positions(follower_positions)
+
+    async def _warm_api(self, api, role: str, positions: bool = False) -> bool:
+        """Прогрев и проверка ключей одного аккаунта (параллельно внутри)."""
+        _, ok = await asyncio.gather(api.warm_up(positions=positions), api.check_auth())
+        if not ok:
+            logger.error(f"❌ [{role}] Ключи API не прошли проверку — запросы этого аккаунта будут отклоняться.")
+        return ok
+
+    async def prepare(self, master: bool = True) -> List[Position]:
+        """
+        Стартовая последовательность. Всё независимое — одновременно:
+        снимок мастера, проверка ключей всех аккаунтов (включая мастеров из
+        MASTERS), часы и соединения, параметры инструментов, кэш плеч
+        подписчика. Возвращает позиции мастера.
+
+        master=False — только подписчик (воркер шардов: мастера опрашивает
+        супервизор, инструменты воркер загружает один раз на процесс).
+        """
+        started = time.perf_counter()
+        if not master:
+            follower_ok = await self._warm_api(self.follower_api, "FOLLOWER", positions=True)
+            self.startup_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(
+                f"⚡ Подписчик {self.cfg.get('FOLLOWER_NAME', '')} готов за {self.startup_ms} мс "
+                f"({'✅' if follower_ok else '❌'})"
+            )
+            return []
+        # дополнительные мастера MultiMasterSource — у каждого свой клиент API
+        extra = [
+            src for src, _ in getattr(self.master_source, "sources", ())
+            if getattr(src, "api", None) not in (None, self.master_api)
+        ]
+        master_positions, master_ok, follower_ok, _, *extra_ok = await asyncio.gather(
+            self.fetch_master_positions(),
+            self._warm_api(self.master_api, "MASTER"),
+            self._warm_api(self.follower_api, "FOLLOWER", positions=True),
+            self.master_api.load_instruments(),
+            *(self._warm_api(src.api, f"MASTER {src.name}") for src in extra),
+        )
+        master_ok = master_ok and all(extra_ok)
+        self.startup_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"⚡ Готов к копированию за {self.startup_ms} мс "
+            f"(мастер: {'✅' if master_ok else '❌'}, подписчик: {'✅' if follower_ok else '❌'})"
+        )
+        return master_positions or []
+
     async def run_copy_loop(self):
         logger.info("🟢 Запуск цикла копирования сделок")
 
-        master_positions = await self.fetch_master_positions()
-        self.ignored_symbols = {pos["symbol"] for pos in master_positions}
+        master_positions = await self.prepare()
+        self.differ.seed(master_positions)
+        self.ignored_symbols = {pos.symbol for pos in master_positions}
         if self.ignored_symbols:
             logger.info(
                 f"🔸 Найдено {len(self.ignored_symbols)} активных позиций мастера. "
@@ -66,54 +471,53 @@ class CopyTrader:
             )
         else:
             logger.info("✅ У мастера нет активных позиций при старте — копирование начнётся немедленно.")
+        if self.setting("TEST_MODE", False):
+            logger.warning(
+                "🧪 TEST_MODE включён — новые позиции мастера НЕ копируются "
+                "(выключить: TEST_MODE=false или ⚙️ Настройки → Риск)."
+            )
+        self.ready.set()
+        if self.slippage is not None:
+            self.market_stream.start()
+            await self.market_stream.ensure(self.differ.state.keys())
+        if self.order_mirror is not None:
+            await self.order_mirror.seed()
+            logger.info("🪞 Режим зеркалирования ордеров мастера (COPY_MODE=orders).")
+        kill_task = asyncio.create_task(self.kill_switch.run())
+        pnl_sync = None
+        if not self.dry_run:
+            # история биржи читается постранично в фоне и не задерживает старт
+            pnl_sync = asyncio.create_task(self.stats.sync_exchange_pnl(self.follower_api))
 
         try:
             while True:
-                master_positions = await self.fetch_master_positions()
-                follower_positions = await self.fetch_follower_positions()
-
-                master_symbols = {p["symbol"] for p in master_positions}
-                follower_symbols = {p["symbol"] for p in follower_positions}
-
-                for pos in master_positions:
-                    symbol = pos["symbol"].upper()
-                    side = pos["side"]
-                    qty = float(pos.get("contracts") or pos.get("size") or 0)
-                    price = float(pos.get("entryPrice") or 0)
-                    leverage = int(pos.get("leverage") or 10)
-
-                    if symbol in self.ignored_symbols:
-                        continue
-
-                    if symbol not in follower_symbols and qty > 0:
-                        logger.info(f"🆕 Новая позиция мастера: {symbol} ({side}, qty={qty})")
-                        balance = await self.follower_api.get_balance()
-                        risk_check = self.risk.apply_risk_rules(symbol, side, price, balance, leverage)
-                        if not risk_check["allowed"]:
-                            logger.warning(f"🚫 Сделка {symbol} отклонена: {risk_check['reason']}")
-                            continue
-
-                        await self.follower_api.open_position(symbol, side, qty, leverage)
-                        self.stats.record_open_trade(symbol, side, qty, price, leverage)
-                        logger.info(f"✅ Сделка {symbol} открыта у подписчика.")
-                        self.ignored_symbols.add(symbol)
-
-                for sym in list(self.ignored_symbols):
-                    if sym not in master_symbols:
-                        logger.info(f"🔻 Мастер закрыл {sym}. Закрываем и у подписчика.")
-                        await self.follower_api.close_position(sym)
-                        self.stats.record_close_trade(sym, price=0.0, pnl=0.0)
-                        self.ignored_symbols.remove(sym)
-
-                self.stats.update_from_positions(follower_positions)
-                await asyncio.sleep(self.cfg.get("POLL_INTERVAL_SEC", 5))
+                spent_before = self.master_api.request_count
+                changed = False
+                try:
+                    changed = await self._tick()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # ошибка одного тика не останавливает копирование
+                    logger.exception(f"Ошибка цикла копирования: {e}")
+                self.poller.on_tick(changed, self.master_api.request_count - spent_before)
+                await self.poller.sleep()
 
         except asyncio.CancelledError:
             logger.warning("🟥 Цикл копирования остановлен (SIGINT/SIGTERM).")
             raise
-        except Exception as e:
-            logger.warning(f"Ошибка цикла копирования: {e}")
-            await asyncio.sleep(5)
+        finally:
+            kill_task.cancel()
+            if pnl_sync is not None and not pnl_sync.done():
+                pnl_sync.cancel()
+            await self.engine.stop()
 
     async def start(self):
         await self.run_copy_loop()
+
+    async def close(self):
+        if self.market_stream is not None:
+            await self.market_stream.close()
+        await self.master_source.close()
+        await self.master_api.close()
+        await self.follower_api.close()
@@ -0,0 +1,98 @@
+"""
+Дифф снимков позиций мастера
+----------------------------
+Хранит предыдущее состояние мастера в компактном виде (symbol -> кортеж)
+и на каждом тике выдаёт только изменения: новая позиция, изменение объёма,
+переворот стороны, смена плеча, закрытие.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple
+
+from trader.events import MasterEvent, OpenEvent, ResizeEvent, CloseEvent, LeverageEvent
+from utils.models import Position
+
+
+class PosState(NamedTuple):
+    side: str
+    qty: float
+    leverage: int
+    price: float
+
+
+def _state_of(pos: Position) -> PosState:
+    return PosState(pos.side, pos.size, pos.leverage, pos.entry_price)
+
+
+class SnapshotDiffer:
+    def __init__(self):
+        self._prev: Dict[str, PosState] = {}
+
+    @staticmethod
+    def _snapshot(positions: Iterable[Position]) -> Dict[str, PosState]:
+        return {pos.symbol: _state_of(pos) for pos in positions if pos.size > 0}
+
+    def seed(self, positions: Iterable[Position]):
+        """Запоминает стартовое состояние без генерации событий."""
+        self._prev = self._snapshot(positions)
+
+    @property
+    def state(self) -> Dict[str, PosState]:
+        return self._prev
+
+    def diff(self, positions: Iterable[Position]) -> List[MasterEvent]:
+        snap = self._snapshot(positions)
+        prev = self._prev
+        if snap == prev:
+            return []
+
+        events: List[MasterEvent] = []
+        for symbol, cur in snap.items():
+            old = prev.get(symbol)
+            if old is None:
+                events.append(OpenEvent(
+                    symbol=symbol, side=cur.side, qty=cur.qty,
+                    price=cur.price, leverage=cur.leverage,
+                ))
+                continue
+            if old == cur:
+                continue
+            if old.side != cur.side:
+                # переворот: закрываем старую сторону и открываем новую (порядок гарантирует актор)
+                events.append(CloseEvent(symbol=symbol, side=old.side, prev_qty=old.qty))
+                events.append(OpenEvent(
+                    symbol=symbol, side=cur.side, qty=cur.qty,
+                    price=cur.price, leverage=cur.leverage,
+                ))
+                continue
+            if old.leverage != cur.leverage:
+                events.append(LeverageEvent(
+                    symbol=symbol, leverage=cur.leverage, prev_leverage=old.leverage,
+                ))
+            if old.qty != cur.qty:
+                events.append(ResizeEvent(
+                    symbol=symbol, side=cur.side, qty=cur.qty, prev_qty=old.qty,
+                    price=cur.price, leverage=cur.leverage,
+                ))
+
+        for symbol in prev.keys() - snap.keys():
+            old = prev[symbol]
+            events.append(CloseEvent(symbol=symbol, side=old.side, prev_qty=old.qty))
+
+        self._prev = snap
+        return events
+
+    def revert(self, event: MasterEvent):
+        """
+        Откатывает запомненное состояние символа до события, которое не удалось
+        доставить, чтобы следующий тик выдал его повторно.
+        """
+        sym = event.symbol
+        cur = self._prev.get(sym)
+        if isinstance(event, OpenEvent):
+            self._prev.pop(sym, None)
+        elif isinstance(event, CloseEvent):
+            self._prev[sym] = PosState(event.side, event.prev_qty, 0, 0.0)
+        elif isinstance(event, ResizeEvent) and cur is not None:
+            self._prev[sym] = cur._replace(qty=event.prev_qty)
+        elif isinstance(event, LeverageEvent) and cur is not None:
+            self._prev[sym] = cur._replace(leverage=event.prev_leverage)
@@ -0,0 +1,159 @@
+"""
+Событийный движок копирования
+-----------------------------
+Каждый символ обслуживается своим asyncio-актором с ограниченной очередью:
+- события одного символа выполняются строго по порядку;
+- разные символы обрабатываются параллельно;
+- ошибка в обработчике одного символа не останавливает остальные.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional
+
+from trader.events import MasterEvent
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[MasterEvent], Awaitable[None]]
+
+
+class SymbolActor:
+    """Очередь и задача-обработчик событий одного символа."""
+
+    def __init__(
+        self,
+        symbol: str,
+        handler: EventHandler,
+        maxsize: int = 32,
+        latencies: Optional[Deque[float]] = None,
+    ):
+        self.symbol = symbol
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task: asyncio.Task | None = None
+        self.processed = 0
+        self.failed = 0
+        # задержка «обнаружение у мастера → обработано у подписчика», с
+        self.latencies = latencies if latencies is not None else deque(maxlen=256)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(), name=f"actor:{self.symbol}")
+
+    async def _run(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.handler(event)
+                self.processed += 1
+                self.latencies.append(time.monotonic() - event.ts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.exception(f"[{self.symbol}] Ошибка обработки {type(event).__name__}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+
+class CopyEngine:
+    """
+    Маршрутизатор событий мастера по символьным акторам.
+
+    Backpressure: dispatch() ждёт места в очереди символа не дольше put_timeout.
+    Если актор завис, событие отбрасывается (с логом и вызовом on_drop),
+    а остальные символы продолжают обрабатываться.
+    """
+
+    def __init__(
+        self,
+        handler: EventHandler,
+        queue_size: int = 32,
+        put_timeout: float = 5.0,
+        on_drop: Callable[[MasterEvent], None] | None = None,
+    ):
+        self.handler = handler
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self.on_drop = on_drop
+        self.actors: Dict[str, SymbolActor] = {}
+        self.dropped = 0
+        self.latencies: Deque[float] = deque(maxlen=256)   # общие для всех акторов
+
+    def _actor(self, symbol: str) -> SymbolActor:
+        actor = self.actors.get(symbol)
+        if actor is None:
+            actor = SymbolActor(symbol, self.handler, self.queue_size, self.latencies)
+            self.actors[symbol] = actor
+        actor.start()
+        return actor
+
+    async def dispatch(self, event: MasterEvent) -> bool:
+        actor = self._actor(event.symbol)
+        try:
+            await asyncio.wait_for(actor.queue.put(event), timeout=self.put_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            logger.error(
+                f"🚧 Очередь {event.symbol} переполнена ({actor.queue.qsize()}), "
+                f"событие {type(event).__name__} отброшено"
+            )
+            if self.on_drop:
+                self.on_drop(event)
+            return False
+
+    async def dispatch_many(self, events: Iterable[MasterEvent]):
+        """
+        Рассылает пачку событий: порядок внутри символа сохраняется,
+        символы не ждут друг друга при переполнении очередей.
+        """
+        by_symbol: Dict[str, list] = {}
+        for ev in events:
+            by_symbol.setdefault(ev.symbol, []).append(ev)
+        if not by_symbol:
+            return
+
+        async def _feed(batch: list):
+            for ev in batch:
+                await self.dispatch(ev)
+
+        await asyncio.gather(*(_feed(b) for b in by_symbol.values()))
+
+    async def drain(self):
+        """Ждёт, пока все поставленные события будут обработаны."""
+        await asyncio.gather(*(a.queue.join() for a in self.actors.values()))
+
+    async def stop(self):
+        await asyncio.gather(*(a.stop() for a in self.actors.values()))
+        self.actors.clear()
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Задержка копирования по последним событиям, мс."""
+        values = sorted(self.latencies)
+        if not values:
+            return {"count": 0, "last": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(values),
+            "last": round(self.latencies[-1] * 1000, 1),
+            "p50": round(values[len(values) // 2] * 1000, 1),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+            "max": round(values[-1] * 1000, 1),
+        }
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {
+            sym: {"queued": a.queue.qsize(), "processed": a.processed, "failed": a.failed}
+            for sym, a in self.actors.items()
+        }
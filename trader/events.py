@@ -0,0 +1,68 @@
+"""
+Типизированные события копирования
+----------------------------------
+Изменения позиций мастера превращаются в события, которые
+CopyEngine маршрутизирует по символам в отдельные акторы.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class MasterEvent:
+    """Базовое событие по символу мастера."""
+    symbol: str
+    ts: float = field(default_factory=time.monotonic)   # момент обнаружения (monotonic)
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class OpenEvent(MasterEvent):
+    """Мастер открыл новую позицию."""
+    side: str
+    qty: float
+    price: float = 0.0
+    leverage: int = 10
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ResizeEvent(MasterEvent):
+    """Мастер увеличил (усреднение) или уменьшил позицию."""
+    side: str
+    qty: float
+    prev_qty: float
+    price: float = 0.0
+    leverage: int = 10
+
+    @property
+    def delta(self) -> float:
+        return self.qty - self.prev_qty
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class CloseEvent(MasterEvent):
+    """Мастер полностью закрыл позицию."""
+    side: str = ""
+    prev_qty: float = 0.0
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class LeverageEvent(MasterEvent):
+    """Мастер сменил плечо по символу."""
+    leverage: int
+    prev_leverage: int = 0
+
+
+EVENT_TYPES = {cls.__name__: cls for cls in (OpenEvent, ResizeEvent, CloseEvent, LeverageEvent)}
+
+
+def encode_event(ev: MasterEvent) -> dict:
+    """Событие в dict для JSON (IPC воркеров, запись потока)."""
+    return {"kind": type(ev).__name__, **asdict(ev)}
+
+
+def decode_event(data: dict) -> Optional[MasterEvent]:
+    data = dict(data)
+    cls = EVENT_TYPES.get(data.pop("kind", ""))
+    return cls(**data) if cls else None
@@ -0,0 +1,185 @@
+"""
+Аварийное закрытие (kill switch)
+--------------------------------
+Держит для каждой позиции подписчика заранее собранное тело reduce-only
+закрытия по рынку и обновляет его при изменении позиции. При срабатывании
+(просадка эквити или команда /kill) одновременно отправляет все закрытия
+и отмену всех ордеров, затем проверяет, что позиций не осталось, и
+дозакрывает остатки. Новые копии блокируются до ручного взведения (/rearm).
+
+Просадка: settings AUTO_CLOSE_ON_DRAWDOWN и EQUITY_DRAWDOWN_PCT (% от
+пика эквити с момента взведения).
+
+Фоновое обновление раз в KILL_REFRESH_SEC берёт позиции из снимка цикла
+копирования, пока он свежий, и учитывается в бюджете AdaptivePoller.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.models import Position, Wallet
+
+logger = logging.getLogger(__name__)
+
+_FLAT_RETRIES = 3
+
+
+class KillSwitch:
+    def __init__(self, trader, refresh_sec: float = 5.0):
+        self.trader = trader
+        self.refresh_sec = refresh_sec
+        self.tripped = False
+        self.peak_equity = 0.0
+        self.last_report: Optional[Dict[str, Any]] = None
+        # вызывается с отчётом после срабатывания (например, уведомление в Telegram)
+        self.on_trip: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+        self._prepared: Dict[str, Tuple[Position, Any]] = {}   # symbol -> (позиция, тело закрытия)
+        self._lock = asyncio.Lock()
+
+    @property
+    def api(self):
+        return self.trader.follower_api
+
+    # ---------------------- заготовки ----------------------
+
+    def update(self, positions: List[Position]):
+        """Пересобирает тела закрытия только для изменившихся позиций."""
+        current = {p.symbol: p for p in positions if p.size > 0}
+        for symbol in list(self._prepared):
+            if symbol not in current:
+                del self._prepared[symbol]
+        for symbol, pos in current.items():
+            known = self._prepared.get(symbol)
+            if known is None or known[0].side != pos.side or known[0].size != pos.size:
+                self._prepared[symbol] = (pos, self.api.prepare_close(pos))
+            else:
+                self._prepared[symbol] = (pos, known[1])
+
+    def check_drawdown(self, wallet: Wallet) -> bool:
+        """True — просадка от пика превысила EQUITY_DRAWDOWN_PCT и автозакрытие включено."""
+        equity = wallet.total_equity
+        if equity <= 0:
+            return False
+        self.peak_equity = max(self.peak_equity, equity)
+        if not self.trader.setting("AUTO_CLOSE_ON_DRAWDOWN", False):
+            return False
+        limit = float(self.trader.setting("EQUITY_DRAWDOWN_PCT", 0.0) or 0.0)
+        drawdown = (self.peak_equity - equity) / self.peak_equity * 100
+        return limit > 0 and drawdown >= limit
+
+    # ---------------------- срабатывание ----------------------
+
+    async def trigger(self, reason: str) -> Dict[str, Any]:
+        """Закрывает всё одним параллельным залпом. Повторный вызов до /rearm — отчёт прошлого."""
+        async with self._lock:
+            if self.tripped and self.last_report is not None:
+                return self.last_report
+            self.tripped = True
+            started = time.perf_counter()
+            logger.warning(f"🛑 Аварийное закрытие ({reason}): позиций {len(self._prepared)}")
+
+            prepared = dict(self._prepared)
+            results = await asyncio.gather(
+                self.api.cancel_all_orders(),
+                *(self.api.submit_close(symbol, body) for symbol, (_, body) in prepared.items()),
+                return_exceptions=True,
+            )
+            orders_cancelled = results[0] is True
+            closed = [s for s, ok in zip(prepared, results[1:]) if ok is True]
+
+            # заготовки могли отстать от биржи — сверяемся и дозакрываем остатки
+            left: List[Position] = []
+            for _ in range(_FLAT_RETRIES):
+                positions = await self.api.get_open_positions()
+                if positions is None:
+                    continue
+                left = [p for p in positions if p.size > 0]
+                if not left:
+                    break
+                retry = await asyncio.gather(
+                    *(self.api.close_position(p.symbol, position=p) for p in left),
+                    return_exceptions=True,
+                )
+                closed.extend(p.symbol for p, ok in zip(left, retry) if ok is True)
+            time_to_flat = time.perf_counter() - started
+
+            for symbol in set(closed):
+                pos = prepared.get(symbol, (None,))[0]
+                self.trader.stats.record_close_trade(
+                    symbol,
+                    price=pos.mark_price if pos else 0.0,
+                    pnl=pos.unrealised_pnl if pos else 0.0,
+                )
+            self.trader.on_flattened()
+            self._prepared.clear()
+
+            self.last_report = {
+                "reason": reason,
+                "at": datetime.utcnow().isoformat(),
+                "closed": sorted(set(closed)),
+                "left": sorted(p.symbol for p in left),
+                "orders_cancelled": orders_cancelled,
+                "time_to_flat_ms": round(time_to_flat * 1000, 1),
+            }
+            if left:
+                logger.error(f"🛑 Не удалось закрыть: {', '.join(self.last_report['left'])}")
+            logger.warning(
+                f"🛑 Аварийное закрытие завершено за {self.last_report['time_to_flat_ms']} мс "
+                f"(закрыто {len(self.last_report['closed'])}). Копирование заблокировано до /rearm."
+            )
+        if self.on_trip is not None:
+            try:
+                res = self.on_trip(self.last_report)
+                if asyncio.iscoroutine(res):
+                    await res
+            except Exception as e:
+                logger.warning(f"KillSwitch: ошибка уведомления: {e}")
+        return self.last_report
+
+    def rearm(self):
+        """Снимает блокировку копирования; пик эквити считается заново."""
+        self.tripped = False
+        self.peak_equity = 0.0
+        logger.info("🟢 Аварийное закрытие взведено, копирование разблокировано.")
+
+    # ---------------------- фоновое обновление ----------------------
+
+    async def refresh(self):
+        """
+        Эквити — каждый раз; позиции — только если снимок цикла копирования
+        старше refresh_sec. Отправленные запросы списываются с бюджета опроса.
+        """
+        stale = time.monotonic() - self.trader.positions_at > self.refresh_sec
+        if stale:
+            positions, wallet = await asyncio.gather(
+                self.api.get_open_positions(), self.api.get_wallet()
+            )
+            if positions is not None:
+                await self.trader.observe_positions(positions)
+        else:
+            wallet = await self.api.get_wallet()
+        self.trader.poller.charge(2 if stale else 1)
+        if wallet is not None and not self.tripped and self.check_drawdown(wallet):
+            await self.trigger(f"просадка ≥ {self.trader.setting('EQUITY_DRAWDOWN_PCT')}%")
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"KillSwitch: ошибка обновления: {e}")
+            await asyncio.sleep(self.refresh_sec)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "tripped": self.tripped,
+            "prepared": len(self._prepared),
+            "peak_equity": self.peak_equity,
+            "last_report": self.last_report,
+        }
@@ -1,47 +1,66 @@
 import logging
-from utils.api_wrappers import BybitHTTP
+from typing import List, Optional
+
+from utils.api_wrappers import BybitAPI
+from utils.models import Position
+
+logger = logging.getLogger(__name__)
 
 
 class MasterBridge:
     """
-    Источник данных о позициях мастера.
+    Источник данных о позициях мастера (асинхронный, поверх BybitAPI).
     Поддерживает:
     - обычный аккаунт (trade)
     - мастер копитрейдинга (copy)
+
+    Любой объект с async get_positions() -> list[Position] | None и async close()
+    может использоваться в CopyTrader как источник мастера.
     """
 
-    def __init__(self, cfg):
-        mode = cfg.get("MASTER_MODE", "trade").lower()
-        net = cfg.get("MASTER_NET", "mainnet").lower()
-        testnet = net == "testnet"
+    def __init__(self, cfg, api: Optional[BybitAPI] = None):
+        mode = (cfg.get("MASTER_MODE") or "trade").lower()
+        env = (cfg.get("MASTER_ENV") or cfg.get("MASTER_NET") or "mainnet").lower()
 
-        self.mode = mode
-        self.api = BybitHTTP(
-            cfg["MASTER_API_KEY"],
-            cfg["MASTER_API_SECRET"],
-            testnet=testnet
+        self.mode = mode if mode in ("trade", "copy") else "trade"
+        self.name = cfg.get("MASTER_NAME", "master")
+        self.api = api or BybitAPI(
+            api_key=cfg.get("MASTER_API_KEY"),
+            api_secret=cfg.get("MASTER_API_SECRET"),
+            role="MASTER",
+            env=env,
         )
 
-        logging.info(f"🧩 Инициализация мастера ({mode}, сеть={net})")
+        logger.info(f"🧩 Источник мастера: {self.name} ({self.mode}, env={env})")
 
-    def get_positions(self):
-        """Получение позиций мастера"""
+    async def get_positions(self) -> Optional[List[Position]]:
+        """Получение позиций мастера. None — запрос не удался."""
         if self.mode == "copy":
-            return self.get_copy_positions()
-        else:
-            return self.get_trade_positions()
+            return await self.get_copy_positions()
+        return await self.get_trade_positions()
 
-    def get_trade_positions(self):
+    async def get_trade_positions(self):
         """Позиции обычного торгового аккаунта"""
-        return self.api.get_positions()
+        return await self.api.get_open_positions()
 
-    def get_copy_positions(self):
+    async def get_copy_positions(self):
         """Позиции мастера копитрейдинга Bybit"""
         try:
-            res = self.api._request("GET", "/v5/copytrading/master/positions")
-            if not res:
-                return []
-            return res.get("list", [])
+            return await self.api.get_copy_master_positions()
         except Exception as e:
-            logging.warning(f"Ошибка запроса позиций копитрейд-мастера: {e}")
-            return []
+            logger.warning(f"Ошибка запроса позиций копитрейд-мастера: {e}")
+            return None
+
+    async def close(self):
+        await self.api.close()
+
+
+class NullMasterSource:
+    """Источник без опроса: события мастера подаются в CopyTrader.apply_events() извне."""
+    name = "external"
+
+    async def get_positions(self):
+        return None
+
+    async def close(self):
+        pass
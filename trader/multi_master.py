@@ -0,0 +1,86 @@
+"""
+Несколько мастеров с неттингом
+------------------------------
+MultiMasterSource опрашивает всех мастеров параллельно и сводит их позиции
+в одну целевую позицию подписчика по каждому символу:
+
+    net(symbol) = Σ weight_i * signed_size_i
+
+Вес — простой множитель объёма в контрактах, а не доля капитала: размеры
+мастеров с разным депозитом не нормируются по их equity. Мастер со счётом
+вдвое больше при весе 1.0 весит в нетто вдвое больше; чтобы уравнять
+мастеров, подберите MASTER_WEIGHT / MASTER_<N>_WEIGHT вручную.
+
+Разнонаправленные позиции взаимно гасятся, поэтому подписчик не открывает
+встречные ордера. Наружу отдаётся обычный список Position — дальше работает
+тот же дифф снимков, и на биржу уходят только нетто-изменения.
+Доли мастеров в каждом символе запоминаются для распределения PnL.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.models import Position
+
+logger = logging.getLogger(__name__)
+
+
+class MultiMasterSource:
+    def __init__(self, sources: Sequence[Tuple[object, float]]):
+        """sources — пары (источник с async get_positions(), множитель объёма)."""
+        self.sources = [(src, float(w)) for src, w in sources]
+        self.name = "+".join(getattr(src, "name", "master") for src, _ in self.sources)
+        # symbol -> {имя мастера: взвешенный знаковый объём} по последнему ненулевому состоянию
+        self._contrib: Dict[str, Dict[str, float]] = {}
+        logger.info(
+            "🧩 Мульти-мастер: "
+            + ", ".join(f"{getattr(src, 'name', 'master')}×{w:g}" for src, w in self.sources)
+        )
+
+    async def get_positions(self) -> Optional[List[Position]]:
+        results = await asyncio.gather(
+            *(src.get_positions() for src, _ in self.sources), return_exceptions=True
+        )
+        per_symbol: Dict[str, List[Tuple[str, float, Position]]] = {}
+        for (src, weight), res in zip(self.sources, results):
+            name = getattr(src, "name", "master")
+            if res is None or isinstance(res, Exception):
+                # без одного из мастеров нетто-цель посчитать нельзя — пропускаем тик
+                logger.warning(f"[{name}] позиции не получены: {res!r}")
+                return None
+            for p in res:
+                signed = p.size * weight * (1.0 if p.side == "buy" else -1.0)
+                per_symbol.setdefault(p.symbol, []).append((name, signed, p))
+
+        net_positions: List[Position] = []
+        for symbol, parts in per_symbol.items():
+            net = sum(signed for _, signed, _ in parts)
+            if abs(net) < 1e-12:
+                continue
+            side = "buy" if net > 0 else "sell"
+            same_dir = [(n, sg, p) for n, sg, p in parts if (sg > 0) == (net > 0)]
+            gross = sum(abs(sg) for _, sg, _ in same_dir)
+            entry = sum(abs(sg) * p.entry_price for _, sg, p in same_dir) / gross if gross else 0.0
+            leverage = max(same_dir, key=lambda x: abs(x[1]))[2].leverage
+            net_positions.append(Position(symbol, side, abs(net), entry, leverage=leverage))
+
+            contrib: Dict[str, float] = {}
+            for n, sg, _ in parts:
+                contrib[n] = contrib.get(n, 0.0) + sg
+            self._contrib[symbol] = contrib
+        return net_positions
+
+    def attribution(self, symbol: str) -> Dict[str, float]:
+        """
+        Доли мастеров в текущей нетто-позиции символа (сумма = 1).
+        Мастер с позицией против нетто получает отрицательную долю.
+        """
+        contrib = self._contrib.get(symbol) or {}
+        net = sum(contrib.values())
+        if abs(net) < 1e-12:
+            return {}
+        return {name: round(v / net, 6) for name, v in contrib.items()}
+
+    async def close(self):
+        await asyncio.gather(*(src.close() for src, _ in self.sources), return_exceptions=True)
@@ -0,0 +1,178 @@
+"""
+Зеркалирование ордеров мастера (COPY_MODE=orders)
+-------------------------------------------------
+Вместо того чтобы ждать исполнения у мастера, подписчик выставляет
+такие же лимитные и условные ордера (объём масштабируется SIZE_SCALE)
+и исполняется одновременно с мастером.
+
+- новый ордер мастера      → place (orderLinkId = "cp" + orderId мастера)
+- изменились цена/объём    → amend
+- ордер исчез у мастера    → cancel
+- TP/SL мастера (COPY_TP / COPY_SL) → /v5/position/trading-stop подписчика
+
+orderLinkId детерминирован, поэтому после перезапуска бот находит свои ордера.
+Неудавшаяся операция не фиксируется в состоянии и повторяется на следующем
+тике (не более MAX_RETRIES раз подряд — например, копия уже исполнена).
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.helpers import round_qty
+from utils.models import Order
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+TPSL_TYPES = {"TakeProfit", "StopLoss", "PartialTakeProfit", "PartialStopLoss", "TrailingStop"}
+
+
+def link_id_for(master_order_id: str) -> str:
+    """orderLinkId подписчика (не длиннее 36 символов)."""
+    return "cp" + master_order_id.replace("-", "")[:32]
+
+
+class OrderMirror:
+    def __init__(self, master_api, follower_api, setting: Callable[[str, Any], Any]):
+        self.master_api = master_api
+        self.follower_api = follower_api
+        self.setting = setting
+
+        self._prev: Dict[str, Order] = {}                  # orderId мастера -> ордер
+        self._tpsl: Dict[str, Tuple[float, float]] = {}    # symbol -> (tp, sl), уже применённые
+        self._fails: Dict[str, int] = {}                   # orderId / symbol -> неудач подряд
+
+    def _scaled(self, order: Order) -> float:
+        scale = float(self.setting("SIZE_SCALE", 1.0) or 1.0)
+        return round_qty(order.symbol, order.qty * scale)
+
+    def _split(self, orders: List[Order]) -> Tuple[Dict[str, Order], Dict[str, Tuple[float, float]]]:
+        """Обычные/условные ордера по orderId и TP/SL по символу."""
+        plain: Dict[str, Order] = {}
+        tpsl: Dict[str, Tuple[float, float]] = {}
+        copy_tp = bool(self.setting("COPY_TP", True))
+        copy_sl = bool(self.setting("COPY_SL", True))
+        for o in orders:
+            if o.stop_order_type in TPSL_TYPES:
+                tp, sl = tpsl.get(o.symbol, (0.0, 0.0))
+                if copy_tp and "TakeProfit" in o.stop_order_type:
+                    tp = o.trigger_price
+                elif copy_sl and o.stop_order_type in ("StopLoss", "PartialStopLoss", "TrailingStop"):
+                    sl = o.trigger_price
+                tpsl[o.symbol] = (tp, sl)
+            else:
+                plain[o.order_id] = o
+        return plain, tpsl
+
+    async def seed(self):
+        """Ордера, стоящие у мастера на момент старта, не копируются."""
+        orders = await self.master_api.get_open_orders()
+        if orders is None:
+            return
+        self._prev, self._tpsl = self._split(orders)
+        if self._prev:
+            logger.info(f"🔸 У мастера {len(self._prev)} активных ордеров — они будут проигнорированы.")
+
+    # ---------------------- синхронизация ----------------------
+
+    async def sync(self) -> bool:
+        """Один проход зеркалирования. True — были изменения у мастера."""
+        orders = await self.master_api.get_open_orders()
+        if orders is None:
+            return False
+        cur, tpsl = self._split(orders)
+        if cur == self._prev and tpsl == self._tpsl:
+            return False
+
+        keys: List[Tuple[str, str]] = []   # (вид операции, orderId или symbol) — параллельно jobs
+        jobs = []
+        for oid, o in cur.items():
+            old = self._prev.get(oid)
+            if old is None:
+                keys.append(("place", oid))
+                jobs.append(self._place(o))
+            elif (o.qty, o.price, o.trigger_price) != (old.qty, old.price, old.trigger_price):
+                keys.append(("amend", oid))
+                jobs.append(self._amend(o))
+        for oid in self._prev.keys() - cur.keys():
+            keys.append(("cancel", oid))
+            jobs.append(self._cancel(self._prev[oid]))
+        for symbol in tpsl.keys() | self._tpsl.keys():
+            new = tpsl.get(symbol, (0.0, 0.0))
+            if new != self._tpsl.get(symbol, (0.0, 0.0)):
+                keys.append(("tpsl", symbol))
+                jobs.append(self._apply_tpsl(symbol, *new))
+
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        prev, applied = dict(cur), dict(tpsl)
+        for (kind, key), r in zip(keys, results):
+            if isinstance(r, Exception):
+                logger.warning(f"Ошибка зеркалирования ордера: {r}")
+            if r is True:
+                self._fails.pop(key, None)
+                continue
+            fails = self._fails.get(key, 0) + 1
+            if fails >= MAX_RETRIES:
+                logger.warning(f"🪞 {kind} {key}: {fails} неудачи подряд — больше не повторяем.")
+                self._fails.pop(key, None)
+                continue
+            self._fails[key] = fails
+            # откат к прежнему состоянию: следующий тик снова увидит разницу и повторит
+            if kind == "place":
+                prev.pop(key, None)
+            elif kind in ("amend", "cancel"):
+                prev[key] = self._prev[key]
+            elif key in self._tpsl:
+                applied[key] = self._tpsl[key]
+            else:
+                applied.pop(key, None)
+        self._prev, self._tpsl = prev, applied
+        return True
+
+    async def _place(self, o: Order) -> bool:
+        qty = self._scaled(o)
+        if qty <= 0:
+            return True
+        logger.info(f"🪞 Ордер мастера {o.symbol} {o.side} {o.order_type} qty={o.qty} → копия qty={qty}")
+        res = await self.follower_api.place_order(
+            o.symbol,
+            o.side,
+            qty,
+            order_type=o.order_type or "Limit",
+            price=o.price if o.order_type == "Limit" else None,
+            trigger_price=o.trigger_price or None,
+            trigger_direction=o.trigger_direction or None,
+            reduce_only=o.reduce_only,
+            time_in_force=o.time_in_force or "GTC",
+            order_link_id=link_id_for(o.order_id),
+        )
+        return bool(res)
+
+    async def _amend(self, o: Order) -> bool:
+        qty = self._scaled(o)
+        logger.info(f"✏️ Мастер изменил ордер {o.symbol}: qty={o.qty} price={o.price} trigger={o.trigger_price}")
+        ok = await self.follower_api.amend_order(
+            o.symbol,
+            link_id_for(o.order_id),
+            qty=qty,
+            price=o.price if o.order_type == "Limit" else None,
+            trigger_price=o.trigger_price or None,
+        )
+        if not ok:
+            logger.warning(f"Не удалось изменить копию ордера {o.symbol} ({o.order_id})")
+        return ok
+
+    async def _cancel(self, o: Order) -> bool:
+        # ордер мог исчезнуть из-за исполнения — тогда копия, скорее всего, тоже исполнена
+        ok = await self.follower_api.cancel_order(o.symbol, link_id_for(o.order_id))
+        if ok:
+            logger.info(f"❎ Мастер снял ордер {o.symbol} — копия отменена.")
+        return ok
+
+    async def _apply_tpsl(self, symbol: str, tp: float, sl: float) -> bool:
+        logger.info(f"🎯 TP/SL мастера {symbol}: tp={tp or '—'} sl={sl or '—'}")
+        ok = await self.follower_api.set_trading_stop(symbol, take_profit=tp, stop_loss=sl)
+        if not ok:
+            logger.warning(f"Не удалось установить TP/SL подписчику по {symbol}")
+        return ok
@@ -0,0 +1,360 @@
+"""
+Replay / бэктест настроек копирования
+-------------------------------------
+Прогоняет записанные снимки позиций мастера через ту же логику, что и
+в бою (SnapshotDiffer → CopyTrader.apply_events → RiskManager), но в
+симулированном времени: цены берутся из исторических свечей, исполнение —
+ShadowAPI без задержки (задержка моделируется сдвигом цены FILL_DELAY_MS).
+
+Снимки мастера — JSON lines (можно .gz), по строке на снимок:
+    {"ts": 1728300000.0, "positions": [{"symbol": "BTCUSDT", "side": "buy",
+                                        "size": 0.1, "entry_price": 62000, "leverage": 10}, ...]}
+либо запись utils.recorder (файл или каталог RECORD_DIR, записи kind=master).
+Свечи — JSON {symbol: [[start_ms, open, high, low, close], ...]}
+(--fetch-klines скачивает их с Bybit и сохраняет в файл).
+
+Перебор параметров разносится по ProcessPoolExecutor; кривая капитала
+по сделкам считается векторно (numpy, если установлен):
+
+    python -m trader.replay --master master.jsonl.gz --klines klines.json \\
+        --set SIZE_SCALE=0.5,1.0 --set MAX_DCA_PER_TRADE=1,2 --workers 4
+"""
+
+import argparse
+import asyncio
+import gzip
+import itertools
+import logging
+import os
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils import serializer
+from utils.models import Position
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+logger = logging.getLogger(__name__)
+
+Snapshot = Tuple[float, List[Position]]
+
+
+# ============================================================
+#  ДАННЫЕ
+# ============================================================
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def load_snapshots(path: str) -> List[Snapshot]:
+    """Снимки мастера по возрастанию времени (прочие строки пропускаются)."""
+    if os.path.isdir(path):
+        from utils.recorder import master_snapshots
+        return master_snapshots(path)
+    snaps: List[Snapshot] = []
+    with _open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = serializer.loads(line)
+            if rec.get("k") == "master":
+                ts, rows = rec["t"], rec["d"]
+            elif "positions" in rec:
+                ts, rows = rec["ts"], rec["positions"]
+            else:
+                continue
+            snaps.append((float(ts), [
+                Position(
+                    str(p["symbol"]).upper(),
+                    str(p["side"]).lower(),
+                    float(p["size"]),
+                    float(p.get("entry_price") or 0.0),
+                    leverage=int(p.get("leverage") or 10),
+                )
+                for p in rows
+            ]))
+    snaps.sort(key=lambda s: s[0])
+    return snaps
+
+
+class KlineTape:
+    """Цены по времени: close последней свечи, открытой не позже t."""
+
+    def __init__(self, klines: Dict[str, List[List[float]]]):
+        self.times: Dict[str, List[float]] = {}
+        self.closes: Dict[str, List[float]] = {}
+        for symbol, rows in klines.items():
+            rows = sorted(rows, key=lambda r: r[0])
+            self.times[symbol] = [r[0] / 1000 for r in rows]
+            self.closes[symbol] = [float(r[4]) for r in rows]
+
+    def price_at(self, symbol: str, ts: float) -> float:
+        times = self.times.get(symbol)
+        if not times:
+            return 0.0
+        i = bisect_right(times, ts) - 1
+        return self.closes[symbol][max(i, 0)]
+
+
+class ReplayClock:
+    def __init__(self):
+        self.now = 0.0
+
+
+class ReplayPriceAPI:
+    """Замена BybitAPI.get_mark_prices для ShadowAPI в симулированном времени."""
+    env = "replay"
+
+    def __init__(self, tape: KlineTape, clock: ReplayClock, fill_delay_ms: float = 0.0):
+        self.tape = tape
+        self.clock = clock
+        self.fill_delay = fill_delay_ms / 1000
+
+    async def get_mark_prices(self, symbols: Optional[List[str]] = None) -> Dict[str, float]:
+        t = self.clock.now + self.fill_delay
+        return {s: self.tape.price_at(s, t) for s in symbols or self.tape.times}
+
+    async def close(self):
+        pass
+
+
+# ============================================================
+#  КРИВАЯ КАПИТАЛА (векторно)
+# ============================================================
+
+def equity_curve(
+    fills: List[Tuple[float, str, float, float, float]],
+    tape: KlineTape,
+    cash0: float,
+) -> List[float]:
+    """
+    Капитал на сетке времени всех свечей по журналу сделок
+    (ts, symbol, знаковый qty, цена, комиссия):
+        equity(t) = cash0 − Σ qty·price − Σ fee + Σ_symbol pos(t)·close(t)
+    """
+    grid = sorted({t for times in tape.times.values() for t in times})
+    if not grid:
+        return [cash0]
+    if np is not None:
+        g = np.asarray(grid)
+        f_ts = np.asarray([f[0] for f in fills]) if fills else np.zeros(0)
+        cash_flow = np.asarray([-f[2] * f[3] - f[4] for f in fills]) if fills else np.zeros(0)
+        idx = np.searchsorted(f_ts, g, side="right")
+        equity = cash0 + np.concatenate(([0.0], np.cumsum(cash_flow)))[idx]
+        for symbol in {f[1] for f in fills}:
+            mask = np.asarray([f[1] == symbol for f in fills])
+            s_ts, s_qty = f_ts[mask], np.asarray([f[2] for f in fills])[mask]
+            pos = np.concatenate(([0.0], np.cumsum(s_qty)))[np.searchsorted(s_ts, g, side="right")]
+            k_t, k_c = np.asarray(tape.times[symbol]), np.asarray(tape.closes[symbol])
+            close = k_c[np.clip(np.searchsorted(k_t, g, side="right") - 1, 0, len(k_c) - 1)]
+            equity += pos * close
+        return equity.tolist()
+
+    # без numpy — тот же расчёт одним проходом по сетке
+    equity: List[float] = []
+    cash, pos, j = cash0, {}, 0
+    for t in grid:
+        while j < len(fills) and fills[j][0] <= t:
+            _, symbol, qty, price, fee = fills[j]
+            cash -= qty * price + fee
+            pos[symbol] = pos.get(symbol, 0.0) + qty
+            j += 1
+        equity.append(cash + sum(q * tape.price_at(s, t) for s, q in pos.items() if q))
+    return equity
+
+
+def max_drawdown(equity: List[float]) -> float:
+    if np is not None and equity:
+        e = np.asarray(equity)
+        return float(np.max(np.maximum.accumulate(e) - e))
+    peak, dd = float("-inf"), 0.0
+    for v in equity:
+        peak = max(peak, v)
+        dd = max(dd, peak - v)
+    return dd
+
+
+# ============================================================
+#  ПРОГОН
+# ============================================================
+
+async def replay(
+    snapshots: List[Snapshot],
+    tape: KlineTape,
+    settings: Dict[str, Any],
+    balance: float = 1000.0,
+    fill_delay_ms: float = 0.0,
+) -> Dict[str, Any]:
+    """Один прогон с набором settings. Возвращает метрики."""
+    from trader.core import CopyTrader
+    from trader.master_bridge import NullMasterSource
+
+    clock = ReplayClock()
+    fills: List[Tuple[float, str, float, float, float]] = []
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        state_file = os.path.join(tmp, "state.json")
+        serializer.dump_file({"settings": {
+            **settings,
+            "SHADOW_BALANCE": balance,
+            "SHADOW_LATENCY_MS": 0,
+            "SHADOW_LATENCY_JITTER_MS": 0,
+        }}, state_file)
+        trader = CopyTrader(
+            {"STATE_FILE": state_file, "DRY_RUN": True, "ACTOR_QUEUE_SIZE": 1024},
+            master_source=NullMasterSource(),
+        )
+        shadow = trader.follower_api
+        await shadow.price_api.close()
+        shadow.price_api = ReplayPriceAPI(tape, clock, fill_delay_ms)
+        shadow.state_file = None
+        shadow.on_fill = lambda sym, side, qty, price, fee: fills.append(
+            (clock.now, sym, qty if side == "buy" else -qty, price, fee)
+        )
+
+        try:
+            if snapshots:
+                clock.now = snapshots[0][0]
+                trader.differ.seed(snapshots[0][1])
+                trader.ignored_symbols = {p.symbol for p in snapshots[0][1]}
+            for ts, positions in snapshots[1:]:
+                clock.now = ts
+                events = trader.differ.diff(positions)
+                if events:
+                    await trader.apply_events(events)
+                    await trader.engine.drain()
+                # TP/SL и лимитки ShadowAPI проверяются при обновлении цен
+                await shadow.get_open_positions()
+            summary = shadow.get_summary()
+            history = trader.stats.state.get("history", [])
+        finally:
+            await trader.engine.stop()
+            await trader.close()
+
+    curve = equity_curve(fills, tape, balance)
+    wins = sum(1 for t in history if float(t.get("pnl") or 0.0) > 0)
+    return {
+        "pnl": summary["equity"] - balance,
+        "realized": summary["realized"],
+        "fees": summary["fees"],
+        "fills": summary["fills"],
+        "trades": len(history),
+        "win_rate": wins / len(history) * 100 if history else 0.0,
+        "max_dd": max_drawdown(curve),
+        "open": summary["open_count"],
+    }
+
+
+def _run_one(args) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Задача процесса пула: данные читаются в каждом процессе заново."""
+    master_path, klines_path, settings, balance, fill_delay_ms = args
+    logging.basicConfig(level=logging.WARNING)
+    snapshots = load_snapshots(master_path)
+    tape = KlineTape(serializer.load_file(klines_path))
+    return settings, asyncio.run(replay(snapshots, tape, settings, balance, fill_delay_ms))
+
+
+def param_grid(base: Dict[str, Any], axes: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Декартово произведение значений параметров поверх базовых settings."""
+    keys = list(axes)
+    return [{**base, **dict(zip(keys, combo))} for combo in itertools.product(*(axes[k] for k in keys))]
+
+
+def sweep(
+    master_path: str,
+    klines_path: str,
+    grid: Iterable[Dict[str, Any]],
+    balance: float = 1000.0,
+    fill_delay_ms: float = 0.0,
+    workers: int = 0,
+) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    jobs = [(master_path, klines_path, settings, balance, fill_delay_ms) for settings in grid]
+    if workers <= 1 or len(jobs) <= 1:
+        return [_run_one(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_one, jobs))
+
+
+def format_table(results: List[Tuple[Dict[str, Any], Dict[str, Any]]], keys: List[str]) -> str:
+    """Сравнительная таблица по наборам параметров (лучший PnL сверху)."""
+    cols = keys + ["pnl", "realized", "fees", "trades", "win_rate", "max_dd", "open"]
+    rows = []
+    for settings, m in sorted(results, key=lambda r: r[1]["pnl"], reverse=True):
+        row = [str(settings.get(k)) for k in keys]
+        row += [f"{m['pnl']:.2f}", f"{m['realized']:.2f}", f"{m['fees']:.2f}", str(m["trades"]),
+                f"{m['win_rate']:.1f}%", f"{m['max_dd']:.2f}", str(m["open"])]
+        rows.append(row)
+    widths = [max(len(c), *(len(r[i]) for r in rows)) if rows else len(c) for i, c in enumerate(cols)]
+    line = lambda cells: "  ".join(c.rjust(w) for c, w in zip(cells, widths))
+    return "\n".join([line(cols), line(["-" * w for w in widths])] + [line(r) for r in rows])
+
+
+# ============================================================
+#  CLI
+# ============================================================
+
+def _parse_value(v: str) -> Any:
+    low = v.strip().lower()
+    if low in ("true", "false"):
+        return low == "true"
+    try:
+        return int(v)
+    except ValueError:
+        try:
+            return float(v)
+        except ValueError:
+            return v
+
+
+async def _fetch_klines(snapshots: List[Snapshot], path: str, env: str):
+    from utils.api_wrappers import BybitAPI
+
+    symbols = sorted({p.symbol for _, ps in snapshots for p in ps})
+    start_ms, end_ms = int(snapshots[0][0] * 1000), int(snapshots[-1][0] * 1000)
+    api = BybitAPI("", "", role="REPLAY", env=env)
+    try:
+        rows = await asyncio.gather(*(api.get_klines(s, start_ms, end_ms) for s in symbols))
+    finally:
+        await api.close()
+    klines = {s: r for s, r in zip(symbols, rows) if r}
+    serializer.dump_file(klines, path, pretty=False)
+    print(f"Свечи: {len(klines)}/{len(symbols)} символов → {path}")
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Replay снимков мастера с перебором settings")
+    ap.add_argument("--master", required=True, help="JSONL(.gz) снимков позиций мастера")
+    ap.add_argument("--klines", required=True, help="JSON свечей {symbol: [[ms, o, h, l, c], ...]}")
+    ap.add_argument("--fetch-klines", action="store_true", help="скачать свечи 1m с Bybit в --klines")
+    ap.add_argument("--env", default="mainnet")
+    ap.add_argument("--state", default="state.json", help="базовые settings берутся из этого файла")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=v1,v2", help="ось перебора")
+    ap.add_argument("--balance", type=float, default=1000.0)
+    ap.add_argument("--fill-delay-ms", type=float, default=0.0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.fetch_klines:
+        asyncio.run(_fetch_klines(load_snapshots(args.master), args.klines, args.env))
+
+    base = {}
+    if os.path.exists(args.state):
+        base = (serializer.load_file(args.state) or {}).get("settings", {})
+    axes: Dict[str, List[Any]] = {}
+    for item in args.set:
+        key, _, values = item.partition("=")
+        axes[key.strip()] = [_parse_value(v) for v in values.split(",") if v.strip()]
+
+    results = sweep(args.master, args.klines, param_grid(base, axes),
+                    args.balance, args.fill_delay_ms, args.workers)
+    print(format_table(results, list(axes)))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@
 import logging
 from decimal import Decimal
 
+from utils.models import Wallet
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,15 +19,15 @@ class RiskManager:
     Проверяет, можно ли открыть сделку и с каким объёмом.
     """
 
-    def __init__(self, cfg: dict, api=None):
+    def __init__(self, cfg: dict, api=None, settings=None):
         """
         cfg — конфигурация (.env)
         api — объект подключения к Bybit API (может быть None)
+        settings — SettingsStore: MAX_RISK_PCT и MAX_LEVERAGE читаются при каждой проверке
         """
         self.cfg = cfg
         self.api = api
-        self.max_leverage = 50           # макс. разрешённое плечо
-        self.max_risk_per_trade = 0.05   # доля риска на сделку (5%)
+        self.settings = settings
         self.min_balance_threshold = 10  # минимум для работы (USDT)
         self.test_mode = self.cfg.get("FOLLOWER_NET", "mainnet") == "testnet"
 
@@ -34,6 +36,22 @@ class RiskManager:
             f"max_risk={self.max_risk_per_trade * 100:.1f}%)"
         )
 
+    def _setting(self, key: str, default):
+        if self.settings is None:
+            return default
+        value = self.settings.get(key)
+        return default if value is None else value
+
+    @property
+    def max_leverage(self) -> int:
+        """Макс. разрешённое плечо."""
+        return int(self._setting("MAX_LEVERAGE", 50))
+
+    @property
+    def max_risk_per_trade(self) -> float:
+        """Доля риска на сделку (MAX_RISK_PCT / 100)."""
+        return float(self._setting("MAX_RISK_PCT", self.cfg.get("MAX_RISK_PCT", 5.0))) / 100
+
     # ================================================================
     # 🔹 Проверка достаточности баланса
     # ================================================================
@@ -98,11 +116,23 @@ class RiskManager:
     # 🔹 Применение параметров риска к сделке
     # ================================================================
 
-    def apply_risk_rules(self, symbol: str, side: str, price: float, balance: float, leverage: float = 10) -> dict:
+    def apply_risk_rules(
+        self,
+        symbol: str,
+        side: str,
+        price: float,
+        balance: "float | Wallet | None",
+        leverage: float = 10,
+    ) -> dict:
         """
         Основная точка входа: применяет риск-правила перед открытием сделки.
+        balance — доступный баланс USDT или модель Wallet подписчика.
         Возвращает dict с рекомендациями.
         """
+        if isinstance(balance, Wallet):
+            balance = balance.available
+        balance = float(balance or 0.0)
+
         if not self.check_balance(balance):
             return {"allowed": False, "reason": "Недостаточно средств"}
 
@@ -134,10 +164,12 @@ class RiskManager:
 
     def update_settings(self, **kwargs):
         """
-        Обновляет параметры риска (в памяти, без сохранения в .env).
+        Обновляет параметры риска (MAX_RISK_PCT=3.5, MAX_LEVERAGE=20, ...)
+        в хранилище настроек: сохраняется в файл состояния и действует
+        со следующей проверки, без перезапуска.
         """
-        for key, value in kwargs.items():
-            if hasattr(self, key):
-                setattr(self, key, value)
-                logger.info(f"⚙️ Обновлено значение параметра {key} = {value}")
+        if self.settings is None:
+            logger.warning("⚠️ RiskManager без хранилища настроек — обновление невозможно.")
+            return
+        self.settings.update(kwargs, source="risk")
         logger.info("✅ Конфигурация риска обновлена (без сохранения в .env)")
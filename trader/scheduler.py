@@ -0,0 +1,135 @@
+"""
+Адаптивный планировщик опроса (REST-режим)
+------------------------------------------
+- после изменения у мастера интервал сжимается до минимального;
+- в тишине интервал растёт экспоненциально до максимального;
+- интервал не опускается ниже, чем позволяет бюджет запросов аккаунта;
+- тики планируются по абсолютным дедлайнам, а дрейф (опоздание тика)
+  измеряется, чтобы время тика + сон не растягивали реальный интервал.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptivePoller:
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        hot_ticks: int = 5,
+        budget_per_min: int = 120,
+    ):
+        self.min_interval = max(0.05, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.backoff = max(1.0, float(backoff))
+        self.hot_ticks = max(0, int(hot_ticks))
+        self.budget_per_min = max(1, int(budget_per_min))
+
+        self.interval = self.min_interval
+        self._hot_left = 0
+        self._requests: deque = deque()     # (monotonic_ts, n) за последние 60 с
+        self._deadline: float | None = None
+
+        # метрики
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self.ticks = 0
+        self.overruns = 0
+
+    @classmethod
+    def from_cfg(cls, cfg: dict) -> "AdaptivePoller":
+        base = float(cfg.get("POLL_INTERVAL_SEC", 5))
+        return cls(
+            min_interval=cfg.get("POLL_MIN_SEC", min(1.0, base)),
+            max_interval=cfg.get("POLL_MAX_SEC", max(30.0, base)),
+            backoff=cfg.get("POLL_BACKOFF", 1.5),
+            hot_ticks=cfg.get("POLL_HOT_TICKS", 5),
+            budget_per_min=cfg.get("POLL_REQUEST_BUDGET_PER_MIN", 120),
+        )
+
+    # ---------------------- бюджет запросов ----------------------
+
+    def _spent_last_minute(self, now: float) -> int:
+        while self._requests and now - self._requests[0][0] > 60.0:
+            self._requests.popleft()
+        return sum(n for _, n in self._requests)
+
+    def _budget_floor(self, per_tick: int, now: float) -> float:
+        """Минимальный интервал, при котором тики укладываются в бюджет."""
+        if per_tick <= 0:
+            return 0.0
+        floor = 60.0 * per_tick / self.budget_per_min
+        if self._spent_last_minute(now) + per_tick > self.budget_per_min and self._requests:
+            # бюджет исчерпан — ждём, пока самая старая запись выйдет из окна
+            floor = max(floor, 60.0 - (now - self._requests[0][0]))
+        return floor
+
+    # ---------------------- цикл ----------------------
+
+    def charge(self, requests: int):
+        """Учитывает запросы вне тиков (фоновые задачи) в общем бюджете."""
+        if requests > 0:
+            self._requests.append((time.monotonic(), requests))
+
+    def on_tick(self, changed: bool, requests: int = 1):
+        """Учитывает результат тика и пересчитывает следующий интервал."""
+        now = time.monotonic()
+        self.ticks += 1
+        if requests:
+            self._requests.append((now, requests))
+
+        if changed:
+            self._hot_left = self.hot_ticks
+            interval = self.min_interval
+        elif self._hot_left > 0:
+            self._hot_left -= 1
+            interval = self.min_interval
+        else:
+            interval = min(self.max_interval, self.interval * self.backoff)
+
+        floor = self._budget_floor(requests, now)
+        if floor > interval:
+            logger.debug(f"⏳ Интервал опроса ограничен бюджетом: {interval:.2f} → {floor:.2f} с")
+        self.interval = max(interval, floor)
+
+    async def sleep(self):
+        """
+        Спит до следующего дедлайна. Дедлайны отсчитываются от предыдущего,
+        поэтому длительность тика не прибавляется к интервалу.
+        """
+        now = time.monotonic()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.interval
+
+        delay = self._deadline - now
+        if delay < 0:
+            # тик длился дольше интервала — фиксируем дрейф и не пытаемся «догонять»
+            self.last_drift = -delay
+            self.max_drift = max(self.max_drift, self.last_drift)
+            self.overruns += 1
+            logger.debug(f"⚠️ Тик опоздал на {self.last_drift * 1000:.0f} мс")
+            self._deadline = now
+            await asyncio.sleep(0)
+            return
+
+        await asyncio.sleep(delay)
+        # опоздание пробуждения относительно дедлайна (загруженность event loop)
+        self.last_drift = max(0.0, time.monotonic() - self._deadline)
+        self.max_drift = max(self.max_drift, self.last_drift)
+
+    def get_stats(self) -> dict:
+        return {
+            "interval": round(self.interval, 3),
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "last_drift_ms": round(self.last_drift * 1000, 1),
+            "max_drift_ms": round(self.max_drift * 1000, 1),
+            "requests_last_min": self._spent_last_minute(time.monotonic()),
+        }
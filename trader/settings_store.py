@@ -0,0 +1,103 @@
+"""
+Хранилище настроек копирования с горячим обновлением
+----------------------------------------------------
+Настройки (SIZE_SCALE, MAX_RISK_PCT, TEST_MODE, ...) лежат в блоке
+settings файла состояния рядом с номером версии settings_version.
+
+Читатели не берут блокировок: current — неизменяемый снимок
+(MappingProxyType), update() собирает новый снимок целиком и подменяет
+ссылку одним присваиванием. Обработчик события видит либо старые
+настройки, либо новые, но никогда их смесь; новое значение действует
+со следующего события мастера — без перезапуска и без повторного
+«игнорирования» уже открытых позиций.
+
+Ключи из RESTART_KEYS сохраняются сразу, но применяются при следующем
+запуске (например, смена сети подписчика требует новых клиентов API).
+"""
+
+import logging
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# ключ → (тип, минимум, максимум); для str вместо границ — допустимые значения
+SCHEMA: Dict[str, tuple] = {
+    "MAX_RISK_PCT": (float, 0.1, 100.0),
+    "MAX_LEVERAGE": (int, 1, 125),
+    "SIZE_SCALE": (float, 0.001, 100.0),
+    "MAX_DCA_PER_TRADE": (int, 0, 100),
+    "EQUITY_DRAWDOWN_PCT": (float, 0.0, 100.0),
+    "AUTO_CLOSE_ON_DRAWDOWN": (bool, None, None),
+    "TEST_MODE": (bool, None, None),
+    "ALERTS": (bool, None, None),
+    "FOLLOWER_ENV": (str, ("mainnet", "testnet", "demo"), None),
+}
+RESTART_KEYS = {"FOLLOWER_ENV", "DRY_RUN"}
+
+
+class SettingsSnapshot(NamedTuple):
+    version: int
+    values: Mapping[str, Any]
+    updated_at: float
+
+
+def coerce(key: str, value: Any) -> Any:
+    """Приводит значение к типу из SCHEMA; ValueError — недопустимое значение."""
+    spec = SCHEMA.get(key)
+    if spec is None or value is None:
+        return value
+    kind, lo, hi = spec
+    if kind is bool:
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on", "вкл")
+        return bool(value)
+    if kind is str:
+        value = str(value).strip().lower()
+        if value not in lo:
+            raise ValueError(f"{key}: допустимо {', '.join(lo)}")
+        return value
+    try:
+        value = kind(str(value).replace(",", ".")) if isinstance(value, str) else kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key}: нужно число") from None
+    if not lo <= value <= hi:
+        raise ValueError(f"{key}: допустимо от {lo} до {hi}")
+    return value
+
+
+class SettingsStore:
+    def __init__(self, stats, defaults: Optional[Dict[str, Any]] = None):
+        """
+        stats — StatsManager (блок settings и версия хранятся в его файле состояния);
+        defaults — значения из .env, которые перекрываются сохранёнными.
+        """
+        self.stats = stats
+        self.defaults = {k: v for k, v in (defaults or {}).items() if v is not None}
+        self.current = self._snapshot(
+            int(stats.state.get("settings_version") or 0),
+            stats.state.get("settings") or {},
+        )
+
+    def _snapshot(self, version: int, overrides: Mapping[str, Any]) -> SettingsSnapshot:
+        return SettingsSnapshot(version, MappingProxyType({**self.defaults, **overrides}), time.time())
+
+    def get(self, key: str, default=None):
+        return self.current.values.get(key, default)
+
+    def update(self, changes: Dict[str, Any], source: str = "") -> SettingsSnapshot:
+        """Проверяет, сохраняет и публикует новый снимок. ValueError — ничего не изменено."""
+        clean = {k: coerce(k, v) for k, v in changes.items()}
+        overrides = {**(self.stats.state.get("settings") or {}), **clean}
+        snap = self._snapshot(self.current.version + 1, overrides)
+        self.stats.save_settings(overrides, snap.version)
+        self.current = snap
+        logger.info(
+            f"⚙️ Настройки v{snap.version}{f' ({source})' if source else ''}: "
+            + ", ".join(f"{k}={v}" for k, v in clean.items())
+        )
+        restart = RESTART_KEYS.intersection(clean)
+        if restart:
+            logger.info(f"♻️ {', '.join(sorted(restart))} применятся после перезапуска.")
+        return snap
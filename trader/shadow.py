@@ -0,0 +1,76 @@
+"""
+Теневой подписчик
+-----------------
+Параллельно с живым подписчиком получает те же события мастера и
+исполняет их через ShadowAPI — со своим файлом состояния и своими
+settings (SIZE_SCALE, риск, проскальзывание и т.д.). Так новые настройки
+проверяются на реальном потоке мастера без ордеров на бирже.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from trader.core import CopyTrader
+from trader.events import MasterEvent
+from trader.master_bridge import NullMasterSource
+from trader.slippage import SlippageGuard
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowTrader:
+    def __init__(self, live: CopyTrader, cfg: dict):
+        self.live = live
+        self.trader = CopyTrader(
+            {
+                **cfg,
+                "STATE_FILE": cfg.get("SHADOW_STATE_FILE") or "state_shadow.json",
+                "DRY_RUN": True,
+                "TEST_MODE": False,   # исполнение и так виртуальное — входы не блокируем
+                "COPY_MODE": "positions",
+                "SLIPPAGE_GUARD": False,
+                "MASTERS": [],
+            },
+            master_source=NullMasterSource(),
+        )
+        if live.market_stream is not None:
+            # стакан общий с живым подписчиком — второе WS-подключение не нужно
+            self.trader.market_stream = live.market_stream
+            self.trader.slippage = SlippageGuard(self.trader.setting)
+            self.trader.follower_api.market = live.market_stream
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        live.event_sinks.append(self.queue.put_nowait)
+
+    async def _run(self):
+        await self.live.ready.wait()
+        self.trader.ignored_symbols = set(self.live.ignored_symbols)
+        logger.info("👻 Теневой подписчик запущен")
+        while True:
+            events: List[MasterEvent] = await self.queue.get()
+            try:
+                await self.trader.apply_events(events)
+            except Exception as e:
+                logger.exception(f"[SHADOW] Ошибка обработки событий: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="shadow-trader")
+
+    def get_summary(self) -> dict:
+        return {
+            **self.trader.follower_api.get_summary(),
+            "pnl": self.trader.stats.pnl_by_windows([1, 7, 30]),
+        }
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.trader.engine.stop()
+        self.trader.market_stream = None   # стаканом владеет живой подписчик
+        await self.trader.close()
@@ -0,0 +1,302 @@
+"""
+Шардирование подписчиков по процессам
+-------------------------------------
+Один event loop упирается в одно ядро: подпись HMAC и JSON для сотен
+подписчиков не помещаются в него вместе с Telegram и опросом мастера.
+
+- Supervisor (главный процесс) опрашивает мастера как обычно и рассылает
+  сырые события дифа воркерам по Unix-сокету (JSON lines).
+- Воркер (отдельный процесс) держит свою долю подписчиков — по CopyTrader
+  на каждого — и применяет к ним полученные события через apply_events().
+- Воркеры периодически присылают метрики и PnL своих подписчиков,
+  супервизор агрегирует их для Telegram.
+
+Воркеры копируют только позиции (COPY_MODE=positions, без SLIPPAGE_GUARD):
+по каналу идут лишь события дифа позиций, ордеров мастера и стакана у них нет.
+
+Воркер проходит ту же подготовку, что и одиночный процесс: проверка ключей,
+прогрев соединений, параметры инструментов. Seed несёт позиции мастера —
+перезапущенный воркер восстанавливает copied_symbols по своим позициям и
+файлу состояния. Воркер, не успевающий читать канал (буфер больше
+MAX_WORKER_BUFFER), отключается и перезапускается с новым seed.
+
+Протокол (одна JSON-строка на сообщение):
+    → воркеру:    {"type": "seed", "ignored": [...], "master": [...]}
+                  {"type": "events", "events": [{"kind": "OpenEvent", ...}, ...]}
+    ← от воркера: {"type": "hello", "shard": 0, "pid": 123}
+                  {"type": "stats", "shard": 0, "followers": {name: {...}}}
+"""
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from trader.events import MasterEvent, decode_event, encode_event
+from trader.master_bridge import NullMasterSource
+from utils import serializer
+
+logger = logging.getLogger(__name__)
+
+PNL_WINDOWS = [1, 7, 30]
+STATS_INTERVAL_SEC = 10.0
+MAX_WORKER_BUFFER = 4 * 1024 * 1024   # байт неотправленных событий на воркера
+
+
+def load_followers(path: str) -> List[dict]:
+    """
+    Список подписчиков для воркеров (JSON):
+    [{"name": "acc1", "api_key": "...", "api_secret": "...", "env": "mainnet"}, ...]
+    """
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        data = serializer.load_file(path)
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать {path}: {e}")
+        return []
+    return [f for f in data if isinstance(f, dict) and f.get("api_key")] if isinstance(data, list) else []
+
+
+def _follower_cfg(cfg: dict, follower: dict) -> dict:
+    name = follower.get("name") or follower["api_key"][:8]
+    return {
+        **cfg,
+        "FOLLOWER_NAME": name,
+        "FOLLOWER_API_KEY": follower["api_key"],
+        "FOLLOWER_API_SECRET": follower.get("api_secret", ""),
+        "FOLLOWER_ENV": (follower.get("env") or cfg.get("FOLLOWER_ENV") or "mainnet").lower(),
+        "STATE_FILE": follower.get("state_file") or f"state_{name}.json",
+        "MASTERS": [],
+        # воркер получает только события позиций: ордера мастера и стакан он не видит
+        "COPY_MODE": "positions",
+        "SLIPPAGE_GUARD": False,
+    }
+
+
+async def _send(writer: asyncio.StreamWriter, msg: dict):
+    writer.write(serializer.dumps(msg) + b"\n")
+    await writer.drain()
+
+
+async def _seed(t, ignored: set, master: set):
+    """Состояние копирования подписчика после (пере)запуска воркера."""
+    held = {p.symbol for p in await t.fetch_follower_positions() if p.size > 0}
+    t.copied_symbols = ((held | set(t.stats.state["open"])) & master) - ignored
+    t.ignored_symbols = set(ignored)
+    if t.copied_symbols:
+        logger.info(f"🔁 {t.cfg.get('FOLLOWER_NAME')}: продолжаю сопровождать {', '.join(sorted(t.copied_symbols))}")
+
+
+# ---------------------- воркер ----------------------
+
+async def _worker(cfg: dict, shard: int, followers: List[dict], path: str):
+    from trader.core import CopyTrader
+
+    traders = {}
+    for f in followers:
+        fcfg = _follower_cfg(cfg, f)
+        traders[fcfg["FOLLOWER_NAME"]] = CopyTrader(fcfg, master_source=NullMasterSource())
+
+    reader, writer = await asyncio.open_unix_connection(path)
+    await _send(writer, {"type": "hello", "shard": shard, "pid": os.getpid()})
+    logger.info(f"🧵 Воркер {shard} (pid={os.getpid()}): подписчиков {len(traders)}")
+    # события, пришедшие за время подготовки, ждут в сокете
+    first = next(iter(traders.values()), None)
+    await asyncio.gather(
+        *(t.prepare(master=False) for t in traders.values()),
+        *([first.master_api.load_instruments()] if first is not None else []),
+    )
+
+    async def report():
+        while True:
+            await asyncio.sleep(STATS_INTERVAL_SEC)
+            payload = {}
+            for name, t in traders.items():
+                engine = t.engine.get_stats()
+                payload[name] = {
+                    **t.stats.get_summary(),
+                    # ключи JSON-объекта — строки (orjson не принимает int)
+                    "pnl": {str(d): v for d, v in t.stats.pnl_by_windows(PNL_WINDOWS).items()},
+                    "copied": len(t.copied_symbols),
+                    "processed": sum(a["processed"] for a in engine.values()),
+                    "failed": sum(a["failed"] for a in engine.values()),
+                    "dropped": t.engine.dropped,
+                }
+            await _send(writer, {"type": "stats", "shard": shard, "followers": payload})
+
+    report_task = asyncio.create_task(report())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                logger.warning(f"🧵 Воркер {shard}: супервизор закрыл канал")
+                break
+            msg = serializer.loads(line)
+            if msg.get("type") == "seed":
+                ignored, master = set(msg.get("ignored") or []), set(msg.get("master") or [])
+                await asyncio.gather(*(_seed(t, ignored, master) for t in traders.values()))
+            elif msg.get("type") == "events":
+                events = [ev for ev in map(decode_event, msg.get("events") or []) if ev is not None]
+                await asyncio.gather(*(t.apply_events(events) for t in traders.values()))
+    finally:
+        report_task.cancel()
+        for t in traders.values():
+            await t.engine.stop()
+            await t.close()
+        writer.close()
+
+
+def worker_main(cfg: dict, shard: int, followers: List[dict], path: str):
+    """Точка входа процесса-воркера."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s [%(levelname)s] [w{shard}] %(message)s",
+    )
+    try:
+        asyncio.run(_worker(cfg, shard, followers, path))
+    except KeyboardInterrupt:
+        pass
+
+
+# ---------------------- супервизор ----------------------
+
+class Supervisor:
+    def __init__(self, cfg: dict, trader, workers: int, followers: List[dict]):
+        self.cfg = cfg
+        self.trader = trader
+        self.path = cfg.get("IPC_SOCKET") or "/tmp/bybit-copy.sock"
+        self.n = max(1, min(int(workers), len(followers) or 1))
+        self.shards = [followers[i::self.n] for i in range(self.n)]
+        if (cfg.get("COPY_MODE") or "positions").lower() == "orders" or cfg.get("SLIPPAGE_GUARD"):
+            logger.warning(
+                "🧵 COPY_MODE=orders и SLIPPAGE_GUARD действуют только для основного подписчика — "
+                "подписчики воркеров копируют позиции рыночными ордерами."
+            )
+
+        self._ctx = mp.get_context("spawn")
+        self._procs: Dict[int, mp.Process] = {}
+        self._writers: Dict[int, asyncio.StreamWriter] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+        self.metrics: Dict[str, dict] = {}      # подписчик -> последние метрики воркера
+        self.shard_seen: Dict[int, float] = {}  # shard -> monotonic последнего сообщения
+        self.events_sent = 0
+
+        trader.event_sinks.append(self.publish)
+
+    # ---- процессы ----
+
+    def _spawn(self, shard: int):
+        p = self._ctx.Process(
+            target=worker_main,
+            args=(self.cfg, shard, self.shards[shard], self.path),
+            name=f"copy-worker-{shard}",
+            daemon=True,
+        )
+        p.start()
+        self._procs[shard] = p
+        logger.info(f"🧵 Запущен воркер {shard} (pid={p.pid}, подписчиков {len(self.shards[shard])})")
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(5)
+            for shard, p in list(self._procs.items()):
+                if not p.is_alive():
+                    logger.error(f"🧵 Воркер {shard} завершился (code={p.exitcode}) — перезапуск")
+                    self._writers.pop(shard, None)
+                    self._spawn(shard)
+
+    # ---- канал ----
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        shard = None
+        try:
+            hello = serializer.loads(await reader.readline())
+            shard = int(hello.get("shard", -1))
+            await self.trader.ready.wait()
+            await _send(writer, {
+                "type": "seed",
+                "ignored": sorted(self.trader.ignored_symbols),
+                "master": sorted(self.trader.differ.state),
+            })
+            self._writers[shard] = writer
+            self.shard_seen[shard] = time.monotonic()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = serializer.loads(line)
+                self.shard_seen[shard] = time.monotonic()
+                if msg.get("type") == "stats":
+                    self.metrics.update(msg.get("followers") or {})
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"🧵 Канал воркера {shard} разорван: {e}")
+        finally:
+            if shard is not None and self._writers.get(shard) is writer:
+                del self._writers[shard]
+            writer.close()
+
+    def publish(self, events: List[MasterEvent]):
+        """Рассылает события дифа всем подключённым воркерам (без ожидания)."""
+        if not self._writers:
+            return
+        line = serializer.dumps({"type": "events", "events": [encode_event(ev) for ev in events]}) + b"\n"
+        for shard, writer in list(self._writers.items()):
+            if writer.transport.get_write_buffer_size() > MAX_WORKER_BUFFER:
+                # воркер завис: отключаем, _watch перезапустит его с новым seed
+                logger.error(f"🧵 Воркер {shard} не читает канал — отключаю")
+                del self._writers[shard]
+                writer.close()
+                self._procs[shard].terminate()
+                continue
+            writer.write(line)
+        self.events_sent += len(events)
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._on_connect, path=self.path)
+        for shard in range(self.n):
+            self._spawn(shard)
+        self._watch_task = asyncio.create_task(self._watch())
+        logger.info(f"🧵 Супервизор: {self.n} воркеров, канал {self.path}")
+
+    async def close(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+        if self._server:
+            self._server.close()
+        for writer in self._writers.values():
+            writer.close()
+        for p in self._procs.values():
+            p.terminate()
+        for p in self._procs.values():
+            await asyncio.to_thread(p.join, 5)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    # ---- агрегаты ----
+
+    def get_stats(self) -> Dict[str, Any]:
+        pnl: Dict[int, float] = {d: 0.0 for d in PNL_WINDOWS}
+        for m in self.metrics.values():
+            for d, v in (m.get("pnl") or {}).items():
+                pnl[int(d)] = pnl.get(int(d), 0.0) + float(v or 0.0)
+        now = time.monotonic()
+        return {
+            "workers": self.n,
+            "alive": sum(1 for p in self._procs.values() if p.is_alive()),
+            "connected": len(self._writers),
+            "followers": sum(len(s) for s in self.shards),
+            "reporting": len(self.metrics),
+            "open_count": sum(int(m.get("open_count") or 0) for m in self.metrics.values()),
+            "failed": sum(int(m.get("failed") or 0) for m in self.metrics.values()),
+            "dropped": sum(int(m.get("dropped") or 0) for m in self.metrics.values()),
+            "events_sent": self.events_sent,
+            "max_silence_sec": round(max((now - t for t in self.shard_seen.values()), default=0.0), 1),
+            "pnl": pnl,
+        }
@@ -0,0 +1,69 @@
+"""
+Защита от проскальзывания при входе
+-----------------------------------
+Перед копированием оценивает по локальному стакану стоимость рыночного
+исполнения относительно цены входа мастера и выбирает действие:
+
+- market — проскальзывание в пределах MAX_SLIPPAGE_PCT, обычный Market IOC;
+- cap    — уменьшить объём до того, что помещается в допустимую цену;
+- limit  — агрессивный Limit IOC по предельной цене (биржа исполнит, сколько сможет);
+- skip   — в пределах цены доступно меньше MIN_FILL_RATIO от объёма, не входим.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from utils.helpers import round_qty
+from utils.orderbook import L2Book
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class SlippageDecision:
+    action: str                 # market | cap | limit | skip
+    qty: float
+    price: Optional[float]      # цена для Limit IOC (только для limit)
+    ref_price: float
+    est_price: float            # ожидаемая средняя цена рыночного исполнения
+    est_slippage_pct: float     # > 0 — в худшую для нас сторону
+    reason: str = ""
+
+
+class SlippageGuard:
+    def __init__(self, setting: Callable[[str, Any], Any]):
+        self.setting = setting
+
+    def decide(self, book: Optional[L2Book], symbol: str, side: str, qty: float, ref_price: float) -> SlippageDecision:
+        max_pct = float(self.setting("MAX_SLIPPAGE_PCT", 0.5) or 0.5)
+        min_fill = float(self.setting("MIN_FILL_RATIO", 0.3) or 0.3)
+        mode = (self.setting("SLIPPAGE_MODE", "limit") or "limit").lower()
+
+        if book is None:
+            return SlippageDecision("market", qty, None, ref_price, 0.0, 0.0, "нет стакана")
+
+        is_buy = side.lower() in ("buy", "long")
+        ref = ref_price or book.mid()
+        if ref <= 0:
+            return SlippageDecision("market", qty, None, ref_price, 0.0, 0.0, "нет опорной цены")
+
+        book_side = book.side_for(side)
+        avg, filled, _ = book_side.sweep(qty)
+        adverse = 1.0 if is_buy else -1.0
+        slip = (avg - ref) / ref * 100 * adverse if filled > 0 else float("inf")
+
+        if filled >= qty and slip <= max_pct:
+            return SlippageDecision("market", qty, None, ref, avg, slip)
+
+        limit_price = ref * (1 + adverse * max_pct / 100)
+        fillable = round_qty(symbol, min(qty, book_side.depth_until(limit_price)))
+        if fillable < qty * min_fill:
+            return SlippageDecision(
+                "skip", 0.0, None, ref, avg, slip,
+                f"в пределах {max_pct}% доступно {fillable} из {qty}",
+            )
+        if mode == "cap":
+            return SlippageDecision("cap", fillable, None, ref, avg, slip)
+        # цену берём с уровня стакана — она гарантированно кратна tickSize
+        return SlippageDecision("limit", qty, book_side.worst_within(limit_price), ref, avg, slip)
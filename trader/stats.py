@@ -1,8 +1,10 @@
-import json
 import logging
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from utils import serializer
+from utils.models import Position
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +16,14 @@ class StatsManager:
             "open": {},             # symbol -> инфо открытой: {symbol, side, qty, entry_price, opened_at, leverage, averages}
             "updated_at": None,
         }
+        self.on_close_trade: Optional[Callable[[], None]] = None   # например, экспорт в Google Sheets
         self._load()
         logger.info(f"📊 Инициализация StatsManager (файл: {self.state_file})")
 
     def _load(self):
         try:
             if os.path.exists(self.state_file):
-                with open(self.state_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = serializer.load_file(self.state_file)
                 if isinstance(data, dict):
                     data.setdefault("history", [])
                     data.setdefault("open", {})
@@ -34,14 +36,22 @@ class StatsManager:
     def _save(self):
         try:
             self.state["updated_at"] = datetime.utcnow().isoformat()
-            with open(self.state_file, "w", encoding="utf-8") as f:
-                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            serializer.dump_file(self.state, self.state_file)
         except Exception as e:
             logger.warning(f"Не удалось сохранить {self.state_file}: {e}")
 
+    def save_settings(self, settings: Dict[str, Any], version: int):
+        """Блок settings заменяется новым словарём (старый могут держать читатели)."""
+        self.state["settings"] = settings
+        self.state["settings_version"] = version
+        self._save()
+
     # ----- записи о сделках -----
 
-    def record_open_trade(self, symbol: str, side: str, qty: float, price: float, leverage: int):
+    def record_open_trade(
+        self, symbol: str, side: str, qty: float, price: float, leverage: int,
+        masters: Optional[Dict[str, float]] = None,
+    ):
         self.state["open"][symbol] = {
             "symbol": symbol,
             "side": side,
@@ -51,6 +61,22 @@ class StatsManager:
             "opened_at": datetime.utcnow().isoformat(),
             "averages": 0,
         }
+        if masters:
+            self.state["open"][symbol]["masters"] = masters
+        self._save()
+
+    def record_adjust_trade(
+        self, symbol: str, delta_qty: float, averaged: bool = False,
+        masters: Optional[Dict[str, float]] = None,
+    ):
+        info = self.state["open"].get(symbol)
+        if not info:
+            return
+        info["qty"] = max(0.0, float(info.get("qty") or 0.0) + delta_qty)
+        if averaged:
+            info["averages"] = int(info.get("averages") or 0) + 1
+        if masters:
+            info["masters"] = masters
         self._save()
 
     def record_close_trade(self, symbol: str, price: float, pnl: float):
@@ -59,6 +85,10 @@ class StatsManager:
             return
         info["exit_price"] = price
         info["pnl"] = pnl
+        masters = info.get("masters")
+        if masters:
+            # PnL делится между мастерами пропорционально их долям в нетто-позиции
+            info["pnl_by_master"] = {name: round(pnl * share, 8) for name, share in masters.items()}
         info["closed_at"] = datetime.utcnow().isoformat()
 
         try:
@@ -70,9 +100,38 @@ class StatsManager:
 
         self.state["history"].append(info)
         self._save()
+        if self.on_close_trade is not None:
+            self.on_close_trade()
+
+    def update_from_positions(self, follower_positions: List[Position]):
+        """Обновляет плавающий PnL и цену маркировки открытых сделок."""
+        open_trades = self.state["open"]
+        for p in follower_positions:
+            info = open_trades.get(p.symbol)
+            if info is not None:
+                info["mark_price"] = p.mark_price
+                info["upnl"] = p.unrealised_pnl
+        self._save()
 
-    def update_from_positions(self, follower_positions: List[Dict[str, Any]]):
-        # можно расширить обновлением плавающего PnL и т.п.
+    def record_slippage(self, symbol: str, side: str, decision) -> None:
+        """Решение защиты от проскальзывания (хранятся последние 500)."""
+        log = self.state.setdefault("slippage", [])
+        log.append({
+            "symbol": symbol,
+            "side": side,
+            "action": decision.action,
+            "qty": decision.qty,
+            "price": decision.price,
+            "ref_price": decision.ref_price,
+            "est_price": decision.est_price,
+            "est_slippage_pct": round(decision.est_slippage_pct, 4)
+            if decision.est_slippage_pct != float("inf") else None,
+            "reason": decision.reason,
+            "at": datetime.utcnow().isoformat(),
+        })
+        del log[:-500]
+        counters = self.state.setdefault("slippage_counters", {})
+        counters[decision.action] = int(counters.get(decision.action, 0)) + 1
         self._save()
 
     # ----- агрегаты -----
@@ -102,6 +161,71 @@ class StatsManager:
                     pass
         return float(total)
 
+    def pnl_by_master(self, days: int) -> Dict[str, float]:
+        """PnL закрытых сделок за N дней с разбивкой по мастерам."""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        res: Dict[str, float] = {}
+        for t in self.state.get("history", []):
+            try:
+                if datetime.fromisoformat(str(t.get("closed_at"))) < cutoff:
+                    continue
+            except Exception:
+                continue
+            for name, pnl in (t.get("pnl_by_master") or {}).items():
+                res[name] = res.get(name, 0.0) + float(pnl)
+        return res
+
+    async def sync_exchange_pnl(self, api, days: int = 90) -> bool:
+        """
+        Подтягивает закрытый PnL с биржи (BybitAPI.iter_closed_pnl) в дневные
+        суммы state["exchange_pnl"]. Страницы обрабатываются по мере загрузки,
+        поэтому память не зависит от длины истории. Следующий вызов
+        продолжает с отметки synced_ms; при ошибке ничего не применяется.
+        """
+        book = self.state.setdefault("exchange_pnl", {"synced_ms": 0, "daily": {}})
+        end_ms = int(datetime.utcnow().timestamp() * 1000)
+        start_ms = max(int(book.get("synced_ms") or 0) + 1, end_ms - days * 86_400_000)
+        daily: Dict[str, float] = {}
+        rows = 0
+        async for page in api.iter_closed_pnl(start_ms, end_ms):
+            if page is None:
+                logger.warning("⚠️ Не удалось загрузить закрытый PnL с биржи — синхронизация отложена.")
+                return False
+            for row in page:
+                day = datetime.utcfromtimestamp(row.updated_time / 1000).date().isoformat()
+                daily[day] = daily.get(day, 0.0) + row.closed_pnl
+            rows += len(page)
+
+        merged = book.setdefault("daily", {})
+        for day, pnl in daily.items():
+            merged[day] = round(merged.get(day, 0.0) + pnl, 8)
+        book["synced_ms"] = end_ms
+        self._save()
+        logger.info(f"📥 Закрытый PnL с биржи: {rows} записей, {len(daily)} дн.")
+        return True
+
+    def exchange_pnl_last_days(self, days: int) -> float:
+        """Закрытый PnL по данным биржи за последние N дней (UTC)."""
+        cutoff = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+        daily = (self.state.get("exchange_pnl") or {}).get("daily") or {}
+        return float(sum(v for d, v in daily.items() if d > cutoff))
+
+    def chart_rows(self, days: int) -> Tuple[int, List[Tuple[str, str, float]]]:
+        """
+        (id последней сделки, [(closed_at, symbol, pnl), ...]) за N дней — вход
+        для графиков. id сделки — её номер в history, поэтому он меняется
+        только с новой закрытой сделкой.
+        """
+        history = self.state.get("history", [])
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        rows = [
+            (str(t["closed_at"]), str(t.get("symbol")), float(t.get("pnl") or 0.0))
+            for t in history
+            if t.get("closed_at") and str(t["closed_at"]) >= cutoff
+        ]
+        rows.sort()
+        return len(history), rows
+
     def pnl_by_windows(self, windows: List[int]) -> Dict[int, float]:
         res: Dict[int, float] = {}
         for d in windows:
@@ -4,33 +4,88 @@ Bybit Unified v5 (demo/testnet/mainnet) — асинхронная обёртк
 Домены:
 - demo:    https://api-demo.bybit.com
 - testnet: https://api-testnet.bybit.com
-- mainnet: https://api.bybit.com
+- mainnet: https://api.bybit.com, запасной https://api.bytick.com
+
+GET (чтение) хеджируется: если ответ не пришёл за p95 задержки хоста,
+тот же запрос уходит на запасной домен (или по второму соединению),
+побеждает первый ответ. POST при сетевой ошибке повторяется на другом
+хосте; /v5/order/create всегда несёт orderLinkId, и ответ «дубликат
+orderLinkId» означает, что первая попытка уже принята. Здоровье хостов
+и circuit breaker — utils/endpoints.py.
 
 Работаем с UNIFIED + линейные перпетуалы (USDT).
 Подпись v5: HMAC_SHA256(secret, ts + apiKey + recvWindow + queryString + body)
-timestamp берём с /v5/market/time (timeNano -> ms).
+timestamp — локальные часы + смещение относительно /v5/market/time (timeNano -> ms),
+смещение измеряется при старте и обновляется в фоне раз в CLOCK_RESYNC_SEC.
 
 POST: category="linear" кладём в BODY (не в query), чтобы строка подписи совпадала с Bybit.
 """
 
 import aiohttp
-import hashlib
-import hmac
-import json
+import asyncio
 import logging
 import math
-from typing import Any, Dict, Optional, List
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+
+from utils import recorder, serializer
+from utils.helpers import set_qty_steps
+from utils.endpoints import EndpointPool
+from utils.models import (
+    ClosedPnl,
+    Execution,
+    Order,
+    Position,
+    Wallet,
+    parse_closed_pnls,
+    parse_executions,
+    parse_orders,
+    parse_positions,
+    parse_wallet,
+)
+from utils.signer import Signer, query_string
+from utils.wire import (
+    ClosedPnlListResponse,
+    ExecutionListResponse,
+    OrderListResponse,
+    PositionListResponse,
+    ServerTimeResponse,
+    TickerListResponse,
+    WalletResponse,
+    get_field,
+)
 
 logger = logging.getLogger(__name__)
 
+# query string эндпоинтов с постоянными параметрами — собираются один раз
+_Q_WALLET = query_string({"accountType": "UNIFIED"})
+_Q_POSITIONS = query_string({"category": "linear", "accountType": "UNIFIED", "settleCoin": "USDT", "limit": 200})
+_Q_ORDERS = query_string({"category": "linear", "settleCoin": "USDT", "openOnly": 0, "limit": 50})
+_Q_INSTRUMENTS = query_string({"category": "linear", "limit": 1000})
+
+# retCode «плечо не изменилось» — плечо уже такое, как нужно
+_RET_LEVERAGE_NOT_MODIFIED = "110043"
+CLOCK_RESYNC_SEC = 300.0
+
+# POST на один хост: заметно меньше recv_window, чтобы повтор на другом хосте успел
+POST_ATTEMPT_TIMEOUT_SEC = 5.0
+
+# retCode «orderLinkId уже существует» — повтор после сбоя сети, первая попытка принята
+_RET_DUPLICATE_LINK_ID = "110072"
+
+# история: Bybit ограничивает диапазон startTime..endTime семью днями
+HISTORY_WINDOW_MS = 7 * 24 * 3600 * 1000
 
-def _base_url(env: str) -> str:
-    env = (env or "mainnet").lower()
-    if env == "demo":
-        return "https://api-demo.bybit.com"
-    if env == "testnet":
-        return "https://api-testnet.bybit.com"
-    return "https://api.bybit.com"
+
+def new_link_id() -> str:
+    """Уникальный orderLinkId (до 36 символов) для ордеров без собственного id."""
+    return f"cb-{uuid.uuid4().hex[:24]}"
+
+
+def _ok(data: Any) -> bool:
+    """retCode == 0 для dict-ответа или типизированной структуры."""
+    return data is not None and str(get_field(data, "retCode")) == "0"
 
 
 class BybitAPI:
@@ -46,10 +101,20 @@ class BybitAPI:
         self.api_key = api_key or ""
         self.api_secret = api_secret or ""
         self.env = (env or ("testnet" if is_testnet else "mainnet")).lower()
-        self.base = _base_url(self.env)
+        self.endpoints = EndpointPool(self.env)
+        self.base = self.endpoints.primary
+        self.hedged = 0       # GET, продублированных на запасной хост
+        self.failovers = 0    # POST, повторённых на другом хосте
+
+        self._clock_offset_ms: Optional[float] = None   # серверное время − локальное
+        self._clock_synced_at = 0.0
+        self._clock_lock = asyncio.Lock()
+        self._leverage: Dict[str, int] = {}   # symbol -> текущее плечо на бирже
 
         self._session: Optional[aiohttp.ClientSession] = None
         self._recv_window = "20000"
+        self.request_count = 0   # счётчик HTTP-запросов (для бюджета опроса)
+        self._signer = Signer(self.api_key, self.api_secret, self._recv_window)
 
         logger.info(f"🔗 [{self.role}] Bybit v5 Unified init: env={self.env} base={self.base}")
 
@@ -60,76 +125,205 @@ class BybitAPI:
             timeout = aiohttp.ClientTimeout(total=30)
             self._session = aiohttp.ClientSession(timeout=timeout)
 
-    async def _get_server_ts_ms(self) -> str:
-        await self._ensure_session()
-        url = f"{self.base}/v5/market/time"
-        async with self._session.get(url) as r:
-            j = await r.json()
-        ts_ms = int(math.floor(int(j["result"]["timeNano"]) / 1e6))
-        return str(ts_ms)
+    async def _send(
+        self, host: str, method: str, path_q: str, headers: Optional[dict], body_raw: bytes,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+    ):
+        """Один HTTP-вызов на host: (status, raw). Учитывается в здоровье хоста."""
+        self.request_count += 1
+        started = time.monotonic()
+        try:
+            async with self._session.request(
+                method, f"{host}{path_q}", headers=headers, data=body_raw or None, timeout=timeout,
+            ) as r:
+                raw = await r.read()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.endpoints.record(host, time.monotonic() - started, ok=False)
+            raise
+        self.endpoints.record(host, time.monotonic() - started, ok=r.status < 500)
+        return r.status, raw
 
-    def _sign(self, ts: str, query: str, body: str = "") -> str:
-        pre_sign = ts + self.api_key + self._recv_window + (query or "") + (body or "")
-        return hmac.new(self.api_secret.encode(), pre_sign.encode(), hashlib.sha256).hexdigest()
+    async def _hedged(self, path_q: str, headers: Optional[dict]):
+        """
+        GET с хеджированием: второй запрос — через hedge_delay или сразу после
+        ошибки первого; результат — первый ответ без ошибки сервера.
+        """
+        hosts = self.endpoints.order()
+        alt = hosts[1] if len(hosts) > 1 else hosts[0]   # один домен — второе соединение
+        first = asyncio.create_task(self._send(hosts[0], "GET", path_q, headers, b""))
+        pending = {first}
+        hedge_at = self.endpoints.hedge_delay(hosts[0])
+        last_exc: Optional[BaseException] = None
+        last = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_at, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        last_exc = task.exception()
+                        continue
+                    last = task.result()
+                    if last[0] < 500:
+                        if task is not first and not first.done() and alt != hosts[0]:
+                            # основной хост проиграл запасному — для предохранителя это срыв
+                            self.endpoints.record(hosts[0], 0.0, ok=False)
+                        return last
+                if hedge_at is not None:
+                    # таймаут или ошибка первого — дублируем один раз
+                    hedge_at = None
+                    self.hedged += 1
+                    pending.add(asyncio.create_task(self._send(alt, "GET", path_q, headers, b"")))
+        finally:
+            for task in pending:
+                task.cancel()
+        if last is not None:
+            return last
+        raise last_exc
+
+    async def _failover(self, path_q: str, headers: dict, body_raw: bytes, sign):
+        """
+        POST: при сетевой ошибке — повтор на следующем хосте. (status, raw, повтор?)
+        Повтор подписывается заново (sign()): после таймаута прежняя метка
+        времени могла выйти за recv_window.
+        """
+        hosts = self.endpoints.order()
+        timeout = aiohttp.ClientTimeout(total=POST_ATTEMPT_TIMEOUT_SEC)
+        for i, host in enumerate(hosts):
+            try:
+                if i > 0:
+                    headers = await sign()
+                status, raw = await self._send(host, "POST", path_q, headers, body_raw, timeout=timeout)
+                return status, raw, i > 0
+            except Exception as e:
+                if i == len(hosts) - 1:
+                    raise
+                self.failovers += 1
+                logger.warning(f"[{self.role}] {host}: {e} — повтор на {hosts[i + 1]}")
+
+    async def sync_clock(self, force: bool = False):
+        """Смещение часов относительно сервера (по середине времени запроса)."""
+        async with self._clock_lock:
+            fresh = time.monotonic() - self._clock_synced_at < CLOCK_RESYNC_SEC
+            if not force and self._clock_offset_ms is not None and fresh:
+                return
+            await self._ensure_session()
+            sent = time.time()
+            _, raw = await self._hedged("/v5/market/time", None)
+            received = time.time()
+            j = serializer.decode(raw, ServerTimeResponse)
+            server_ms = int(get_field(get_field(j, "result"), "timeNano")) / 1e6
+            self._clock_offset_ms = server_ms - (sent + received) / 2 * 1000
+            self._clock_synced_at = time.monotonic()
+
+    async def _timestamp(self) -> str:
+        if self._clock_offset_ms is None:
+            await self.sync_clock()
+        elif time.monotonic() - self._clock_synced_at >= CLOCK_RESYNC_SEC and not self._clock_lock.locked():
+            # устаревшее смещение обновляется в фоне, запрос его не ждёт
+            asyncio.create_task(self.sync_clock())
+        return str(int(math.floor(time.time() * 1000 + self._clock_offset_ms)))
+
+    async def _preconnect(self, host: str):
+        """TCP+TLS к хосту заранее: первое реальное обращение не платит за рукопожатие."""
+        try:
+            await self._send(host, "GET", "/v5/market/time", None, b"")
+        except Exception as e:
+            logger.warning(f"[{self.role}] Предварительное подключение к {host} не удалось: {e}")
+
+    async def warm_up(self, positions: bool = False):
+        """
+        Прогрев перед копированием (всё параллельно): смещение часов,
+        соединения со всеми хостами, при positions — кэш плеч из позиций.
+        """
+        await self._ensure_session()
+        tasks = [self.sync_clock()] + [self._preconnect(h) for h in self.endpoints.hosts[1:]]
+        if positions:
+            tasks.append(self.get_open_positions())
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     async def _request(
         self,
         method: str,
         path: str,
-        params: Dict[str, Any] | None = None,
-        body: Dict[str, Any] | None = None
+        params: Dict[str, Any] | str | None = None,
+        body: Dict[str, Any] | bytes | None = None,
+        schema: type | None = None,
     ):
+        """
+        Подписанный запрос. Без schema возвращает dict, со schema —
+        типизированную структуру из utils/wire.py (декодируется прямо из bytes).
+        params — dict или готовая query string; body — dict или уже сериализованные bytes.
+        """
         await self._ensure_session()
-        params = params or {}
-        body = body or {}
-
-        # query string (детерминированный порядок)
-        query = "&".join([f"{k}={v}" for k, v in sorted(params.items())]) if params else ""
-        body_str = json.dumps(body, separators=(",", ":")) if body else ""
-
-        ts = await self._get_server_ts_ms()
-        sign = self._sign(ts, query, body_str)
-
-        headers = {
-            "X-BAPI-API-KEY": self.api_key,
-            "X-BAPI-SIGN": sign,
-            "X-BAPI-TIMESTAMP": ts,
-            "X-BAPI-RECV-WINDOW": self._recv_window,
-            "Content-Type": "application/json",
-        }
+        method = method.upper()
+
+        if path == "/v5/order/create" and isinstance(body, dict) and not body.get("orderLinkId"):
+            # orderLinkId нужен для безопасного повтора на другом хосте
+            body = {**body, "orderLinkId": new_link_id()}
+        query = params if isinstance(params, str) else query_string(params or {})
+        body_raw = body if isinstance(body, bytes) else (serializer.dumps(body) if body else b"")
 
-        url = f"{self.base}{path}"
-        if query:
-            url = f"{url}?{query}"
+        async def sign() -> dict:
+            return self._signer.headers(await self._timestamp(), body_raw or query.encode())
+
+        try:
+            headers = await sign()
+        except Exception as e:
+            logger.warning(f"[{self.role}] HTTP error (server time): {e}")
+            return None
+        path_q = f"{path}?{query}" if query else path
 
+        req_id = f"{self.role}-{self.request_count + 1}"
+        if recorder.ACTIVE:
+            recorder.record("req", {"id": req_id, "role": self.role, "method": method,
+                                    "path": path, "params": params, "body": body})
+        retried = False
         try:
-            async with self._session.request(method.upper(), url, headers=headers, data=body_str if body else None) as r:
-                text = await r.text()
-                try:
-                    data = json.loads(text)
-                except json.JSONDecodeError:
-                    logger.warning(f"[{self.role}] Non-JSON response {r.status}: {text[:200]}")
-                    r.raise_for_status()
-                    return None
-                if r.status != 200 or str(data.get("retCode")) != "0":
-                    logger.warning(f"[{self.role}] Bybit v5 error: HTTP={r.status} resp={text[:400]}")
-                return data
+            if method == "GET":
+                status, raw = await self._hedged(path_q, headers)
+            else:
+                status, raw, retried = await self._failover(path_q, headers, body_raw, sign)
         except Exception as e:
             logger.warning(f"[{self.role}] HTTP error: {e}")
+            if recorder.ACTIVE:
+                recorder.record("resp", {"id": req_id, "path": path, "status": 0, "error": str(e)})
             return None
 
+        if recorder.ACTIVE:
+            recorder.record("resp", {"id": req_id, "path": path, "status": status, "raw": raw})
+        try:
+            data = serializer.decode(raw, schema) if schema else serializer.loads(raw)
+        except ValueError:
+            logger.warning(f"[{self.role}] Non-JSON response {status}: {raw[:200].decode(errors='replace')}")
+            return None
+        if retried and isinstance(data, dict) and str(data.get("retCode")) == _RET_DUPLICATE_LINK_ID:
+            logger.info(f"[{self.role}] {path}: ордер уже принят первой попыткой (orderLinkId)")
+            data["retCode"] = 0
+            return data
+        if status != 200 or not _ok(data):
+            logger.warning(
+                f"[{self.role}] Bybit v5 error: HTTP={status} resp={raw[:400].decode(errors='replace')}"
+            )
+        return data
+
     # ---------------------- публичные методы ----------------------
 
     async def check_auth(self) -> bool:
         data = await self._request(
             "GET",
             "/v5/account/wallet-balance",
-            params={"accountType": "UNIFIED"},
+            params=_Q_WALLET,
+            schema=WalletResponse,
         )
-        ok = bool(data and str(data.get("retCode")) == "0")
+        ok = _ok(data)
         if ok:
             try:
-                total = data["result"]["list"][0]["totalEquity"]
+                account = get_field(get_field(data, "result"), "list")[0]
+                total = get_field(account, "totalEquity")
                 logger.info(f"[{self.role}] ✅ Auth OK — totalEquity={total}")
             except Exception:
                 logger.info(f"[{self.role}] ✅ Auth OK")
@@ -137,112 +331,269 @@ class BybitAPI:
             logger.warning(f"[{self.role}] ❌ Auth failed")
         return ok
 
-    async def get_balance(self) -> float:
+    async def get_wallet(self) -> Optional[Wallet]:
         data = await self._request(
             "GET",
             "/v5/account/wallet-balance",
-            params={"accountType": "UNIFIED"},
+            params=_Q_WALLET,
+            schema=WalletResponse,
         )
-        if not data or str(data.get("retCode")) != "0":
-            return 0.0
-        try:
-            coins = data["result"]["list"][0]["coin"]
-            for c in coins:
-                if c.get("coin") == "USDT":
-                    return float(c.get("availableToWithdraw") or c.get("walletBalance") or 0.0)
-        except Exception:
-            pass
-        return 0.0
+        accounts = get_field(get_field(data, "result"), "list") if _ok(data) else None
+        if not accounts:
+            return None
+        return parse_wallet(accounts[0])
 
-    async def get_open_positions(self) -> List[Dict[str, Any]]:
-        """Короткая форма (для логики копирования)."""
-        data = await self._request(
-            "GET",
-            "/v5/position/list",
-            params={"category": "linear", "accountType": "UNIFIED", "settleCoin": "USDT"},
-        )
-        result: List[Dict[str, Any]] = []
-        if not data or str(data.get("retCode")) != "0":
-            return result
+    async def get_balance(self) -> float:
+        wallet = await self.get_wallet()
+        return wallet.available if wallet else 0.0
 
-        for item in (data.get("result", {}).get("list") or []):
-            try:
-                size = float(item.get("size") or 0.0)
-            except Exception:
-                size = 0.0
-            if size <= 0:
-                continue
-            result.append({
-                "symbol": (item.get("symbol") or "").upper(),
-                "side": (item.get("side") or "").lower(),
-                "contracts": size,
-                "entryPrice": float(item.get("avgPrice") or 0.0),
-                "leverage": int(float(item.get("leverage") or 10)),
-            })
-        return result
-
-    async def get_open_positions_detailed(self) -> List[Dict[str, Any]]:
+    async def _iter_pages(
+        self,
+        path: str,
+        query: str,
+        schema: type | None = None,
+    ) -> AsyncIterator[Optional[List[Any]]]:
         """
-        Детальная форма для статистики:
-        symbol, side, size, entryPrice, markPrice, positionValue, unrealisedPnl, leverage
+        Курсорная пагинация v5 (nextPageCursor).
+        Следующая страница запрашивается сразу, как только известен курсор,
+        и грузится параллельно с обработкой текущей.
+        При ошибке запроса отдаёт None и останавливается.
         """
-        data = await self._request(
-            "GET",
-            "/v5/position/list",
-            params={"category": "linear", "accountType": "UNIFIED", "settleCoin": "USDT"},
-        )
-        detailed: List[Dict[str, Any]] = []
-        if not data or str(data.get("retCode")) != "0":
-            return detailed
+        task = asyncio.create_task(self._request("GET", path, params=query, schema=schema))
+        try:
+            while task is not None:
+                data = await task
+                task = None
+                if not _ok(data):
+                    yield None
+                    return
+                result = get_field(data, "result")
+                cursor = get_field(result, "nextPageCursor")
+                if cursor:
+                    task = asyncio.create_task(
+                        self._request("GET", path, params=f"{query}&cursor={cursor}", schema=schema)
+                    )
+                yield get_field(result, "list") or []
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def _fetch_all(
+        self,
+        path: str,
+        query: str,
+        schema: type | None = None,
+    ) -> Optional[List[Any]]:
+        """Все страницы списком; None — если хотя бы одна страница не получена."""
+        items: List[Any] = []
+        async for page in self._iter_pages(path, query, schema):
+            if page is None:
+                return None
+            items.extend(page)
+        return items
+
+    async def _iter_history(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        start_ms: int,
+        end_ms: Optional[int],
+        schema: type,
+    ) -> AsyncIterator[Optional[List[Any]]]:
+        """
+        Страницы истории за произвольный период.
+        Диапазон режется на окна по 7 дней (лимит Bybit), окна идут от новых
+        к старым — как и строки внутри окна, поэтому весь поток упорядочен
+        по убыванию времени. Внутри окна — _iter_pages с предзагрузкой
+        следующей страницы. В памяти одновременно не больше двух страниц.
+        При ошибке отдаёт None и останавливается.
+        """
+        end = int(end_ms if end_ms is not None else time.time() * 1000)
+        while end >= start_ms:
+            start = max(start_ms, end - HISTORY_WINDOW_MS + 1)
+            query = query_string({**params, "startTime": start, "endTime": end})
+            async for page in self._iter_pages(path, query, schema):
+                yield page
+                if page is None:
+                    return
+            end = start - 1
+
+    def _history_params(self, limit: int, symbol: Optional[str]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"category": "linear", "limit": limit}
+        if symbol:
+            params["symbol"] = symbol.upper()
+        return params
+
+    async def iter_order_history(
+        self, start_ms: int, end_ms: Optional[int] = None, symbol: Optional[str] = None
+    ) -> AsyncIterator[Optional[List[Order]]]:
+        """История ордеров (/v5/order/history) постранично, от новых к старым. None — ошибка."""
+        async for page in self._iter_history(
+            "/v5/order/history", self._history_params(50, symbol), start_ms, end_ms, OrderListResponse
+        ):
+            yield None if page is None else parse_orders(page)
+
+    async def iter_executions(
+        self, start_ms: int, end_ms: Optional[int] = None, symbol: Optional[str] = None
+    ) -> AsyncIterator[Optional[List[Execution]]]:
+        """Исполнения (/v5/execution/list) постранично, от новых к старым. None — ошибка."""
+        async for page in self._iter_history(
+            "/v5/execution/list", self._history_params(100, symbol), start_ms, end_ms, ExecutionListResponse
+        ):
+            yield None if page is None else parse_executions(page)
+
+    async def iter_closed_pnl(
+        self, start_ms: int, end_ms: Optional[int] = None, symbol: Optional[str] = None
+    ) -> AsyncIterator[Optional[List[ClosedPnl]]]:
+        """Закрытый PnL (/v5/position/closed-pnl) постранично, от новых к старым. None — ошибка."""
+        async for page in self._iter_history(
+            "/v5/position/closed-pnl", self._history_params(100, symbol), start_ms, end_ms, ClosedPnlListResponse
+        ):
+            yield None if page is None else parse_closed_pnls(page)
+
+    async def _position_rows(self, path: str = "/v5/position/list") -> Optional[List[Any]]:
+        return await self._fetch_all(path, _Q_POSITIONS, schema=PositionListResponse)
+
+    async def get_open_positions(self) -> Optional[List[Position]]:
+        """Открытые позиции (все страницы). None — запрос не удался."""
+        rows = await self._position_rows()
+        if rows is None:
+            return None
+        positions = parse_positions(rows)
+        for p in positions:
+            self._leverage[p.symbol] = p.leverage
+        return positions
+
+    async def get_copy_master_positions(self) -> Optional[List[Position]]:
+        """Позиции мастера копитрейдинга Bybit (MASTER_MODE=copy)."""
+        rows = await self._position_rows("/v5/copytrading/master/positions")
+        if rows is None:
+            return None
+        return parse_positions(rows)
+
+    async def get_open_positions_detailed(self) -> List[Position]:
+        """
+        Для статистики. Модель Position уже содержит markPrice,
+        positionValue и unrealisedPnl — метод оставлен для совместимости.
+        """
+        return await self.get_open_positions() or []
 
-        for it in (data.get("result", {}).get("list") or []):
+    async def get_mark_prices(self, symbols: Optional[List[str]] = None) -> Optional[Dict[str, float]]:
+        """
+        Mark price линейных контрактов: symbol -> цена.
+        Один символ — точечный запрос, иначе — вся категория одним запросом.
+        """
+        params: Dict[str, Any] = {"category": "linear"}
+        if symbols and len(symbols) == 1:
+            params["symbol"] = symbols[0].upper()
+        data = await self._request("GET", "/v5/market/tickers", params=params, schema=TickerListResponse)
+        if not _ok(data):
+            return None
+        wanted = {s.upper() for s in symbols} if symbols else None
+        prices: Dict[str, float] = {}
+        for row in get_field(get_field(data, "result"), "list") or []:
+            symbol = get_field(row, "symbol")
+            if wanted is None or symbol in wanted:
+                prices[symbol] = float(get_field(row, "markPrice") or 0.0)
+        return prices
+
+    async def get_klines(
+        self, symbol: str, start_ms: int, end_ms: int, interval: str = "1"
+    ) -> Optional[List[List[float]]]:
+        """
+        Свечи [start_ms, open, high, low, close] по возрастанию времени.
+        Bybit отдаёт до 1000 свечей за запрос (от новых к старым) — листаем назад.
+        """
+        out: List[List[float]] = []
+        end = end_ms
+        while end >= start_ms:
+            data = await self._request(
+                "GET",
+                "/v5/market/kline",
+                params={
+                    "category": "linear", "symbol": symbol.upper(), "interval": interval,
+                    "start": start_ms, "end": end, "limit": 1000,
+                },
+            )
+            if not _ok(data):
+                return None
+            rows = get_field(get_field(data, "result"), "list") or []
+            if not rows:
+                break
+            out.extend([int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4])] for r in rows)
+            oldest = int(rows[-1][0])
+            if len(rows) < 1000 or oldest <= start_ms:
+                break
+            end = oldest - 1
+        out.sort(key=lambda r: r[0])
+        return out
+
+    async def get_instruments(self) -> Optional[Dict[str, Tuple[float, float]]]:
+        """Шаг и минимум количества линейных контрактов: symbol -> (qtyStep, minOrderQty)."""
+        rows = await self._fetch_all("/v5/market/instruments-info", _Q_INSTRUMENTS)
+        if rows is None:
+            return None
+        steps: Dict[str, Tuple[float, float]] = {}
+        for row in rows:
+            lot = row.get("lotSizeFilter") or {}
             try:
-                size = float(it.get("size") or 0.0)
-            except Exception:
-                size = 0.0
-            if size <= 0:
+                steps[row["symbol"]] = (float(lot.get("qtyStep") or 0), float(lot.get("minOrderQty") or 0))
+            except (KeyError, ValueError):
                 continue
-            entry = float(it.get("avgPrice") or 0.0)
-            mark = float(it.get("markPrice") or 0.0)
-            pos_val = float(it.get("positionValue") or 0.0)
-            upl = float(it.get("unrealisedPnl") or 0.0)
-            lev = int(float(it.get("leverage") or 10))
-            detailed.append({
-                "symbol": (it.get("symbol") or "").upper(),
-                "side": (it.get("side") or "").lower(),
-                "size": size,
-                "entryPrice": entry,
-                "markPrice": mark,
-                "positionValue": pos_val,     # USDT
-                "unrealisedPnl": upl,         # USDT
-                "leverage": lev,
-            })
-        return detailed
+        return steps
+
+    async def load_instruments(self) -> bool:
+        """Загружает шаги количества в utils.helpers.round_qty."""
+        steps = await self.get_instruments()
+        if not steps:
+            logger.warning(f"[{self.role}] Не удалось загрузить параметры инструментов")
+            return False
+        set_qty_steps(steps)
+        logger.info(f"[{self.role}] 📐 Параметры инструментов: {len(steps)}")
+        return True
 
     async def set_leverage(self, symbol: str, leverage: int) -> bool:
+        """Плечо, уже выставленное на бирже (по кэшу), повторно не отправляется."""
+        symbol = symbol.upper()
+        if self._leverage.get(symbol) == int(leverage):
+            return True
         data = await self._request(
             "POST",
             "/v5/position/set-leverage",
             params={},
-            body={"category": "linear", "symbol": symbol.upper(), "buyLeverage": str(leverage), "sellLeverage": str(leverage)},
+            body={"category": "linear", "symbol": symbol, "buyLeverage": str(leverage), "sellLeverage": str(leverage)},
         )
-        return bool(data and str(data.get("retCode")) == "0")
+        ok = bool(data and str(data.get("retCode")) in ("0", _RET_LEVERAGE_NOT_MODIFIED))
+        if ok:
+            self._leverage[symbol] = int(leverage)
+        return ok
 
-    async def open_position(self, symbol: str, side: str, qty: float, leverage: int = 10):
+    async def open_position(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        leverage: int = 10,
+        price: float | None = None,
+    ):
+        """Market IOC; с price — агрессивный Limit IOC (не хуже указанной цены)."""
         side_v5 = "Buy" if side.lower() in ("buy", "long") else "Sell"
         await self.set_leverage(symbol, leverage)
+        body = {
+            "category": "linear",
+            "symbol": symbol.upper(),
+            "side": side_v5,
+            "orderType": "Limit" if price else "Market",
+            "qty": str(qty),
+            "timeInForce": "IOC",
+        }
+        if price:
+            body["price"] = str(price)
         data = await self._request(
             "POST",
             "/v5/order/create",
             params={},
-            body={
-                "category": "linear",
-                "symbol": symbol.upper(),
-                "side": side_v5,
-                "orderType": "Market",
-                "qty": str(qty),
-                "timeInForce": "IOC",
-            },
+            body=body,
         )
         if data and str(data.get("retCode")) == "0":
             logger.info(f"[{self.role}] ✅ Opened {symbol} {side_v5} qty={qty}")
@@ -250,19 +601,9 @@ class BybitAPI:
         logger.warning(f"[{self.role}] Failed to open {symbol} {side_v5} qty={qty}")
         return None
 
-    async def close_position(self, symbol: str) -> bool:
-        positions = await self.get_open_positions()
-        pos = next((p for p in positions if p["symbol"] == symbol.upper()), None)
-        if not pos:
-            logger.info(f"[{self.role}] Нет открытой позиции по {symbol} — закрывать нечего.")
-            return True
-
-        qty = float(pos["contracts"])
-        if qty <= 0:
-            logger.info(f"[{self.role}] Позиция по {symbol} уже нулевая.")
-            return True
-
-        opposite = "Sell" if pos["side"].lower() == "buy" else "Buy"
+    async def reduce_position(self, symbol: str, side: str, qty: float) -> bool:
+        """Частичное закрытие позиции стороны side на qty (reduceOnly)."""
+        opposite = "Sell" if side.lower() in ("buy", "long") else "Buy"
         data = await self._request(
             "POST",
             "/v5/order/create",
@@ -279,11 +620,161 @@ class BybitAPI:
         )
         ok = bool(data and str(data.get("retCode")) == "0")
         if ok:
-            logger.info(f"[{self.role}] 💤 Closed {symbol} with {opposite} qty={qty}")
+            logger.info(f"[{self.role}] ➖ Reduced {symbol} with {opposite} qty={qty}")
         else:
-            logger.warning(f"[{self.role}] Не удалось закрыть {symbol} ({opposite} {qty})")
+            logger.warning(f"[{self.role}] Не удалось уменьшить {symbol} ({opposite} {qty})")
         return ok
 
+    async def close_position(self, symbol: str, position: Optional[Position] = None) -> bool:
+        """position — уже известная позиция (без повторного запроса списка)."""
+        pos = position
+        if pos is None:
+            positions = await self.get_open_positions()
+            if positions is None:
+                logger.warning(f"[{self.role}] Не удалось получить позиции для закрытия {symbol}")
+                return False
+            pos = next((p for p in positions if p.symbol == symbol.upper()), None)
+        if not pos:
+            logger.info(f"[{self.role}] Нет открытой позиции по {symbol} — закрывать нечего.")
+            return True
+
+        if pos.size <= 0:
+            logger.info(f"[{self.role}] Позиция по {symbol} уже нулевая.")
+            return True
+        return await self.submit_close(symbol, self.prepare_close(pos))
+
+    def prepare_close(self, position: Position) -> bytes:
+        """
+        Тело reduce-only закрытия позиции по рынку, сериализованное заранее:
+        аварийное закрытие (trader/kill_switch.py) держит такие тела готовыми
+        и в момент срабатывания только подписывает и отправляет их.
+        """
+        return serializer.dumps({
+            "category": "linear",
+            "symbol": position.symbol,
+            "side": "Sell" if position.side == "buy" else "Buy",
+            "orderType": "Market",
+            "qty": str(position.size),
+            "timeInForce": "IOC",
+            "reduceOnly": True,
+            "orderLinkId": new_link_id(),
+        })
+
+    async def submit_close(self, symbol: str, prepared: bytes) -> bool:
+        """Отправляет тело из prepare_close()."""
+        data = await self._request("POST", "/v5/order/create", body=prepared)
+        ok = _ok(data)
+        if ok:
+            logger.info(f"[{self.role}] 💤 Closed {symbol}")
+        else:
+            logger.warning(f"[{self.role}] Не удалось закрыть {symbol}")
+        return ok
+
+    # ---------------------- ордера ----------------------
+
+    async def get_open_orders(self) -> Optional[List[Order]]:
+        """Активные ордера (лимитные и условные, все страницы). None — запрос не удался."""
+        rows = await self._fetch_all("/v5/order/realtime", _Q_ORDERS, schema=OrderListResponse)
+        if rows is None:
+            return None
+        return parse_orders(rows)
+
+    async def place_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        order_type: str = "Limit",
+        price: float | None = None,
+        trigger_price: float | None = None,
+        trigger_direction: int | None = None,
+        reduce_only: bool = False,
+        time_in_force: str = "GTC",
+        order_link_id: str | None = None,
+    ):
+        side_v5 = "Buy" if side.lower() in ("buy", "long") else "Sell"
+        body: Dict[str, Any] = {
+            "category": "linear",
+            "symbol": symbol.upper(),
+            "side": side_v5,
+            "orderType": order_type,
+            "qty": str(qty),
+            "timeInForce": time_in_force,
+        }
+        if price:
+            body["price"] = str(price)
+        if trigger_price:
+            body["triggerPrice"] = str(trigger_price)
+            body["triggerDirection"] = trigger_direction or 1
+        if reduce_only:
+            body["reduceOnly"] = True
+        if order_link_id:
+            body["orderLinkId"] = order_link_id
+
+        data = await self._request("POST", "/v5/order/create", params={}, body=body)
+        if _ok(data):
+            logger.info(f"[{self.role}] 📝 Order {symbol} {side_v5} {order_type} qty={qty} price={price or '-'}")
+            return data
+        logger.warning(f"[{self.role}] Не удалось выставить ордер {symbol} {side_v5} {order_type} qty={qty}")
+        return None
+
+    async def amend_order(
+        self,
+        symbol: str,
+        order_link_id: str,
+        qty: float | None = None,
+        price: float | None = None,
+        trigger_price: float | None = None,
+    ) -> bool:
+        body: Dict[str, Any] = {"category": "linear", "symbol": symbol.upper(), "orderLinkId": order_link_id}
+        if qty:
+            body["qty"] = str(qty)
+        if price:
+            body["price"] = str(price)
+        if trigger_price:
+            body["triggerPrice"] = str(trigger_price)
+        data = await self._request("POST", "/v5/order/amend", params={}, body=body)
+        return _ok(data)
+
+    async def cancel_order(self, symbol: str, order_link_id: str) -> bool:
+        data = await self._request(
+            "POST",
+            "/v5/order/cancel",
+            params={},
+            body={"category": "linear", "symbol": symbol.upper(), "orderLinkId": order_link_id},
+        )
+        return _ok(data)
+
+    async def cancel_all_orders(self) -> bool:
+        """Отменяет все активные ордера линейных USDT-контрактов одним запросом."""
+        data = await self._request(
+            "POST",
+            "/v5/order/cancel-all",
+            body={"category": "linear", "settleCoin": "USDT"},
+        )
+        return _ok(data)
+
+    async def set_trading_stop(
+        self,
+        symbol: str,
+        take_profit: float | None = None,
+        stop_loss: float | None = None,
+        position_idx: int = 0,
+    ) -> bool:
+        """TP/SL на всю позицию. 0 — снять уровень."""
+        body: Dict[str, Any] = {
+            "category": "linear",
+            "symbol": symbol.upper(),
+            "tpslMode": "Full",
+            "positionIdx": position_idx,
+        }
+        if take_profit is not None:
+            body["takeProfit"] = str(take_profit)
+        if stop_loss is not None:
+            body["stopLoss"] = str(stop_loss)
+        data = await self._request("POST", "/v5/position/trading-stop", params={}, body=body)
+        return _ok(data)
+
     async def close(self):
         try:
             if self._session and not self._session.closed:
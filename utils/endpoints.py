@@ -0,0 +1,100 @@
+"""
+Здоровье REST-доменов Bybit и выбор хоста
+-----------------------------------------
+Для mainnet есть два равноценных домена: api.bybit.com и api.bytick.com.
+По каждому хосту копятся задержки последних ответов и подряд идущие ошибки.
+
+Circuit breaker: после FAIL_THRESHOLD ошибок подряд хост «открыт» и не
+используется первым COOLDOWN_SEC секунд (с удвоением до COOLDOWN_MAX_SEC
+при повторных срывах). По истечении паузы хосту даётся пробный запрос,
+успех закрывает предохранитель.
+
+hedge_delay() — через сколько дублировать читающий запрос на запасной
+хост: p95 задержки основного хоста, ограниченный снизу и сверху.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, List
+
+FAIL_THRESHOLD = 3
+COOLDOWN_SEC = 15.0
+COOLDOWN_MAX_SEC = 300.0
+HEDGE_MIN_SEC = 0.15
+HEDGE_MAX_SEC = 2.0
+HEDGE_DEFAULT_SEC = 0.5
+_MIN_SAMPLES = 20
+
+HOSTS: Dict[str, List[str]] = {
+    "mainnet": ["https://api.bybit.com", "https://api.bytick.com"],
+    "testnet": ["https://api-testnet.bybit.com"],
+    "demo": ["https://api-demo.bybit.com"],
+}
+
+
+class HostHealth:
+    __slots__ = ("host", "latencies", "fails", "open_until", "cooldown", "requests", "errors")
+
+    def __init__(self, host: str):
+        self.host = host
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.fails = 0
+        self.open_until = 0.0
+        self.cooldown = COOLDOWN_SEC
+        self.requests = 0
+        self.errors = 0
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def p95(self) -> float:
+        if len(self.latencies) < _MIN_SAMPLES:
+            return HEDGE_DEFAULT_SEC
+        values = sorted(self.latencies)
+        return values[int(len(values) * 0.95) - 1]
+
+
+class EndpointPool:
+    def __init__(self, env: str):
+        self.hosts = HOSTS.get(env, HOSTS["mainnet"])
+        self.health = {h: HostHealth(h) for h in self.hosts}
+
+    @property
+    def primary(self) -> str:
+        return self.hosts[0]
+
+    def order(self) -> List[str]:
+        """Хосты в порядке попыток: закрытые предохранители раньше, внутри — исходный порядок."""
+        now = time.monotonic()
+        return sorted(self.hosts, key=lambda h: self.health[h].is_open(now))
+
+    def hedge_delay(self, host: str) -> float:
+        return min(HEDGE_MAX_SEC, max(HEDGE_MIN_SEC, self.health[host].p95()))
+
+    def record(self, host: str, latency: float, ok: bool):
+        h = self.health[host]
+        h.requests += 1
+        if ok:
+            h.latencies.append(latency)
+            h.fails = 0
+            h.cooldown = COOLDOWN_SEC
+            h.open_until = 0.0
+            return
+        h.errors += 1
+        h.fails += 1
+        if h.fails >= FAIL_THRESHOLD:
+            h.open_until = time.monotonic() + h.cooldown
+            h.cooldown = min(COOLDOWN_MAX_SEC, h.cooldown * 2)
+            h.fails = 0
+
+    def get_stats(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            h.host: {
+                "requests": h.requests,
+                "errors": h.errors,
+                "p95_ms": round(h.p95() * 1000, 1),
+                "open": h.is_open(now),
+            }
+            for h in self.health.values()
+        }
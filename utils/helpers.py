@@ -23,11 +23,24 @@ def fmt_pct(value):
         return str(value)
 
 
+# symbol -> (qtyStep, minOrderQty); заполняется BybitAPI.load_instruments() при старте
+_QTY_STEPS = {}
+
+
+def set_qty_steps(steps):
+    _QTY_STEPS.update(steps)
+
+
 def round_qty(symbol, qty):
     """
-    Округление количества до разумного значения.
-    Можно адаптировать под фильтры биржи.
+    Округление количества до шага инструмента (если параметры загружены),
+    иначе — до 3 знаков. Меньше минимального объёма — 0.
     """
+    step, min_qty = _QTY_STEPS.get(symbol, (0.0, 0.0))
+    if step > 0:
+        decimals = max(0, -math.floor(math.log10(step) + 1e-9))
+        qty = float(round(round(qty / step) * step, decimals))
+        return qty if qty >= min_qty and qty > 0 else 0.0
     if qty < 0.0001:
         return 0.0
     return round(qty, 3)
@@ -0,0 +1,174 @@
+"""
+Сторож event loop: задержка планирования и стеки блокировок
+-----------------------------------------------------------
+Цикл копирования, aiogram и фоновые задачи живут в одном asyncio-цикле:
+любой синхронный вызов (сохранение JSON, тяжёлое форматирование) молча
+задерживает отправку ордеров.
+
+Измерение: задача спит interval секунд и по perf_counter смотрит, насколько
+позже положенного проснулась — это и есть задержка планирования (lag).
+Последние значения лежат в окне, get_stats() отдаёт p50/p95/p99/max.
+
+Стеки: отдельный поток следит за «пульсом» задачи. Если цикл не отвечает
+дольше warn_ms, поток снимает стек потока цикла (sys._current_frames) —
+виден именно тот код, который держит цикл, пока он его держит. Стек
+пишется в лог один раз на каждую блокировку.
+
+Тревога: блокировка дольше alert_ms передаётся в on_alert (не чаще раза
+в ALERT_COOLDOWN_SEC) уже после того, как цикл освободился.
+
+uvloop — необязательная замена цикла (UVLOOP=true), см. run().
+"""
+
+import asyncio
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from typing import Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+ALERT_COOLDOWN_SEC = 300.0
+_STACK_LIMIT = 12
+
+
+def run(coro, use_uvloop: bool = False):
+    """asyncio.run(coro) на uvloop, если он запрошен и установлен."""
+    if use_uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("⚠️ UVLOOP=true, но uvloop не установлен — используется стандартный цикл asyncio.")
+        else:
+            logger.info("⚡ Event loop: uvloop")
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                return runner.run(coro)
+    return asyncio.run(coro)
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        interval_ms: float = 20.0,
+        warn_ms: float = 100.0,
+        alert_ms: float = 500.0,
+        window: int = 3000,
+    ):
+        self.interval = interval_ms / 1000
+        self.warn = warn_ms / 1000
+        self.alert = alert_ms / 1000
+        self.lags: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.stalls = 0                      # блокировок дольше warn_ms
+        self.culprits: Counter = Counter()   # верхний кадр стека → число блокировок
+
+        # on_alert(lag_ms, stack) — корутина, вызывается после освобождения цикла
+        self.on_alert: Optional[Callable] = None
+        self._last_alert = 0.0
+
+        self._beat = time.perf_counter()
+        self._stall_stack: Optional[str] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------------- поток-сэмплер ----------------
+
+    def _sample(self):
+        sampled_beat = None
+        while not self._stop.wait(self.warn / 2):
+            beat = self._beat
+            if beat == sampled_beat or time.perf_counter() - beat < self.warn:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            sampled_beat = beat   # одна запись на блокировку
+            stack = "".join(traceback.format_stack(frame, limit=_STACK_LIMIT))
+            self._stall_stack = stack
+            top = traceback.extract_stack(frame, limit=1)[-1]
+            self.culprits[f"{top.filename}:{top.lineno} {top.name}"] += 1
+            logger.warning(
+                f"🐢 Event loop заблокирован > {self.warn * 1000:.0f} мс, стек потока цикла:\n{stack}"
+            )
+
+    # ---------------- задача в цикле ----------------
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            self._beat = started
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._beat = now
+            lag = max(0.0, now - started - self.interval)
+            self.lags.append(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag >= self.warn:
+                self.stalls += 1
+                stack, self._stall_stack = self._stall_stack, None
+                if lag >= self.alert:
+                    await self._raise_alert(lag, stack)
+
+    async def _raise_alert(self, lag: float, stack: Optional[str]):
+        now = time.monotonic()
+        if self.on_alert is None or now - self._last_alert < ALERT_COOLDOWN_SEC:
+            return
+        self._last_alert = now
+        try:
+            res = self.on_alert(round(lag * 1000, 1), stack)
+            if inspect.isawaitable(res):
+                # отправка в Telegram не должна сама стать блокировкой цикла
+                asyncio.create_task(res)
+        except Exception as e:
+            logger.warning(f"LoopWatchdog: ошибка обработчика тревоги: {e}")
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-watchdog")
+        self._thread = threading.Thread(target=self._sample, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"🩺 Сторож event loop: шаг {self.interval * 1000:.0f} мс, "
+            f"порог {self.warn * 1000:.0f} мс, тревога {self.alert * 1000:.0f} мс"
+        )
+
+    async def close(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    # ---------------- метрики ----------------
+
+    def percentiles(self) -> dict:
+        values = sorted(self.lags)
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        n = len(values)
+        return {
+            name: round(values[min(n - 1, int(n * q))] * 1000, 2)
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            **self.percentiles(),
+            "max": round(self.max_lag * 1000, 2),
+            "samples": len(self.lags),
+            "stalls": self.stalls,
+            "culprits": self.culprits.most_common(3),
+        }
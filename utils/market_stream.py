@@ -0,0 +1,184 @@
+"""
+Публичный WebSocket Bybit v5 (linear) — локальные стаканы и mark price
+----------------------------------------------------------------------
+Подписка orderbook.{depth}.{symbol} для копируемых символов, применение
+snapshot/delta к L2Book, автоматическая переподписка при рассинхроне
+и переподключение с экспоненциальной задержкой.
+tickers.{symbol} — mark price открытых позиций подписчика (marks).
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+import aiohttp
+
+from utils import recorder, serializer
+from utils.orderbook import L2Book
+
+logger = logging.getLogger(__name__)
+
+
+def _ws_url(env: str) -> str:
+    # demo-аккаунты торгуют по публичным данным mainnet
+    if (env or "").lower() == "testnet":
+        return "wss://stream-testnet.bybit.com/v5/public/linear"
+    return "wss://stream.bybit.com/v5/public/linear"
+
+
+class PublicStream:
+    def __init__(self, env: str = "mainnet", depth: int = 50):
+        self.url = _ws_url(env)
+        self.depth = depth
+        self.books: Dict[str, L2Book] = {}
+        self._symbols: Set[str] = set()
+        self.marks: Dict[str, float] = {}
+        self._tickers: Set[str] = set()
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._resyncing: Set[str] = set()   # ждём свежий snapshot после рассинхрона
+
+    def _topic(self, symbol: str) -> str:
+        return f"orderbook.{self.depth}.{symbol}"
+
+    # ---------------------- подписки ----------------------
+
+    async def _send(self, op: str, symbols: Iterable[str], kind: str = "orderbook"):
+        args = [self._topic(s) if kind == "orderbook" else f"tickers.{s}" for s in symbols]
+        if not args or self._ws is None or self._ws.closed:
+            return
+        # Bybit ограничивает число топиков в одном запросе
+        for i in range(0, len(args), 10):
+            await self._ws.send_str(serializer.dumps({"op": op, "args": args[i:i + 10]}).decode())
+
+    async def ensure(self, symbols: Iterable[str]):
+        """Подписывается на стаканы новых символов (уже подписанные не трогает)."""
+        new = {s.upper() for s in symbols} - self._symbols
+        if not new:
+            return
+        self._symbols |= new
+        for s in new:
+            self._ready.setdefault(s, asyncio.Event())
+        await self._send("subscribe", new)
+
+    async def ensure_tickers(self, symbols: Iterable[str]):
+        """Подписывается на тикеры (mark price) новых символов."""
+        new = {s.upper() for s in symbols} - self._tickers
+        if not new:
+            return
+        self._tickers |= new
+        await self._send("subscribe", new, kind="tickers")
+
+    async def _resubscribe(self, symbol: str):
+        if symbol in self._resyncing:
+            return
+        self._resyncing.add(symbol)
+        logger.warning(f"📚 Стакан {symbol} рассинхронизирован — запрашиваем новый snapshot")
+        self._ready.setdefault(symbol, asyncio.Event()).clear()
+        await self._send("unsubscribe", [symbol])
+        await self._send("subscribe", [symbol])
+
+    def book(self, symbol: str, max_age: float = 5.0) -> Optional[L2Book]:
+        """Валидный и свежий стакан или None."""
+        b = self.books.get(symbol)
+        if b is None or not b.valid or b.age() > max_age:
+            return None
+        return b
+
+    async def wait_book(self, symbol: str, timeout: float = 1.0) -> Optional[L2Book]:
+        await self.ensure([symbol])
+        ev = self._ready.setdefault(symbol, asyncio.Event())
+        try:
+            await asyncio.wait_for(ev.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.book(symbol)
+
+    # ---------------------- обработка сообщений ----------------------
+
+    async def _on_message(self, msg: dict):
+        topic = msg.get("topic") or ""
+        if topic.startswith("tickers."):
+            # delta тикера содержит только изменившиеся поля
+            mark = (msg.get("data") or {}).get("markPrice")
+            if mark:
+                self.marks[topic[8:]] = float(mark)
+            return
+        if not topic.startswith("orderbook."):
+            return
+        data = msg.get("data") or {}
+        symbol = data.get("s") or topic.rsplit(".", 1)[-1]
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = L2Book(symbol)
+
+        u = int(data.get("u") or 0)
+        seq = int(data.get("seq") or 0)
+        # u == 1 — перезапуск сервиса Bybit: delta с u=1 равносильна snapshot
+        if msg.get("type") == "snapshot" or u == 1:
+            book.apply_snapshot(data.get("b") or [], data.get("a") or [], u, seq)
+            self._resyncing.discard(symbol)
+        elif symbol in self._resyncing:
+            return
+        elif not book.apply_delta(data.get("b") or [], data.get("a") or [], u, seq):
+            await self._resubscribe(symbol)
+            return
+        if book.valid:
+            self._ready.setdefault(symbol, asyncio.Event()).set()
+
+    async def _ping(self):
+        while True:
+            await asyncio.sleep(20)
+            if self._ws is not None and not self._ws.closed:
+                await self._ws.send_str(serializer.dumps({"op": "ping"}).decode())
+
+    async def _run(self):
+        delay = 1.0
+        while True:
+            ping_task = None
+            try:
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession()
+                async with self._session.ws_connect(self.url, heartbeat=None) as ws:
+                    self._ws = ws
+                    delay = 1.0
+                    logger.info(f"📡 Публичный WS подключён: {self.url}")
+                    for b in self.books.values():
+                        b.valid = False
+                    self._resyncing.clear()
+                    await self._send("subscribe", self._symbols)
+                    await self._send("subscribe", self._tickers, kind="tickers")
+                    ping_task = asyncio.create_task(self._ping())
+                    async for m in ws:
+                        if m.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                            if recorder.ACTIVE:
+                                recorder.record("ws", m.data)
+                            await self._on_message(serializer.loads(m.data))
+                        elif m.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Публичный WS: ошибка соединения: {e}")
+            finally:
+                if ping_task:
+                    ping_task.cancel()
+                self._ws = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="public-ws")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._session and not self._session.closed:
+            await self._session.close()
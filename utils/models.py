@@ -0,0 +1,274 @@
+"""
+Модели данных Bybit (Position / Wallet / Order)
+-----------------------------------------------
+Неизменяемые NamedTuple: без __dict__, создаются быстрее frozen dataclass,
+сравниваются по значению как кортежи.
+Создаются одним общим парсером: для каждой модели заранее собрана таблица
+(поле Bybit, конвертер) в порядке полей, поэтому разбор строки ответа —
+один проход по кортежу и сборка модели без вызова __init__.
+
+Парсер принимает и wire-структуры (utils/wire.py), и обычные dict.
+"""
+
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.wire import get_field
+
+
+# ============================================================
+#  КОНВЕРТЕРЫ ПОЛЕЙ
+# ============================================================
+
+def _float(v: Any) -> float:
+    if not v:
+        return 0.0
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _int(v: Any) -> int:
+    if not v:
+        return 0
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _lev(v: Any) -> int:
+    return _int(v) or 10
+
+
+def _str(v: Any) -> str:
+    return "" if v is None else str(v)
+
+
+def _upper(v: Any) -> str:
+    return _str(v).upper()
+
+
+def _lower(v: Any) -> str:
+    return _str(v).lower()
+
+
+def _bool(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true")
+    return bool(v)
+
+
+# ============================================================
+#  МОДЕЛИ
+# ============================================================
+
+class Position(NamedTuple):
+    symbol: str
+    side: str                   # buy | sell
+    size: float
+    entry_price: float
+    mark_price: float = 0.0
+    position_value: float = 0.0   # USDT
+    unrealised_pnl: float = 0.0   # USDT
+    leverage: int = 10
+    liq_price: float = 0.0
+    position_idx: int = 0
+
+
+class Wallet(NamedTuple):
+    total_equity: float
+    available: float            # USDT, доступно к выводу (или walletBalance)
+    wallet_balance: float = 0.0
+    unrealised_pnl: float = 0.0
+
+
+class Order(NamedTuple):
+    order_id: str
+    order_link_id: str
+    symbol: str
+    side: str                   # buy | sell
+    order_type: str             # Market | Limit
+    price: float
+    qty: float
+    trigger_price: float = 0.0
+    trigger_direction: int = 0  # 1 — рост до триггера, 2 — падение
+    stop_order_type: str = ""   # "" | TakeProfit | StopLoss | Stop | ...
+    reduce_only: bool = False
+    time_in_force: str = ""
+    status: str = ""
+    take_profit: float = 0.0
+    stop_loss: float = 0.0
+    created_time: int = 0       # ms
+    updated_time: int = 0       # ms
+
+
+class Execution(NamedTuple):
+    exec_id: str
+    order_id: str
+    order_link_id: str
+    symbol: str
+    side: str                   # buy | sell
+    exec_price: float
+    exec_qty: float
+    exec_value: float
+    exec_fee: float
+    fee_rate: float
+    exec_type: str              # Trade | Funding | ...
+    is_maker: bool
+    closed_size: float
+    exec_time: int              # ms
+
+
+class ClosedPnl(NamedTuple):
+    order_id: str
+    symbol: str
+    side: str                   # сторона закрывающего ордера: buy | sell
+    qty: float
+    avg_entry_price: float
+    avg_exit_price: float
+    closed_pnl: float
+    cum_entry_value: float
+    cum_exit_value: float
+    leverage: int
+    created_time: int           # ms
+    updated_time: int           # ms
+
+
+Spec = Tuple[Tuple[str, Callable[[Any], Any]], ...]
+
+
+def _spec(model: type, mapping: dict) -> Spec:
+    """Таблица (поле Bybit, конвертер) в порядке полей модели."""
+    names = model._fields
+    assert set(names) == set(mapping), f"{model.__name__}: поля не совпадают"
+    return tuple(mapping[n] for n in names)
+
+
+_POSITION_SPEC = _spec(Position, {
+    "symbol": ("symbol", _upper),
+    "side": ("side", _lower),
+    "size": ("size", _float),
+    "entry_price": ("avgPrice", _float),
+    "mark_price": ("markPrice", _float),
+    "position_value": ("positionValue", _float),
+    "unrealised_pnl": ("unrealisedPnl", _float),
+    "leverage": ("leverage", _lev),
+    "liq_price": ("liqPrice", _float),
+    "position_idx": ("positionIdx", _int),
+})
+
+_ORDER_SPEC = _spec(Order, {
+    "order_id": ("orderId", _str),
+    "order_link_id": ("orderLinkId", _str),
+    "symbol": ("symbol", _upper),
+    "side": ("side", _lower),
+    "order_type": ("orderType", _str),
+    "price": ("price", _float),
+    "qty": ("qty", _float),
+    "trigger_price": ("triggerPrice", _float),
+    "trigger_direction": ("triggerDirection", _int),
+    "stop_order_type": ("stopOrderType", _str),
+    "reduce_only": ("reduceOnly", _bool),
+    "time_in_force": ("timeInForce", _str),
+    "status": ("orderStatus", _str),
+    "take_profit": ("takeProfit", _float),
+    "stop_loss": ("stopLoss", _float),
+    "created_time": ("createdTime", _int),
+    "updated_time": ("updatedTime", _int),
+})
+
+_EXECUTION_SPEC = _spec(Execution, {
+    "exec_id": ("execId", _str),
+    "order_id": ("orderId", _str),
+    "order_link_id": ("orderLinkId", _str),
+    "symbol": ("symbol", _upper),
+    "side": ("side", _lower),
+    "exec_price": ("execPrice", _float),
+    "exec_qty": ("execQty", _float),
+    "exec_value": ("execValue", _float),
+    "exec_fee": ("execFee", _float),
+    "fee_rate": ("feeRate", _float),
+    "exec_type": ("execType", _str),
+    "is_maker": ("isMaker", _bool),
+    "closed_size": ("closedSize", _float),
+    "exec_time": ("execTime", _int),
+})
+
+_CLOSED_PNL_SPEC = _spec(ClosedPnl, {
+    "order_id": ("orderId", _str),
+    "symbol": ("symbol", _upper),
+    "side": ("side", _lower),
+    "qty": ("qty", _float),
+    "avg_entry_price": ("avgEntryPrice", _float),
+    "avg_exit_price": ("avgExitPrice", _float),
+    "closed_pnl": ("closedPnl", _float),
+    "cum_entry_value": ("cumEntryValue", _float),
+    "cum_exit_value": ("cumExitValue", _float),
+    "leverage": ("leverage", _lev),
+    "created_time": ("createdTime", _int),
+    "updated_time": ("updatedTime", _int),
+})
+
+
+_new = tuple.__new__
+
+
+def _build(model: type, spec: Spec, row: Any):
+    if isinstance(row, dict):
+        get = row.get
+        return _new(model, [conv(get(src)) for src, conv in spec])
+    return _new(model, [conv(getattr(row, src, None)) for src, conv in spec])
+
+
+# ============================================================
+#  ПАРСЕРЫ
+# ============================================================
+
+def parse_position(row: Any) -> Position:
+    return _build(Position, _POSITION_SPEC, row)
+
+
+def parse_positions(rows: Iterable[Any]) -> List[Position]:
+    """Только открытые (size > 0) позиции."""
+    out: List[Position] = []
+    for row in rows:
+        pos = _build(Position, _POSITION_SPEC, row)
+        if pos.size > 0:
+            out.append(pos)
+    return out
+
+
+def parse_order(row: Any) -> Order:
+    return _build(Order, _ORDER_SPEC, row)
+
+
+def parse_orders(rows: Iterable[Any]) -> List[Order]:
+    return [_build(Order, _ORDER_SPEC, row) for row in rows]
+
+
+def parse_executions(rows: Iterable[Any]) -> List[Execution]:
+    return [_build(Execution, _EXECUTION_SPEC, row) for row in rows]
+
+
+def parse_closed_pnls(rows: Iterable[Any]) -> List[ClosedPnl]:
+    return [_build(ClosedPnl, _CLOSED_PNL_SPEC, row) for row in rows]
+
+
+def parse_wallet(account: Any, coin: str = "USDT") -> Optional[Wallet]:
+    """Кошелёк UNIFIED-аккаунта (первый элемент result.list)."""
+    if account is None:
+        return None
+    available = wallet_balance = upl = 0.0
+    for c in get_field(account, "coin") or []:
+        if get_field(c, "coin") == coin:
+            wallet_balance = _float(get_field(c, "walletBalance"))
+            available = _float(get_field(c, "availableToWithdraw")) or wallet_balance
+            upl = _float(get_field(c, "unrealisedPnl"))
+            break
+    return Wallet(
+        total_equity=_float(get_field(account, "totalEquity")),
+        available=available,
+        wallet_balance=wallet_balance,
+        unrealised_pnl=upl,
+    )
@@ -0,0 +1,144 @@
+"""
+Локальный L2-стакан
+-------------------
+Каждая сторона — пара параллельных отсортированных массивов (ключ цены, объём):
+поиск уровня — bisect, лучшая цена — элемент [0], обход глубины для оценки
+проскальзывания — линейный проход без аллокаций.
+
+Для bid ключ хранится со знаком минус, поэтому обе стороны отсортированы
+по возрастанию «от лучшей цены».
+
+Проверка целостности: Bybit v5 не присылает checksum стакана, поэтому
+вместо неё контролируем непрерывность update id (u): каждая delta должна
+иметь u ровно на единицу больше предыдущего, иначе пропущено сообщение.
+Дополнительно ловим «перекрёстный» стакан (bid >= ask). При нарушении
+стакан помечается невалидным и переподписывается для получения свежего
+snapshot.
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Sequence, Tuple
+
+
+class BookSide:
+    __slots__ = ("_sign", "keys", "sizes")
+
+    def __init__(self, is_bid: bool):
+        self._sign = -1.0 if is_bid else 1.0
+        self.keys: List[float] = []
+        self.sizes: List[float] = []
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+
+    def update(self, price: float, size: float):
+        k = price * self._sign
+        i = bisect_left(self.keys, k)
+        found = i < len(self.keys) and self.keys[i] == k
+        if size <= 0:
+            if found:
+                del self.keys[i]
+                del self.sizes[i]
+        elif found:
+            self.sizes[i] = size
+        else:
+            self.keys.insert(i, k)
+            self.sizes.insert(i, size)
+
+    def apply(self, levels: Iterable[Sequence[str]]):
+        for p, s in levels:
+            self.update(float(p), float(s))
+
+    def best(self) -> float:
+        return self.keys[0] * self._sign if self.keys else 0.0
+
+    def depth_until(self, limit_price: float) -> float:
+        """Суммарный объём уровней не хуже limit_price."""
+        j = bisect_right(self.keys, limit_price * self._sign)
+        return sum(self.sizes[:j])
+
+    def worst_within(self, limit_price: float) -> float:
+        """Цена самого глубокого уровня, не хуже limit_price (кратна шагу цены биржи)."""
+        j = bisect_right(self.keys, limit_price * self._sign)
+        return self.keys[j - 1] * self._sign if j else 0.0
+
+    def sweep(self, qty: float) -> Tuple[float, float, float]:
+        """
+        Рыночное исполнение qty по стакану.
+        Возвращает (средняя цена, исполненный объём, худшая цена).
+        """
+        left = qty
+        notional = 0.0
+        worst = 0.0
+        sign = self._sign
+        for k, s in zip(self.keys, self.sizes):
+            take = s if s < left else left
+            price = k * sign
+            notional += take * price
+            worst = price
+            left -= take
+            if left <= 0:
+                break
+        filled = qty - max(left, 0.0)
+        return (notional / filled if filled > 0 else 0.0), filled, worst
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class L2Book:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.update_id = 0
+        self.seq = 0
+        self.valid = False
+        self.updated_at = 0.0   # monotonic
+
+    def apply_snapshot(self, bids, asks, update_id: int, seq: int = 0):
+        self.bids.clear()
+        self.asks.clear()
+        self.bids.apply(bids)
+        self.asks.apply(asks)
+        self.update_id = update_id
+        self.seq = seq
+        self.valid = True
+        self.updated_at = time.monotonic()
+        self._check()
+
+    def apply_delta(self, bids, asks, update_id: int, seq: int = 0) -> bool:
+        """False — delta не применима (пропуск/рассинхрон), нужен новый snapshot."""
+        if not self.valid:
+            return False
+        if update_id <= self.update_id:
+            return True   # устаревшее сообщение — игнорируем
+        if update_id != self.update_id + 1:
+            self.valid = False   # пропуск delta — замена checksum, которой в v5 нет
+            return False
+        self.bids.apply(bids)
+        self.asks.apply(asks)
+        self.update_id = update_id
+        self.seq = seq or self.seq
+        self.updated_at = time.monotonic()
+        return self._check()
+
+    def _check(self) -> bool:
+        if self.bids and self.asks and self.bids.best() >= self.asks.best():
+            self.valid = False
+        return self.valid
+
+    def age(self) -> float:
+        return time.monotonic() - self.updated_at if self.updated_at else float("inf")
+
+    def mid(self) -> float:
+        b, a = self.bids.best(), self.asks.best()
+        if b and a:
+            return (a + b) / 2
+        return a or b
+
+    def side_for(self, taker_side: str) -> BookSide:
+        """Покупка исполняется по ask, продажа — по bid."""
+        return self.asks if taker_side.lower() in ("buy", "long") else self.bids
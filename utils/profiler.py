@@ -0,0 +1,156 @@
+"""
+Профилирование работающего процесса по запросу
+----------------------------------------------
+К сервису под systemd профайлер не подключить, поэтому снимки делаются
+изнутри процесса на ограниченное время и возвращаются файлом:
+
+  cpu      — сэмплирующий профайлер: отдельный поток раз в interval_ms
+             снимает стеки всех потоков (sys._current_frames), результат —
+             collapsed stacks («a;b;c N»), готовые для flamegraph.pl/speedscope;
+  cprofile — cProfile потока event loop, top-N по cumulative (pstats);
+  mem      — tracemalloc: разница снимков начала и конца окна, top-N строк;
+  tasks    — мгновенный дамп asyncio-задач со стеками.
+
+Пока сессии нет, ничего не работает: ни потока, ни хуков профилирования,
+tracemalloc выключен. Одновременно идёт не больше одной сессии.
+"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cpu", "cprofile", "mem", "tasks")
+TOP_N = 40
+_MAX_DEPTH = 64
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _collapse(frame) -> str:
+    parts = []
+    while frame is not None and len(parts) < _MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def dump_tasks() -> str:
+    """Все asyncio-задачи текущего цикла со стеками (вызывать из цикла)."""
+    out = io.StringIO()
+    tasks = sorted(asyncio.all_tasks(), key=lambda t: t.get_name())
+    out.write(f"# asyncio tasks: {len(tasks)}\n\n")
+    for task in tasks:
+        out.write(f"== {task.get_name()} {'done' if task.done() else 'pending'}\n")
+        task.print_stack(limit=20, file=out)
+        out.write("\n")
+    return out.getvalue()
+
+
+class Profiler:
+    def __init__(self, max_sec: float = 120.0, interval_ms: float = 5.0):
+        self.max_sec = max_sec
+        self.interval = interval_ms / 1000
+        self.active: Optional[str] = None
+        self.runs = 0
+
+    def _sample(self, stop: threading.Event, stacks: Counter):
+        me = threading.get_ident()
+        names = {}
+        while not stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stacks[f"{names.get(tid, tid)};{_collapse(frame)}"] += 1
+
+    async def _cpu(self, seconds: float) -> str:
+        stacks: Counter = Counter()
+        stop = threading.Event()
+        thread = threading.Thread(target=self._sample, args=(stop, stacks), name="profiler", daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+        return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+    async def _cprofile(self, seconds: float) -> str:
+        prof = cProfile.Profile()
+        prof.enable()   # хук ставится только на поток event loop
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            prof.disable()
+
+        def report() -> str:
+            out = io.StringIO()
+            pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(TOP_N)
+            return out.getvalue()
+
+        return await asyncio.to_thread(report)
+
+    async def _mem(self, seconds: float) -> str:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(25)
+        try:
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+        def report() -> str:
+            out = io.StringIO()
+            out.write(f"# tracemalloc: current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB\n\n")
+            out.write(f"## top {TOP_N}: прирост за {seconds:.0f} с\n")
+            for stat in after.compare_to(before, "lineno")[:TOP_N]:
+                out.write(f"{stat}\n")
+            out.write(f"\n## top {TOP_N}: занято сейчас\n")
+            for stat in after.statistics("lineno")[:TOP_N]:
+                out.write(f"{stat}\n")
+            return out.getvalue()
+
+        return await asyncio.to_thread(report)
+
+    async def run(self, mode: str, seconds: float) -> Tuple[str, bytes]:
+        """(имя файла, содержимое). ValueError — неизвестный режим, ProfilerBusy — уже идёт сессия."""
+        if mode not in MODES:
+            raise ValueError(mode)
+        if self.active is not None:
+            raise ProfilerBusy(self.active)
+        seconds = max(1.0, min(float(seconds), self.max_sec))
+        self.active = mode
+        started = time.time()
+        logger.info(f"🔬 Профилирование {mode} на {seconds:.0f} с")
+        try:
+            if mode == "cpu":
+                text, ext = await self._cpu(seconds), "collapsed"
+            elif mode == "cprofile":
+                text, ext = await self._cprofile(seconds), "txt"
+            elif mode == "mem":
+                text, ext = await self._mem(seconds), "txt"
+            else:
+                text, ext = dump_tasks(), "txt"
+        finally:
+            self.active = None
+        self.runs += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(started))
+        return f"{mode}-{stamp}.{ext}", text.encode("utf-8")
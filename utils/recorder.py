@@ -0,0 +1,273 @@
+"""
+Запись потоков событий на диск
+------------------------------
+Пишет сырые снимки мастера и подписчика, WS-сообщения, запросы к API и
+ответы с монотонными метками времени в сжатые JSON lines с ротацией:
+
+    {"m": monotonic, "t": unix_time, "k": kind, "d": данные}
+
+kind: master | follower | event | ws | req | resp
+
+record() только кладёт кортеж в ограниченную очередь (при переполнении
+запись отбрасывается и считается) — сериализация, gzip и запись на диск
+идут в фоновом потоке, event loop не блокируется.
+
+Включение: install(Recorder(...)); места записи проверяют флаг ACTIVE,
+поэтому без рекордера накладных расходов нет.
+
+Чтение: read() / master_snapshots() / replay_into() / latency_report().
+"""
+
+import asyncio
+import glob
+import gzip
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from utils import serializer
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = False
+_recorder: Optional["Recorder"] = None
+_STOP = object()
+
+
+def install(rec: Optional["Recorder"]):
+    global ACTIVE, _recorder
+    _recorder = rec
+    ACTIVE = rec is not None
+
+
+def record(kind: str, data: Any):
+    rec = _recorder
+    if rec is not None:
+        rec.record(kind, data)
+
+
+def shutdown():
+    """Дописывает и закрывает установленный рекордер (блокирующий вызов)."""
+    rec = _recorder
+    install(None)
+    if rec is not None:
+        rec.close()
+
+
+def _plain(data: Any) -> Any:
+    """bytes → str (сырые ответы и WS-кадры), на один уровень вглубь dict."""
+    if isinstance(data, (bytes, bytearray)):
+        return data.decode("utf-8", "replace")
+    if isinstance(data, dict):
+        return {k: _plain(v) if isinstance(v, (bytes, bytearray)) else v for k, v in data.items()}
+    return data
+
+
+class Recorder:
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 20,
+        kinds: Optional[Iterable[str]] = None,
+        flush_sec: float = 1.0,
+        queue_size: int = 100_000,
+        prefix: str = "rec",
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.kinds = set(kinds) if kinds else None
+        self.flush_sec = flush_sec
+        self.prefix = prefix
+
+        self.written = 0
+        self.dropped = 0
+        self._seq = 0
+        self._q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        os.makedirs(directory, exist_ok=True)
+        self._thread.start()
+        logger.info(f"🎞 Запись потоков: {directory} (ротация {max_bytes // (1024 * 1024)} МБ × {max_files})")
+
+    def record(self, kind: str, data: Any):
+        if self.kinds is not None and kind not in self.kinds:
+            return
+        try:
+            self._q.put_nowait((time.monotonic(), time.time(), kind, data))
+        except queue.Full:
+            self.dropped += 1
+
+    # ---------------------- фоновый поток ----------------------
+
+    def _open_next(self):
+        self._seq += 1
+        name = f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{self._seq:03d}.jsonl.gz"
+        files = iter_files(self.directory, self.prefix)
+        for old in files[:max(0, len(files) - self.max_files + 1)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        # compresslevel=3: в 3–4 раза быстрее уровня по умолчанию при близком сжатии JSON
+        return gzip.open(os.path.join(self.directory, name), "ab", compresslevel=3)
+
+    def _run(self):
+        f = None
+        size = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._q.get(timeout=self.flush_sec)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                mono, wall, kind, data = item
+                try:
+                    line = serializer.dumps({"m": mono, "t": wall, "k": kind, "d": _plain(data)}) + b"\n"
+                except Exception as e:
+                    logger.warning(f"Recorder: не удалось сериализовать {kind}: {e}")
+                    continue
+                if f is None or size >= self.max_bytes:
+                    if f is not None:
+                        f.close()
+                    f = self._open_next()
+                    size = 0
+                f.write(line)
+                size += len(line)
+                self.written += 1
+            now = time.monotonic()
+            if f is not None and now - last_flush >= self.flush_sec:
+                f.flush()
+                last_flush = now
+        if f is not None:
+            f.close()
+
+    def close(self):
+        """Дописывает очередь и закрывает файл (блокирующий вызов)."""
+        self._q.put(_STOP)
+        self._thread.join(timeout=10)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"written": self.written, "dropped": self.dropped, "queued": self._q.qsize()}
+
+
+# ============================================================
+#  ЧТЕНИЕ
+# ============================================================
+
+def iter_files(path: str, prefix: str = "rec") -> List[str]:
+    """Файлы записи по порядку (имя содержит время и номер)."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, f"{prefix}-*.jsonl.gz")))
+    return [path]
+
+
+def read(path: str, kinds: Optional[Iterable[str]] = None) -> Iterator[dict]:
+    """Записи по порядку; недописанный хвост текущего файла пропускается."""
+    wanted = set(kinds) if kinds else None
+    for name in iter_files(path):
+        try:
+            with gzip.open(name, "rb") as f:
+                for line in f:
+                    rec = serializer.loads(line)
+                    if wanted is None or rec.get("k") in wanted:
+                        yield rec
+        except (EOFError, gzip.BadGzipFile, ValueError) as e:
+            logger.warning(f"Recorder: {name} прочитан не полностью: {e}")
+
+
+def master_snapshots(path: str):
+    """Снимки мастера в формате trader.replay: [(unix_ts, [Position, ...]), ...]."""
+    from utils.models import Position
+
+    return [
+        (rec["t"], [Position(**p) for p in rec["d"]])
+        for rec in read(path, kinds=("master",))
+    ]
+
+
+async def replay_into(trader, path: str, speed: float = 0.0) -> List[float]:
+    """
+    Подаёт записанные снимки мастера в CopyTrader (differ → apply_events)
+    в исходном порядке. speed > 0 — с исходными интервалами, ускоренными
+    в speed раз; 0 — без пауз. Возвращает задержки обработки снимков (с).
+    """
+    from utils.models import Position
+
+    latencies: List[float] = []
+    prev_mono = None
+    seeded = False
+    for rec in read(path, kinds=("master",)):
+        positions = [Position(**p) for p in rec["d"]]
+        if not seeded:
+            trader.differ.seed(positions)
+            trader.ignored_symbols = {p.symbol for p in positions}
+            seeded = True
+            prev_mono = rec["m"]
+            continue
+        if speed > 0 and prev_mono is not None:
+            await asyncio.sleep(max(0.0, rec["m"] - prev_mono) / speed)
+        prev_mono = rec["m"]
+        started = time.perf_counter()
+        events = trader.differ.diff(positions)
+        if events:
+            await trader.apply_events(events)
+            await trader.engine.drain()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def latency_report(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Задержки по записи (мс):
+    - detect_to_order: снимок мастера с изменением → первый запрос ордера по символу;
+    - order_to_ack:    запрос ордера → ответ биржи.
+    """
+    last_master = None
+    pending: Dict[str, float] = {}            # symbol -> monotonic снимка-источника
+    req_at: Dict[int, float] = {}
+    detect: List[float] = []
+    ack: List[float] = []
+    for rec in read(path, kinds=("master", "event", "req", "resp")):
+        k, d = rec["k"], rec["d"]
+        if k == "master":
+            last_master = rec["m"]
+        elif k == "event" and last_master is not None:
+            pending.setdefault(d.get("symbol"), last_master)
+        elif k == "req" and d.get("path") == "/v5/order/create":
+            body = d.get("body") or {}
+            if isinstance(body, (str, bytes)):
+                # заранее подписанные тела (prepare_close) записаны сырой строкой
+                try:
+                    body = serializer.loads(body)
+                except Exception:
+                    body = {}
+            symbol = body.get("symbol") if isinstance(body, dict) else None
+            if symbol in pending:
+                detect.append((rec["m"] - pending.pop(symbol)) * 1000)
+            req_at[d.get("id")] = rec["m"]
+        elif k == "resp" and d.get("id") in req_at:
+            ack.append((rec["m"] - req_at.pop(d["id"])) * 1000)
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        return {
+            "count": len(values),
+            "p50": round(_pct(values, 0.5), 2),
+            "p95": round(_pct(values, 0.95), 2),
+            "max": round(max(values), 2) if values else 0.0,
+        }
+
+    return {"detect_to_order": summary(detect), "order_to_ack": summary(ack)}
@@ -0,0 +1,89 @@
+"""
+Слой сериализации JSON
+----------------------
+Выбирает самый быстрый доступный бэкенд: orjson → msgspec → stdlib json.
+- loads()/dumps() работают с bytes напрямую (без промежуточного str);
+- decode(raw, Schema) при наличии msgspec декодирует ответ прямо в
+  msgspec.Struct из utils/wire.py (без построения dict), иначе — в dict;
+- dump_file()/load_file() — для файла состояния (атомарная запись, UTF-8 без \\u-экранирования).
+"""
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - зависит от окружения
+    msgspec = None
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+if msgspec is not None:
+    _ms_encoder = msgspec.json.Encoder()
+    _ms_decoder = msgspec.json.Decoder()
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return _ms_decoder.decode(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Компактный JSON (без пробелов) в bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    if msgspec is not None:
+        return _ms_encoder.encode(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_pretty(obj: Any) -> bytes:
+    """JSON с отступом 2 пробела — для файлов, которые читает человек."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    if msgspec is not None:
+        return msgspec.json.format(_ms_encoder.encode(obj), indent=2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def decode(data: bytes | str, schema: type) -> Any:
+    """
+    Декодирует JSON по схеме из utils/wire.py. Результат читается через
+    wire.get_field(): это msgspec.Struct либо dict (без msgspec или если
+    Bybit поменял тип поля и строгая схема не подошла).
+    """
+    if msgspec is not None and issubclass(schema, msgspec.Struct):
+        try:
+            return msgspec.json.decode(data, type=schema)
+        except msgspec.ValidationError:
+            pass
+    return loads(data)
+
+
+def dump_file(obj: Any, path: str, pretty: bool = True):
+    """Атомарная запись: во временный файл и os.replace()."""
+    raw = dumps_pretty(obj) if pretty else dumps(obj)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+    os.replace(tmp, path)
+
+
+def load_file(path: str) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
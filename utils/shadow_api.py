@@ -0,0 +1,410 @@
+"""
+Теневое исполнение (DRY_RUN / shadow)
+-------------------------------------
+ShadowAPI повторяет торговые методы BybitAPI, но ордера на биржу не уходят:
+исполнение моделируется по локальному стакану (если есть PublicStream)
+или по mark price, с задержкой и комиссией, а результат копится
+в виртуальном портфеле подписчика.
+
+Модели (значения читаются из settings на каждом ордере):
+- задержка:  SHADOW_LATENCY_MS ± SHADOW_LATENCY_JITTER_MS (нормальное распределение);
+- комиссия:  SHADOW_TAKER_FEE_PCT (Market/IOC, триггеры), SHADOW_MAKER_FEE_PCT (лимитки в стакане);
+- стартовый баланс: SHADOW_BALANCE.
+
+С биржи читаются только публичные цены (/v5/market/tickers) через price_api.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import serializer
+from utils.models import Order, Position, Wallet
+
+logger = logging.getLogger(__name__)
+
+
+def _dir(side: str) -> float:
+    return 1.0 if side.lower() in ("buy", "long") else -1.0
+
+
+def _ack(order_id: str) -> dict:
+    """Ответ в формате /v5/order/create."""
+    return {"retCode": 0, "retMsg": "OK", "result": {"orderId": order_id}}
+
+
+class ShadowAPI:
+    def __init__(
+        self,
+        price_api,
+        setting: Callable[[str, Any], Any],
+        market=None,
+        role: str = "SHADOW",
+        state_file: Optional[str] = None,
+    ):
+        self.price_api = price_api          # BybitAPI для публичных цен
+        self.market = market                # PublicStream или None
+        self.setting = setting
+        self.role = role.upper()
+        self.env = getattr(price_api, "env", "mainnet")
+        self.state_file = state_file
+        self.request_count = 0              # ордера на биржу не отправляются
+
+        self.cash = float(setting("SHADOW_BALANCE", 10000.0) or 10000.0)
+        self.positions: Dict[str, dict] = {}    # symbol -> {side, size, entry, leverage, tp, sl}
+        self.orders: Dict[str, dict] = {}       # orderLinkId -> ордер, ждущий цены/триггера
+        self.leverage: Dict[str, int] = {}
+        self.marks: Dict[str, float] = {}
+        self.realized = 0.0
+        self.fees = 0.0
+        self.fills = 0
+        self._ids = itertools.count(1)
+        # on_fill(symbol, side, qty, price, fee) — журнал сделок (используется replay)
+        self.on_fill: Optional[Callable[[str, str, float, float, float], None]] = None
+        self._lock = asyncio.Lock()
+        self._load()
+        logger.info(f"👻 [{self.role}] Теневое исполнение: баланс {self.cash:.2f} USDT, {len(self.positions)} позиций")
+
+    # ---------------------- состояние ----------------------
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            data = serializer.load_file(self.state_file)
+            self.cash = float(data.get("cash", self.cash))
+            self.positions = data.get("positions") or {}
+            self.orders = data.get("orders") or {}
+            self.realized = float(data.get("realized") or 0.0)
+            self.fees = float(data.get("fees") or 0.0)
+            self.fills = int(data.get("fills") or 0)
+        except Exception as e:
+            logger.warning(f"[{self.role}] Не удалось загрузить {self.state_file}: {e}")
+
+    def _save(self):
+        if not self.state_file:
+            return
+        try:
+            serializer.dump_file({
+                "cash": self.cash,
+                "positions": self.positions,
+                "orders": self.orders,
+                "realized": self.realized,
+                "fees": self.fees,
+                "fills": self.fills,
+            }, self.state_file)
+        except Exception as e:
+            logger.warning(f"[{self.role}] Не удалось сохранить {self.state_file}: {e}")
+
+    # ---------------------- модели ----------------------
+
+    async def _latency(self):
+        mean = float(self.setting("SHADOW_LATENCY_MS", 150.0) or 0.0)
+        jitter = float(self.setting("SHADOW_LATENCY_JITTER_MS", 50.0) or 0.0)
+        delay = max(0.0, random.gauss(mean, jitter)) / 1000 if mean or jitter else 0.0
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _fee_rate(self, maker: bool) -> float:
+        if maker:
+            return float(self.setting("SHADOW_MAKER_FEE_PCT", 0.02) or 0.0) / 100
+        return float(self.setting("SHADOW_TAKER_FEE_PCT", 0.055) or 0.0) / 100
+
+    async def _mark(self, symbol: str) -> float:
+        prices = await self.price_api.get_mark_prices([symbol])
+        if prices and prices.get(symbol):
+            self.marks[symbol] = prices[symbol]
+        return self.marks.get(symbol, 0.0)
+
+    async def _taker_price(self, symbol: str, side: str, qty: float, limit: Optional[float]) -> Tuple[float, float]:
+        """(средняя цена, исполненный объём) рыночного/IOC исполнения."""
+        book = self.market.book(symbol) if self.market is not None else None
+        if book is not None:
+            book_side = book.side_for(side)
+            if limit:
+                qty = min(qty, book_side.depth_until(limit))
+            avg, filled, _ = book_side.sweep(qty)
+            if filled > 0:
+                return avg, filled
+        mark = await self._mark(symbol)
+        if mark <= 0:
+            return 0.0, 0.0
+        if limit and (mark - limit) * _dir(side) > 0:
+            return mark, 0.0    # цена ушла за лимит — IOC не исполнен
+        return mark, qty
+
+    # ---------------------- портфель ----------------------
+
+    def _fill(self, symbol: str, side: str, qty: float, price: float, maker: bool = False,
+              reduce_only: bool = False) -> float:
+        """Применяет сделку к позиции (неттинг one-way). Возвращает исполненный объём."""
+        d = _dir(side)
+        pos = self.positions.get(symbol)
+        realized = 0.0
+        if pos is not None and _dir(pos["side"]) != d:
+            closed = min(qty, pos["size"])
+            realized = (price - pos["entry"]) * closed * _dir(pos["side"])
+            pos["size"] -= closed
+            left = qty - closed
+            if pos["size"] <= 1e-12:
+                del self.positions[symbol]
+                pos = None
+            if reduce_only:
+                qty = closed
+            elif left > 1e-12:
+                pos = self.positions[symbol] = {
+                    "side": side.lower(), "size": left, "entry": price,
+                    "leverage": self.leverage.get(symbol, 10), "tp": 0.0, "sl": 0.0,
+                }
+        elif reduce_only:
+            return 0.0
+        elif pos is None:
+            self.positions[symbol] = {
+                "side": side.lower(), "size": qty, "entry": price,
+                "leverage": self.leverage.get(symbol, 10), "tp": 0.0, "sl": 0.0,
+            }
+        else:
+            total = pos["size"] + qty
+            pos["entry"] = (pos["entry"] * pos["size"] + price * qty) / total
+            pos["size"] = total
+
+        fee = price * qty * self._fee_rate(maker)
+        self.cash += realized - fee
+        self.realized += realized
+        self.fees += fee
+        self.fills += 1
+        self.marks.setdefault(symbol, price)
+        if self.on_fill is not None:
+            self.on_fill(symbol, side.lower(), qty, price, fee)
+        logger.info(
+            f"[{self.role}] 👻 {symbol} {side} qty={qty} @ {price:g} "
+            f"(pnl={realized:+.4f}, fee={fee:.4f})"
+        )
+        self._save()
+        return qty
+
+    async def _market(self, symbol: str, side: str, qty: float, limit: Optional[float] = None,
+                      reduce_only: bool = False) -> float:
+        await self._latency()
+        price, filled = await self._taker_price(symbol, side, qty, limit)
+        if filled <= 0:
+            logger.warning(f"[{self.role}] {symbol} {side} qty={qty}: не исполнено (цена {price or '—'})")
+            return 0.0
+        async with self._lock:
+            return self._fill(symbol, side, filled, price, reduce_only=reduce_only)
+
+    async def _refresh(self):
+        """Обновляет mark price и исполняет сработавшие лимитки, триггеры и TP/SL."""
+        symbols = set(self.positions) | {o["symbol"] for o in self.orders.values()}
+        if not symbols:
+            return
+        prices = await self.price_api.get_mark_prices(sorted(symbols))
+        if not prices:
+            return
+        self.marks.update(prices)
+        async with self._lock:
+            for link_id, o in list(self.orders.items()):
+                mark = self.marks.get(o["symbol"], 0.0)
+                if mark <= 0:
+                    continue
+                d = _dir(o["side"])
+                if o["trigger_price"]:
+                    up = o["trigger_direction"] != 2
+                    if (mark >= o["trigger_price"]) if up else (mark <= o["trigger_price"]):
+                        del self.orders[link_id]
+                        self._fill(o["symbol"], o["side"], o["qty"], mark, reduce_only=o["reduce_only"])
+                elif (o["price"] - mark) * d >= 0:
+                    del self.orders[link_id]
+                    self._fill(o["symbol"], o["side"], o["qty"], o["price"], maker=True,
+                               reduce_only=o["reduce_only"])
+            for symbol, pos in list(self.positions.items()):
+                mark = self.marks.get(symbol, 0.0)
+                d = _dir(pos["side"])
+                tp_hit = pos["tp"] and (mark - pos["tp"]) * d >= 0
+                sl_hit = pos["sl"] and (mark - pos["sl"]) * d <= 0
+                if mark > 0 and (tp_hit or sl_hit):
+                    logger.info(f"[{self.role}] 🎯 {symbol}: сработал {'TP' if tp_hit else 'SL'} @ {mark:g}")
+                    self._fill(symbol, "sell" if d > 0 else "buy", pos["size"], mark, reduce_only=True)
+
+    def _upnl(self) -> float:
+        return sum(
+            (self.marks.get(s, p["entry"]) - p["entry"]) * p["size"] * _dir(p["side"])
+            for s, p in self.positions.items()
+        )
+
+    # ---------------------- интерфейс BybitAPI ----------------------
+
+    async def check_auth(self) -> bool:
+        return True
+
+    async def warm_up(self, positions: bool = False):
+        await self.price_api.warm_up()
+
+    async def get_wallet(self) -> Optional[Wallet]:
+        upnl = self._upnl()
+        margin = sum(
+            self.marks.get(s, p["entry"]) * p["size"] / max(1, int(p["leverage"]))
+            for s, p in self.positions.items()
+        )
+        return Wallet(
+            total_equity=self.cash + upnl,
+            available=max(0.0, self.cash + upnl - margin),
+            wallet_balance=self.cash,
+            unrealised_pnl=upnl,
+        )
+
+    async def get_balance(self) -> float:
+        wallet = await self.get_wallet()
+        return wallet.available if wallet else 0.0
+
+    async def get_mark_prices(self, symbols: Optional[List[str]] = None) -> Optional[Dict[str, float]]:
+        return await self.price_api.get_mark_prices(symbols)
+
+    async def get_open_positions(self) -> Optional[List[Position]]:
+        await self._refresh()
+        out = []
+        for symbol, p in self.positions.items():
+            mark = self.marks.get(symbol, p["entry"])
+            out.append(Position(
+                symbol, p["side"], p["size"], p["entry"],
+                mark_price=mark,
+                position_value=mark * p["size"],
+                unrealised_pnl=(mark - p["entry"]) * p["size"] * _dir(p["side"]),
+                leverage=int(p["leverage"]),
+            ))
+        return out
+
+    async def get_open_positions_detailed(self) -> List[Position]:
+        return await self.get_open_positions() or []
+
+    async def set_leverage(self, symbol: str, leverage: int) -> bool:
+        self.leverage[symbol.upper()] = int(leverage)
+        pos = self.positions.get(symbol.upper())
+        if pos is not None:
+            pos["leverage"] = int(leverage)
+        return True
+
+    async def open_position(self, symbol: str, side: str, qty: float, leverage: int = 10,
+                            price: float | None = None):
+        await self.set_leverage(symbol, leverage)
+        filled = await self._market(symbol.upper(), side, qty, limit=price)
+        return _ack(f"shadow-{next(self._ids)}") if filled > 0 else None
+
+    async def reduce_position(self, symbol: str, side: str, qty: float) -> bool:
+        opposite = "sell" if _dir(side) > 0 else "buy"
+        return await self._market(symbol.upper(), opposite, qty, reduce_only=True) > 0
+
+    async def close_position(self, symbol: str, position: Optional[Position] = None) -> bool:
+        pos = self.positions.get(symbol.upper())
+        if pos is None:
+            return True
+        opposite = "sell" if _dir(pos["side"]) > 0 else "buy"
+        return await self._market(symbol.upper(), opposite, pos["size"], reduce_only=True) > 0
+
+    def prepare_close(self, position: Position) -> Position:
+        return position
+
+    async def submit_close(self, symbol: str, prepared: Position) -> bool:
+        return await self.close_position(symbol, position=prepared)
+
+    async def get_open_orders(self) -> Optional[List[Order]]:
+        return [
+            Order(
+                o["order_id"], link_id, o["symbol"], o["side"], o["order_type"], o["price"], o["qty"],
+                trigger_price=o["trigger_price"], trigger_direction=o["trigger_direction"],
+                reduce_only=o["reduce_only"], time_in_force=o["time_in_force"], status="New",
+            )
+            for link_id, o in self.orders.items()
+        ]
+
+    async def place_order(
+        self,
+        symbol: str,
+        side: str,
+        qty: float,
+        order_type: str = "Limit",
+        price: float | None = None,
+        trigger_price: float | None = None,
+        trigger_direction: int | None = None,
+        reduce_only: bool = False,
+        time_in_force: str = "GTC",
+        order_link_id: str | None = None,
+    ):
+        order_id = f"shadow-{next(self._ids)}"
+        symbol = symbol.upper()
+        if order_type == "Market" and not trigger_price:
+            filled = await self._market(symbol, side, qty, reduce_only=reduce_only)
+            return _ack(order_id) if filled > 0 else None
+        await self._latency()
+        self.orders[order_link_id or order_id] = {
+            "order_id": order_id,
+            "symbol": symbol,
+            "side": side.lower(),
+            "order_type": order_type,
+            "price": float(price or 0.0),
+            "qty": float(qty),
+            "trigger_price": float(trigger_price or 0.0),
+            "trigger_direction": int(trigger_direction or (1 if trigger_price else 0)),
+            "reduce_only": bool(reduce_only),
+            "time_in_force": time_in_force,
+        }
+        self._save()
+        logger.info(f"[{self.role}] 📝 {symbol} {side} {order_type} qty={qty} price={price or '-'} (виртуально)")
+        return _ack(order_id)
+
+    async def amend_order(self, symbol: str, order_link_id: str, qty: float | None = None,
+                          price: float | None = None, trigger_price: float | None = None) -> bool:
+        o = self.orders.get(order_link_id)
+        if o is None:
+            return False
+        if qty:
+            o["qty"] = float(qty)
+        if price:
+            o["price"] = float(price)
+        if trigger_price:
+            o["trigger_price"] = float(trigger_price)
+        self._save()
+        return True
+
+    async def cancel_order(self, symbol: str, order_link_id: str) -> bool:
+        ok = self.orders.pop(order_link_id, None) is not None
+        if ok:
+            self._save()
+        return ok
+
+    async def cancel_all_orders(self) -> bool:
+        self.orders.clear()
+        self._save()
+        return True
+
+    async def set_trading_stop(self, symbol: str, take_profit: float | None = None,
+                               stop_loss: float | None = None, position_idx: int = 0) -> bool:
+        pos = self.positions.get(symbol.upper())
+        if pos is None:
+            return False
+        if take_profit is not None:
+            pos["tp"] = float(take_profit)
+        if stop_loss is not None:
+            pos["sl"] = float(stop_loss)
+        self._save()
+        return True
+
+    def get_summary(self) -> Dict[str, Any]:
+        wallet_upnl = self._upnl()
+        return {
+            "equity": self.cash + wallet_upnl,
+            "cash": self.cash,
+            "upnl": wallet_upnl,
+            "realized": self.realized,
+            "fees": self.fees,
+            "fills": self.fills,
+            "open_count": len(self.positions),
+            "orders": len(self.orders),
+        }
+
+    async def close(self):
+        self._save()
+        await self.price_api.close()
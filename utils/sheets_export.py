@@ -0,0 +1,187 @@
+"""
+Экспорт закрытых сделок в Google Sheets
+---------------------------------------
+Источник — StatsManager.state["history"]: список только дополняется, поэтому
+номер сделки в нём служит её id, а экспорт — это «всё, что правее отметки».
+Отметка (high-water mark) хранится в отдельном файле и сдвигается только
+после успешного append_rows — перезапуск продолжает с места остановки
+без дублей.
+
+Фоновая задача копит новые сделки SHEETS_FLUSH_SEC секунд (или до
+SHEETS_BATCH строк) и пишет их одним append_rows в отдельном потоке.
+Между записями выдерживается интервал по квоте SHEETS_WRITES_PER_MIN,
+ошибки API — экспоненциальная пауза. Цикл копирования только будит
+экспорт (Event.set) и никогда его не ждёт.
+
+Без gspread/учётных данных — FakeSheetsClient (строки в памяти и,
+при указании пути, в CSV): SHEETS_FAKE=true.
+"""
+
+import asyncio
+import csv
+import logging
+import os
+import time
+from typing import Any, List, Optional
+
+from utils import serializer
+
+logger = logging.getLogger(__name__)
+
+HEADER = [
+    "id", "symbol", "side", "qty", "entry_price", "exit_price", "leverage",
+    "pnl", "opened_at", "closed_at", "duration_sec", "averages",
+]
+
+
+def trade_row(trade_id: int, t: dict) -> List[Any]:
+    return [
+        trade_id, t.get("symbol"), t.get("side"), t.get("qty"), t.get("entry_price"),
+        t.get("exit_price"), t.get("leverage"), t.get("pnl"), t.get("opened_at"),
+        t.get("closed_at"), t.get("duration_sec"), t.get("averages"),
+    ]
+
+
+class FakeSheetsClient:
+    """Локальная замена gspread.Worksheet: append_rows в память и, опционально, в CSV."""
+
+    def __init__(self, path: Optional[str] = None, fail_every: int = 0):
+        self.path = path
+        self.rows: List[List[Any]] = []
+        self.calls = 0
+        self.fail_every = fail_every   # каждый N-й вызов падает (проверка повторов)
+
+    def append_rows(self, values: List[List[Any]], value_input_option: str = "RAW"):
+        self.calls += 1
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise RuntimeError("FakeSheetsClient: искусственная ошибка квоты")
+        self.rows.extend(values)
+        if self.path:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(values)
+
+
+def open_worksheet(credentials_file: str, spreadsheet_id: str, worksheet: str):
+    """gspread.Worksheet (создаётся с заголовком, если его нет) или None."""
+    try:
+        import gspread
+    except ImportError:
+        logger.warning("⚠️ gspread не установлен — экспорт в Google Sheets выключен.")
+        return None
+    try:
+        book = gspread.service_account(filename=credentials_file).open_by_key(spreadsheet_id)
+        try:
+            return book.worksheet(worksheet)
+        except gspread.WorksheetNotFound:
+            ws = book.add_worksheet(worksheet, rows=1000, cols=len(HEADER))
+            ws.append_row(HEADER)
+            return ws
+    except Exception as e:
+        logger.warning(f"⚠️ Не удалось открыть таблицу {spreadsheet_id}: {e}")
+        return None
+
+
+class SheetsExporter:
+    def __init__(
+        self,
+        stats,
+        worksheet,
+        state_file: str = "sheets_export.json",
+        batch_size: int = 200,
+        flush_sec: float = 5.0,
+        writes_per_min: int = 50,
+    ):
+        self.stats = stats
+        self.worksheet = worksheet
+        self.state_file = state_file
+        self.batch_size = batch_size
+        self.flush_sec = flush_sec
+        self.min_interval = 60.0 / max(1, writes_per_min)
+
+        self.hwm = self._load_hwm()
+        self.exported = 0
+        self.failed = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_write = 0.0
+
+    def _load_hwm(self) -> int:
+        try:
+            if os.path.exists(self.state_file):
+                return int(serializer.load_file(self.state_file).get("hwm", 0))
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать {self.state_file}: {e}")
+        return 0
+
+    def _save_hwm(self):
+        serializer.dump_file({"hwm": self.hwm, "updated_at": time.time()}, self.state_file)
+
+    def notify(self):
+        """Новая закрытая сделка (вызывается из StatsManager, не блокирует)."""
+        self._wake.set()
+
+    async def _write(self, rows: List[List[Any]]):
+        wait = self._last_write + self.min_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_write = time.monotonic()
+        await asyncio.to_thread(self.worksheet.append_rows, rows, value_input_option="RAW")
+
+    async def flush(self) -> int:
+        """Пишет всё, что правее отметки, пачками по batch_size. Возвращает число строк."""
+        written = 0
+        history = self.stats.state.get("history", [])
+        while self.hwm < len(history):
+            end = min(len(history), self.hwm + self.batch_size)
+            rows = [trade_row(i, history[i]) for i in range(self.hwm, end)]
+            await self._write(rows)
+            self.hwm = end
+            self._save_hwm()
+            written += len(rows)
+            self.exported += len(rows)
+        return written
+
+    async def _run(self):
+        backoff = self.min_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=60.0)
+                # даём набраться пачке: закрытия часто идут сериями
+                await asyncio.sleep(self.flush_sec)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                n = await self.flush()
+                if n:
+                    logger.info(f"📤 Google Sheets: выгружено {n} сделок (отметка {self.hwm})")
+                backoff = self.min_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"⚠️ Google Sheets: ошибка записи ({e}), повтор через {backoff:.0f} с")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 300.0)
+                self._wake.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake.set()   # догоняем сделки, закрытые пока бот был выключен
+            self._task = asyncio.create_task(self._run(), name="sheets-export")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await asyncio.wait_for(self.flush(), timeout=10)
+        except Exception as e:
+            logger.warning(f"Google Sheets: финальная выгрузка не удалась: {e}")
+
+    def get_stats(self) -> dict:
+        pending = len(self.stats.state.get("history", [])) - self.hwm
+        return {"hwm": self.hwm, "pending": pending, "exported": self.exported, "failed": self.failed}
@@ -0,0 +1,249 @@
+"""
+Схемы ответов Bybit v5 (wire-формат)
+------------------------------------
+Числа Bybit отдаёт строками, поэтому числовые поля здесь — str;
+перевод в float делает код, который эти структуры читает.
+
+При наличии msgspec схемы — msgspec.Struct и декодируются из bytes
+без промежуточных dict. Без msgspec схемы служат только описанием
+формата: serializer.decode() отдаёт обычный dict, а код читает поля
+через get_field() — лишний проход конвертации не нужен.
+"""
+
+import typing
+from typing import Any, List, Optional
+
+from utils.serializer import msgspec
+
+NATIVE = msgspec is not None
+
+
+def _schema(cls):
+    """С msgspec превращает аннотированный класс в msgspec.Struct."""
+    if not NATIVE:
+        return cls
+    hints = typing.get_type_hints(cls)
+    fields = [(name, tp, getattr(cls, name)) for name, tp in hints.items()]
+    return msgspec.defstruct(cls.__name__, fields, kw_only=True, omit_defaults=True)
+
+
+def get_field(obj: Any, name: str, default: Any = None) -> Any:
+    """Единый доступ к полю для dict и для структур."""
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+# ============================================================
+#  /v5/market/time
+# ============================================================
+
+@_schema
+class ServerTimeResult:
+    timeSecond: str = ""
+    timeNano: str = ""
+
+
+@_schema
+class ServerTimeResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[ServerTimeResult] = None
+
+
+# ============================================================
+#  /v5/position/list
+# ============================================================
+
+@_schema
+class PositionRow:
+    symbol: str = ""
+    side: str = ""
+    size: str = "0"
+    avgPrice: str = "0"
+    markPrice: str = "0"
+    positionValue: str = "0"
+    unrealisedPnl: str = "0"
+    leverage: str = "10"
+    liqPrice: str = ""
+    positionIdx: int = 0
+    updatedTime: str = ""
+
+
+@_schema
+class PositionListResult:
+    list: List[PositionRow] = []
+    nextPageCursor: str = ""
+
+
+@_schema
+class PositionListResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[PositionListResult] = None
+
+
+# ============================================================
+#  /v5/account/wallet-balance
+# ============================================================
+
+@_schema
+class WalletCoin:
+    coin: str = ""
+    walletBalance: str = "0"
+    availableToWithdraw: str = ""
+    equity: str = "0"
+    unrealisedPnl: str = "0"
+
+
+@_schema
+class WalletAccount:
+    accountType: str = ""
+    totalEquity: str = "0"
+    totalAvailableBalance: str = "0"
+    coin: List[WalletCoin] = []
+
+
+@_schema
+class WalletResult:
+    list: List[WalletAccount] = []
+
+
+@_schema
+class WalletResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[WalletResult] = None
+
+
+# ============================================================
+#  /v5/order/realtime
+# ============================================================
+
+@_schema
+class OrderRow:
+    orderId: str = ""
+    orderLinkId: str = ""
+    symbol: str = ""
+    side: str = ""
+    orderType: str = ""
+    price: str = "0"
+    qty: str = "0"
+    triggerPrice: str = "0"
+    triggerDirection: int = 0
+    stopOrderType: str = ""
+    reduceOnly: bool = False
+    timeInForce: str = ""
+    orderStatus: str = ""
+    takeProfit: str = ""
+    stopLoss: str = ""
+    createdTime: str = "0"
+    updatedTime: str = "0"
+
+
+@_schema
+class OrderListResult:
+    list: List[OrderRow] = []
+    nextPageCursor: str = ""
+
+
+@_schema
+class OrderListResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[OrderListResult] = None
+
+
+# ============================================================
+#  /v5/execution/list
+# ============================================================
+
+@_schema
+class ExecutionRow:
+    execId: str = ""
+    orderId: str = ""
+    orderLinkId: str = ""
+    symbol: str = ""
+    side: str = ""
+    execPrice: str = "0"
+    execQty: str = "0"
+    execValue: str = "0"
+    execFee: str = "0"
+    feeRate: str = "0"
+    execType: str = ""
+    isMaker: bool = False
+    closedSize: str = "0"
+    execTime: str = "0"
+
+
+@_schema
+class ExecutionListResult:
+    list: List[ExecutionRow] = []
+    nextPageCursor: str = ""
+
+
+@_schema
+class ExecutionListResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[ExecutionListResult] = None
+
+
+# ============================================================
+#  /v5/position/closed-pnl
+# ============================================================
+
+@_schema
+class ClosedPnlRow:
+    orderId: str = ""
+    symbol: str = ""
+    side: str = ""
+    qty: str = "0"
+    avgEntryPrice: str = "0"
+    avgExitPrice: str = "0"
+    closedPnl: str = "0"
+    cumEntryValue: str = "0"
+    cumExitValue: str = "0"
+    leverage: str = "10"
+    createdTime: str = "0"
+    updatedTime: str = "0"
+
+
+@_schema
+class ClosedPnlListResult:
+    list: List[ClosedPnlRow] = []
+    nextPageCursor: str = ""
+
+
+@_schema
+class ClosedPnlListResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[ClosedPnlListResult] = None
+
+
+# ============================================================
+#  /v5/market/tickers
+# ============================================================
+
+@_schema
+class TickerRow:
+    symbol: str = ""
+    lastPrice: str = "0"
+    markPrice: str = "0"
+    bid1Price: str = "0"
+    ask1Price: str = "0"
+
+
+@_schema
+class TickerListResult:
+    list: List[TickerRow] = []
+
+
+@_schema
+class TickerListResponse:
+    retCode: int = -1
+    retMsg: str = ""
+    result: Optional[TickerListResult] = None
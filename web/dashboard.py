@@ -0,0 +1,190 @@
+"""
+Веб-панель мониторинга (Flask-SocketIO)
+---------------------------------------
+Показывает позиции мастера и подписчика, задержку копирования, состояние
+риска и PnL по окнам. Данные — только из памяти CopyTrader, к Bybit панель
+не обращается, поэтому число зрителей не влияет на нагрузку на биржу.
+
+Кадр состояния собирается в event loop бота DASHBOARD_FPS раз в секунду;
+зрителям уходит только разница с предыдущим кадром (delta), один emit на
+всех. Новый зритель получает полный кадр (snapshot) при подключении.
+
+Flask-SocketIO работает в режиме threading в отдельном потоке.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PNL_WINDOWS = [1, 7, 30, 90]
+_SECTIONS = ("master", "follower")   # словари symbol -> строка, шлются построчно
+_PNL_REFRESH_SEC = 10.0
+
+
+def _diff(prev: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    """Разница кадров: для позиций — изменённые строки и удалённые символы, остальное — целиком."""
+    delta: Dict[str, Any] = {}
+    for key, value in cur.items():
+        old = prev.get(key)
+        if key in _SECTIONS:
+            old = old or {}
+            changed = {s: row for s, row in value.items() if old.get(s) != row}
+            removed = [s for s in old if s not in value]
+            if changed or removed:
+                delta[key] = {"set": changed, "del": removed}
+        elif key != "ts" and old != value:
+            delta[key] = value
+    if delta:
+        delta["ts"] = cur["ts"]
+    return delta
+
+
+class Dashboard:
+    def __init__(self, trader, host: str = "127.0.0.1", port: int = 8050, fps: float = 4.0):
+        from flask import Flask, send_from_directory
+        from flask_socketio import SocketIO, emit
+
+        self.trader = trader
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / max(0.1, fps)
+        self.viewers = 0
+        self._viewers_lock = threading.Lock()   # connect/disconnect идут из потоков SocketIO
+        self.frames = 0
+        self.state: Dict[str, Any] = {}
+        self._pnl: Dict[str, float] = {}
+        self._pnl_key = None
+        self._task: Optional[asyncio.Task] = None
+
+        static = os.path.join(os.path.dirname(__file__), "static")
+        self.app = Flask(__name__, static_folder=static)
+        self.socketio = SocketIO(self.app, async_mode="threading")
+
+        @self.app.route("/")
+        def index():
+            return send_from_directory(static, "dashboard.html")
+
+        @self.socketio.on("connect")
+        def on_connect():
+            with self._viewers_lock:
+                self.viewers += 1
+            # кадр уже собран циклом бота — отдаём как есть, без обращения к трейдеру из чужого потока
+            emit("snapshot", self.state)
+
+        @self.socketio.on("disconnect")
+        def on_disconnect():
+            with self._viewers_lock:
+                self.viewers = max(0, self.viewers - 1)
+
+    # ---------------------- кадр состояния ----------------------
+
+    def _pnl_windows(self) -> Dict[str, float]:
+        stats = self.trader.stats
+        key = (len(stats.state.get("history", [])), int(time.monotonic() // _PNL_REFRESH_SEC))
+        if key != self._pnl_key:
+            self._pnl_key = key
+            self._pnl = {str(d): round(v, 2) for d, v in stats.pnl_by_windows(PNL_WINDOWS).items()}
+        return self._pnl
+
+    def build_state(self) -> Dict[str, Any]:
+        t = self.trader
+        marks = t.market_stream.marks if t.market_stream is not None else {}
+        follower = {}
+        for p in t.positions.values():
+            mark = marks.get(p.symbol) or p.mark_price
+            sign = 1 if p.side == "buy" else -1
+            follower[p.symbol] = {
+                "side": p.side,
+                "size": p.size,
+                "entry": p.entry_price,
+                "mark": mark,
+                "upnl": round((mark - p.entry_price) * p.size * sign, 4) if mark else p.unrealised_pnl,
+                "liq_pct": round(abs(mark - p.liq_price) / mark * 100, 2) if mark and p.liq_price else None,
+                "leverage": p.leverage,
+            }
+        kill = t.kill_switch.get_status()
+        loop = {}
+        if t.loop_watchdog is not None:
+            lag = t.loop_watchdog.get_stats()
+            loop = {k: lag[k] for k in ("p50", "p95", "p99", "max", "stalls")}
+        return {
+            "ts": time.time(),
+            "master": {
+                s: {"side": st.side, "qty": st.qty, "leverage": st.leverage, "price": st.price}
+                for s, st in t.differ.state.items()
+            },
+            "follower": follower,
+            "latency": t.engine.latency_summary(),
+            "risk": {
+                "kill_tripped": kill["tripped"],
+                "prepared_closes": kill["prepared"],
+                "peak_equity": round(kill["peak_equity"], 2),
+                "drawdown_limit_pct": t.setting("EQUITY_DRAWDOWN_PCT"),
+                "auto_close": bool(t.setting("AUTO_CLOSE_ON_DRAWDOWN", False)),
+                "dry_run": t.dry_run,
+                "dropped_events": t.engine.dropped,
+                "poll_sec": round(t.poller.interval, 2),
+            },
+            "pnl": self._pnl_windows(),
+            "loop": loop,
+        }
+
+    async def _frames(self):
+        while True:
+            started = time.monotonic()
+            try:
+                cur = self.build_state()
+                delta = _diff(self.state, cur)
+                self.state = cur
+                if delta and self.viewers:
+                    self.frames += 1
+                    await asyncio.to_thread(self.socketio.emit, "delta", delta)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[Dashboard] Ошибка кадра: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    # ---------------------- запуск ----------------------
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.socketio.run,
+            kwargs={"app": self.app, "host": self.host, "port": self.port,
+                    "allow_unsafe_werkzeug": True, "log_output": False},
+            name="dashboard",
+            daemon=True,
+        )
+        thread.start()
+        self._task = asyncio.create_task(self._frames(), name="dashboard-frames")
+        logger.info(f"🖥 Веб-панель: http://{self.host}:{self.port}/")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def create_dashboard(trader, cfg: dict) -> Optional[Dashboard]:
+    """Dashboard или None (DASHBOARD_PORT=0 или Flask-SocketIO не установлен)."""
+    port = int(cfg.get("DASHBOARD_PORT") or 0)
+    if port <= 0:
+        return None
+    try:
+        return Dashboard(
+            trader,
+            host=cfg.get("DASHBOARD_HOST") or "127.0.0.1",
+            port=port,
+            fps=float(cfg.get("DASHBOARD_FPS", 4.0)),
+        )
+    except ImportError as e:
+        logger.warning(f"⚠️ Веб-панель выключена: {e}")
+        return None